@@ -1,6 +1,6 @@
 import json
 from functools import cache, lru_cache, reduce
-from typing import Literal, NamedTuple
+from typing import Collection, Literal, NamedTuple
 
 import boto3
 import polars as pl
@@ -199,8 +199,16 @@ def _append_prediction_gameweek_team_stats(
 
 
 def load_data(
-    n_prediction_weeks: int, test_frac: float = 0.2, val_frac: float = 0.2
+    n_prediction_weeks: int,
+    test_frac: float = 0.2,
+    val_frac: float = 0.2,
+    feature_columns: Collection[str] | None = None,
 ) -> TrainTestValData:
+    """
+    With feature_columns, such as the prediction_columns of a pruned model, the
+    other lag features are dropped as each gameweek is built, so they aren't joined
+    across the gameweeks, and X only has those columns, in that order
+    """
     gw_stats = player_gameweek_stats()
     fixtures = _fixtures()
 
@@ -210,13 +218,18 @@ def load_data(
         fixture_stats = _get_gw_fixture_stats(gw_id, fixtures)
         df = player_stats.join(fixture_stats, left_on="team_id", right_on="team")
         gw_delta = gw_id - prediction_gw_id
-        return df.rename(
+        df = df.rename(
             {
                 i: i.replace(f"_{gw_id}_", f"_{gw_delta}_")
                 for i in df.columns
                 if i.startswith("gw_")
             }
         )
+        if feature_columns is None:
+            return df
+        return df.select(
+            "player_id", "team_id", *(i for i in df.columns if i in feature_columns)
+        )
 
     n = 1
     all_data = []
@@ -246,4 +259,8 @@ def load_data(
     data_with_positions = _append_position_encodings(
         data_with_prediction_gw_team_stats, gw_stats
     )
+    if feature_columns is not None:
+        data_with_positions = data_with_positions.select(
+            "player_id", "team_id", "prediction_gw", "gameweek_points", *feature_columns
+        )
     return _train_test_val_split(data_with_positions, test_frac, val_frac)
@@ -1,7 +1,16 @@
+from typing import TYPE_CHECKING
+
 import numpy as np
-from sklearn.preprocessing import OneHotEncoder
 
+if TYPE_CHECKING:  # pragma: no cover
+    from sklearn.preprocessing import OneHotEncoder
+
+POSITIONS = ("GKP", "DEF", "MID", "FWD")
+
+
+def position_encoder() -> "OneHotEncoder":
+    # sklearn is slow to import and only the lag feature predictors need it
+    from sklearn.preprocessing import OneHotEncoder
 
-def position_encoder() -> OneHotEncoder:
-    positions = np.array([["GKP", "DEF", "MID", "FWD"]]).transpose()
+    positions = np.array([POSITIONS]).transpose()
     return OneHotEncoder(sparse_output=False).fit(positions)
@@ -0,0 +1,124 @@
+"""
+Ridge regression on the same lag features as the xgboost model, solved in closed form
+with NumPy and stored as a small coefficient file
+"""
+
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Callable, Iterable
+
+import numpy as np
+import polars as pl
+
+if TYPE_CHECKING:  # pragma: no cover
+    from fpl_predictor.model_training.load_23_24_season_data import TrainTestValData
+
+ALPHAS = tuple(np.logspace(-3, 3, 13))
+
+
+@dataclass(frozen=True)
+class RidgePredictor:
+    coefficients: np.ndarray
+    intercept: float
+    feature_means: np.ndarray  # missing values are imputed with the training mean
+    prediction_columns: tuple[str, ...]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.prediction_columns):
+            raise ValueError(
+                f"Expected a matrix with {len(self.prediction_columns)} columns"
+            )
+        X = np.where(np.isnan(X), self.feature_means, X)
+        return X @ self.coefficients + self.intercept
+
+    def save(self, fh: IO[bytes]) -> None:
+        np.savez(
+            fh,
+            coefficients=self.coefficients,
+            intercept=self.intercept,
+            feature_means=self.feature_means,
+            prediction_columns=np.array(self.prediction_columns),
+        )
+
+    @classmethod
+    def load(cls, fh: IO[bytes]) -> "RidgePredictor":
+        with np.load(fh) as arrays:
+            return cls(
+                coefficients=arrays["coefficients"],
+                intercept=float(arrays["intercept"]),
+                feature_means=arrays["feature_means"],
+                prediction_columns=tuple(arrays["prediction_columns"].tolist()),
+            )
+
+
+def _to_numpy(X: pl.DataFrame) -> np.ndarray:
+    return X.cast(pl.Float64).to_numpy()
+
+
+def _fit_path(
+    X: pl.DataFrame, y: pl.Series, alphas: Iterable[float]
+) -> list[RidgePredictor]:
+    """
+    Fits a model for each alpha from a single eigendecomposition of the standardised
+    gram matrix. The intercept isn't penalised.
+    """
+    X_ = _to_numpy(X)
+    feature_means = np.nanmean(X_, axis=0)
+    X_ = np.where(np.isnan(X_), feature_means, X_)
+    feature_scales = X_.std(axis=0)
+    feature_scales[feature_scales == 0] = 1
+    Z = (X_ - feature_means) / feature_scales
+    y_ = y.to_numpy().astype(np.float64)
+    y_mean = y_.mean()
+
+    eigenvalues, eigenvectors = np.linalg.eigh(Z.T @ Z)
+    projected_y = eigenvectors.T @ (Z.T @ (y_ - y_mean))
+    models = []
+    for alpha in alphas:
+        standardised_coefficients = eigenvectors @ (projected_y / (eigenvalues + alpha))
+        coefficients = standardised_coefficients / feature_scales
+        models.append(
+            RidgePredictor(
+                coefficients=coefficients,
+                intercept=float(y_mean - feature_means @ coefficients),
+                feature_means=feature_means,
+                prediction_columns=tuple(X.columns),
+            )
+        )
+    return models
+
+
+def train(X: pl.DataFrame, y: pl.Series, alpha: float = 1.0) -> RidgePredictor:
+    return _fit_path(X, y, [alpha])[0]
+
+
+def mean_squared_error(model: RidgePredictor, X: pl.DataFrame, y: pl.Series) -> float:
+    return float(np.mean((model.predict(_to_numpy(X)) - y.to_numpy()) ** 2))
+
+
+def optimise_alpha(
+    train_X: pl.DataFrame,
+    train_y: pl.Series,
+    val_X: pl.DataFrame,
+    val_y: pl.Series,
+    alphas: Iterable[float] = ALPHAS,
+) -> RidgePredictor:
+    models = _fit_path(train_X, train_y, alphas)
+    return min(models, key=lambda model: mean_squared_error(model, val_X, val_y))
+
+
+def main(  # pragma: no cover
+    n_prediction_weeks: int = 2,
+    load_data: Callable[[int], "TrainTestValData"] | None = None,
+) -> tuple[float, RidgePredictor]:
+    if load_data is None:
+        # the training data loader (and boto3) isn't needed to serve predictions
+        from fpl_predictor.model_training.load_23_24_season_data import (
+            load_data as load_23_24_data,
+        )
+
+        load_data = load_23_24_data
+    data = load_data(n_prediction_weeks)
+    model = optimise_alpha(data.train_X, data.train_y, data.val_X, data.val_y)
+    mse = mean_squared_error(model, data.test_X, data.test_y)
+    return mse, model
@@ -0,0 +1,160 @@
+"""
+Flattens a trained XGBoost booster into contiguous NumPy arrays so that it can be
+evaluated without importing xgboost
+"""
+
+import json
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    import xgboost as xgb
+
+    from fpl_predictor.model_training.xgboost import XGBoostPredictor
+
+SUPPORTED_OBJECTIVES = ("reg:squarederror",)
+
+
+@dataclass(frozen=True)
+class CompiledTreeEnsemble:
+    """
+    The nodes of every tree are concatenated into flat arrays, with children indexed
+    globally and leaves pointing back at themselves so that evaluation is a fixed
+    number of vectorised steps.
+    """
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray  # (n_nodes, 2) array of left and right child indices
+    default_left: np.ndarray  # whether missing values follow the left child
+    value: np.ndarray
+    roots: np.ndarray
+    max_depth: int
+    base_score: float
+    prediction_columns: tuple[str, ...]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        # xgboost compares features with thresholds in single precision
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.prediction_columns):
+            raise ValueError(
+                f"Expected a matrix with {len(self.prediction_columns)} columns"
+            )
+        has_missing = np.isnan(X).any()
+        X = X.ravel()
+        row_offsets = np.arange(0, len(X), len(self.prediction_columns))[:, np.newaxis]
+        nodes = np.tile(self.roots, (len(row_offsets), 1))
+        for _ in range(self.max_depth):
+            values = X[row_offsets + self.feature[nodes]]
+            go_right = values >= self.threshold[nodes]
+            if has_missing:
+                go_right |= np.isnan(values) & ~self.default_left[nodes]
+            nodes = self.children[nodes, go_right.view(np.int8)]
+        leaf_sum = self.value[nodes].sum(axis=1, dtype=np.float64)
+        return (leaf_sum + self.base_score).astype(np.float32)
+
+    def save(self, fh: IO[bytes]) -> None:
+        np.savez(
+            fh,
+            feature=self.feature,
+            threshold=self.threshold,
+            children=self.children,
+            default_left=self.default_left,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            base_score=self.base_score,
+            prediction_columns=np.array(self.prediction_columns),
+        )
+
+    @classmethod
+    def load(cls, fh: IO[bytes]) -> "CompiledTreeEnsemble":
+        with np.load(fh) as arrays:
+            return cls(
+                feature=arrays["feature"],
+                threshold=arrays["threshold"],
+                children=arrays["children"],
+                default_left=arrays["default_left"],
+                value=arrays["value"],
+                roots=arrays["roots"],
+                max_depth=int(arrays["max_depth"]),
+                base_score=float(arrays["base_score"]),
+                prediction_columns=tuple(arrays["prediction_columns"].tolist()),
+            )
+
+
+def _tree_depth(left_children: np.ndarray, right_children: np.ndarray) -> int:
+    depth, level = 0, np.array([0])
+    while True:
+        level = np.concatenate([left_children[level], right_children[level]])
+        level = level[level != -1]
+        if not len(level):
+            return depth
+        depth += 1
+
+
+def compile_booster(
+    booster: "xgb.Booster", prediction_columns: tuple[str, ...]
+) -> CompiledTreeEnsemble:
+    config = json.loads(booster.save_config())
+    objective = config["learner"]["objective"]["name"]
+    if objective not in SUPPORTED_OBJECTIVES:
+        raise ValueError(f"Unsupported objective {objective}")
+    model = json.loads(booster.save_raw("json"))["learner"]
+    trees = model["gradient_booster"]["model"]["trees"]
+
+    feature, threshold, children, default_left, value, roots = ([] for _ in range(6))
+    max_depth = offset = 0
+    for tree in trees:
+        left_children = np.array(tree["left_children"])
+        right_children = np.array(tree["right_children"])
+        is_leaf = left_children == -1
+        node_ids = np.arange(len(left_children))
+        split_conditions = np.array(tree["split_conditions"], dtype=np.float32)
+
+        feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+        threshold.append(np.where(is_leaf, 0, split_conditions))
+        value.append(np.where(is_leaf, split_conditions, 0))
+        # leaves point back at themselves
+        children.append(
+            np.stack(
+                [
+                    np.where(is_leaf, node_ids, left_children),
+                    np.where(is_leaf, node_ids, right_children),
+                ],
+                axis=1,
+            )
+            + offset
+        )
+        default_left.append(np.array(tree["default_left"], dtype=bool))
+        roots.append(offset)
+
+        max_depth = max(max_depth, _tree_depth(left_children, right_children))
+        offset += len(left_children)
+
+    return CompiledTreeEnsemble(
+        feature=np.concatenate(feature).astype(np.intp),
+        threshold=np.concatenate(threshold).astype(np.float32),
+        children=np.concatenate(children).astype(np.intp),
+        default_left=np.concatenate(default_left),
+        value=np.concatenate(value).astype(np.float32),
+        roots=np.array(roots, dtype=np.intp),
+        max_depth=max_depth,
+        base_score=float(model["learner_model_param"]["base_score"]),
+        prediction_columns=prediction_columns,
+    )
+
+
+def compile_predictor(predictor: "XGBoostPredictor") -> CompiledTreeEnsemble:
+    if not hasattr(predictor.model, "get_booster"):
+        raise ValueError("Only single XGBoost models can be compiled")
+    return compile_booster(
+        predictor.model.get_booster(),
+        tuple(predictor.prediction_columns),
+    )
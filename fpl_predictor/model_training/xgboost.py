@@ -1,7 +1,11 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from functools import partial
 from typing import Callable
 
+import numpy as np
 import polars as pl
 import xgboost as xgb
 from bayes_opt import BayesianOptimization
@@ -11,6 +15,20 @@ from fpl_predictor.model_training.load_23_24_season_data import TrainTestValData
 from fpl_predictor.model_training.load_23_24_season_data import (
     load_data as load_23_24_data,
 )
+from fpl_predictor.model_training.position_encoder import POSITIONS
+
+PBOUNDS = {
+    "n_estimators": (100, 1000),
+    "max_depth": (2, 25),
+    "min_child_weight": (1, 20),
+    "max_delta_step": (0, 25),
+    "learning_rate": (0.001, 0.5),
+    "gamma": (0, 10),
+    "reg_alpha": (0, 10),
+    "reg_lambda": (0, 20),
+}
+# a model per position doesn't need deep trees to separate the positions
+POSITION_MODEL_PBOUNDS = PBOUNDS | {"max_depth": (2, 10)}
 
 
 def train(X: pl.DataFrame, y: pl.Series, **kwargs) -> xgb.XGBRegressor:
@@ -18,7 +36,8 @@ def train(X: pl.DataFrame, y: pl.Series, **kwargs) -> xgb.XGBRegressor:
         kwargs["n_estimators"] = int(kwargs["n_estimators"])
     if "max_depth" in kwargs:
         kwargs["max_depth"] = int(kwargs["max_depth"])
-    model = xgb.XGBRegressor(**kwargs, n_jobs=-1, random_state=1)
+    kwargs.setdefault("n_jobs", -1)
+    model = xgb.XGBRegressor(**kwargs, random_state=1)
     model.fit(X, y)
     return model
 
@@ -42,19 +61,16 @@ def optimise_hyperparameters(
     val_y: pl.Series,
     init_points: int = 25,
     n_iter: int = 50,
+    pbounds: dict[str, tuple[float, float]] = PBOUNDS,
+    n_jobs: int = -1,
 ) -> xgb.XGBRegressor:
-    pbounds = {
-        "n_estimators": (100, 1000),
-        "max_depth": (2, 25),
-        "min_child_weight": (1, 20),
-        "max_delta_step": (0, 25),
-        "learning_rate": (0.001, 0.5),
-        "gamma": (0, 10),
-        "reg_alpha": (0, 10),
-        "reg_lambda": (0, 20),
-    }
     f = partial(
-        train_and_evaluate, train_X=train_X, train_y=train_y, val_X=val_X, val_y=val_y
+        train_and_evaluate,
+        train_X=train_X,
+        train_y=train_y,
+        val_X=val_X,
+        val_y=val_y,
+        n_jobs=n_jobs,
     )
     optimizer = BayesianOptimization(
         f=f,
@@ -62,23 +78,154 @@ def optimise_hyperparameters(
         random_state=1,
     )
     optimizer.maximize(init_points=init_points, n_iter=n_iter)
-    best_model = train(train_X, train_y, **optimizer.max["params"])
+    best_model = train(train_X, train_y, n_jobs=n_jobs, **optimizer.max["params"])
     return best_model
 
 
+@dataclass
+class PositionModels:
+    """
+    A model per position. Each row is scored by the model of the position set in its
+    one-hot position columns.
+    """
+
+    models: dict[str, xgb.XGBRegressor]
+
+    def predict(self, X: pl.DataFrame) -> np.ndarray:
+        preds = np.zeros(len(X), dtype=np.float32)
+        for position, model in self.models.items():
+            rows = (X[position] == 1).to_numpy()
+            if rows.any():
+                preds[rows] = model.predict(X.filter(rows))
+        return preds
+
+
+def _n_jobs_per_position() -> int:
+    return max(1, (os.cpu_count() or 1) // len(POSITIONS))
+
+
+def _position_executor(max_workers: int | None) -> ProcessPoolExecutor:
+    # xgboost's OpenMP thread pool doesn't survive being forked
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def train_position_models(
+    X: pl.DataFrame, y: pl.Series, max_workers: int | None = None, **kwargs
+) -> PositionModels:
+    """
+    Trains the model for each position in a separate worker process
+    """
+    kwargs.setdefault("n_jobs", _n_jobs_per_position())
+    with _position_executor(max_workers) as executor:
+        futures = {}
+        for position in POSITIONS:
+            rows = X[position] == 1
+            futures[position] = executor.submit(
+                train, X.filter(rows), y.filter(rows), **kwargs
+            )
+        return PositionModels({k: v.result() for k, v in futures.items()})
+
+
+def optimise_position_hyperparameters(
+    train_X: pl.DataFrame,
+    train_y: pl.Series,
+    val_X: pl.DataFrame,
+    val_y: pl.Series,
+    init_points: int = 25,
+    n_iter: int = 50,
+    max_workers: int | None = None,
+) -> PositionModels:
+    """
+    Optimises the hyperparameters of each position's model in a separate worker process
+    """
+    with _position_executor(max_workers) as executor:
+        futures = {}
+        for position in POSITIONS:
+            train_rows, val_rows = train_X[position] == 1, val_X[position] == 1
+            futures[position] = executor.submit(
+                optimise_hyperparameters,
+                train_X.filter(train_rows),
+                train_y.filter(train_rows),
+                val_X.filter(val_rows),
+                val_y.filter(val_rows),
+                init_points=init_points,
+                n_iter=n_iter,
+                pbounds=POSITION_MODEL_PBOUNDS,
+                n_jobs=_n_jobs_per_position(),
+            )
+        return PositionModels({k: v.result() for k, v in futures.items()})
+
+
+def feature_importance(model: xgb.XGBRegressor, X: pl.DataFrame) -> pl.DataFrame:
+    """
+    Mean absolute SHAP value of each feature over X, computed with XGBoost's native
+    TreeSHAP implementation (pred_contribs) rather than the shap package.
+    """
+    contributions = model.get_booster().predict(
+        xgb.DMatrix(X.to_numpy()), pred_contribs=True
+    )
+    # the last column holds the bias term rather than a feature contribution
+    importance = np.abs(contributions[:, :-1]).mean(axis=0)
+    return pl.DataFrame({"feature": X.columns, "importance": importance}).sort(
+        "importance", descending=True
+    )
+
+
 @dataclass
 class XGBoostPredictor:
-    model: xgb.XGBRegressor
+    model: xgb.XGBRegressor | PositionModels
     prediction_columns: tuple[str, ...]
 
 
+def prune_features(
+    model: xgb.XGBRegressor,
+    train_X: pl.DataFrame,
+    train_y: pl.Series,
+    min_importance: float = 0.0,
+) -> XGBoostPredictor:
+    """
+    Retrains the model with the same hyperparameters without the features whose
+    importance over the training data is not greater than min_importance. The
+    importance needs every feature, but later retrains can pass the prediction
+    columns to load_data as feature_columns to build only those.
+    """
+    importance = feature_importance(model, train_X)
+    retained_features = importance.filter(pl.col("importance") > min_importance)[
+        "feature"
+    ]
+    prediction_columns = tuple(i for i in train_X.columns if i in retained_features)
+    if len(prediction_columns) == train_X.width:
+        return XGBoostPredictor(model, prediction_columns)
+
+    pruned_model = xgb.XGBRegressor(**model.get_params())
+    pruned_model.fit(train_X.select(prediction_columns), train_y)
+    return XGBoostPredictor(pruned_model, prediction_columns)
+
+
 def main(  # pragma: no cover
     n_prediction_weeks: int = 2,
     load_data: Callable[[int], TrainTestValData] = load_23_24_data,
+    prune: bool = True,
+    per_position: bool = False,
 ) -> tuple[float, XGBoostPredictor]:
     data = load_data(n_prediction_weeks)
+    if per_position:
+        position_models = optimise_position_hyperparameters(
+            data.train_X, data.train_y, data.val_X, data.val_y
+        )
+        trained_model = XGBoostPredictor(position_models, tuple(data.train_X.columns))
+        test_preds = position_models.predict(data.test_X)
+        return mean_squared_error(data.test_y, test_preds), trained_model
+
     model = optimise_hyperparameters(data.train_X, data.train_y, data.val_X, data.val_y)
-    test_preds = model.predict(data.test_X)
+    if prune:
+        trained_model = prune_features(model, data.train_X, data.train_y)
+    else:
+        trained_model = XGBoostPredictor(model, tuple(data.train_X.columns))
+    test_preds = trained_model.model.predict(
+        data.test_X.select(trained_model.prediction_columns)
+    )
     mse = mean_squared_error(data.test_y, test_preds)
-    trained_model = XGBoostPredictor(model, tuple(data.train_X.columns))
     return mse, trained_model
@@ -3,13 +3,21 @@ Select the first squad of the season using each player's median gameweek points
 previous season
 """
 
+import argparse
+
 import polars as pl
 
 from fpl_predictor import player_stats
 from fpl_predictor.model_training import load_23_24_season_data
+from fpl_predictor.scripts.solve_options import (
+    add_solve_options_arguments,
+    solve_options_from_args,
+)
 from fpl_predictor.settings import N_WORST_TEAMS
 from fpl_predictor.squad_selection import linear_optimisation, squad_selection
 from fpl_predictor.squad_selection.player_availability import get_unavailable_players
+from fpl_predictor.squad_selection.solvers import SolveOptions
+from fpl_predictor.squad_selection.starting_team import select_starting_team
 
 
 def _prev_season_median_gw_points() -> pl.DataFrame:
@@ -32,21 +40,35 @@ def _prev_season_median_gw_points() -> pl.DataFrame:
     )
 
 
-def _select_optimal_squad(gw_points: pl.DataFrame) -> tuple[pl.DataFrame, int]:
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    add_solve_options_arguments(parser)
+    return parser.parse_args()
+
+
+def _select_optimal_squad(
+    gw_points: pl.DataFrame, solve_options: SolveOptions = SolveOptions()
+) -> tuple[pl.DataFrame, int]:
     points_per_team = gw_points.group_by("team_id").agg(pl.col("gameweek_points").sum())
     worst_teams = points_per_team.sort("gameweek_points").head(N_WORST_TEAMS)["team_id"]
-    squad = linear_optimisation.PSCPSquadOptimiser(
-        gw_points, teams_to_exclude_from_preselection=tuple(worst_teams)
-    ).optimise()
-    starting_team = linear_optimisation.StartingTeamOptimiser(squad).optimise()
+    optimiser = linear_optimisation.PSCPSquadOptimiser(
+        gw_points,
+        teams_to_exclude_from_preselection=tuple(worst_teams),
+        solve_options=solve_options,
+    )
+    squad = optimiser.optimise()
+    starting_team = select_starting_team(squad)
     return squad_selection.annotate_squad_and_compute_points(
         squad, starting_team, None, 0
     )
 
 
 def main() -> None:
+    args = _parse_args()
     gw_points = _prev_season_median_gw_points()
     gw_points = gw_points.with_columns((pl.col("cost_times_ten") / 10).alias("cost"))
-    annotated_squad, expected_points = _select_optimal_squad(gw_points)
+    annotated_squad, expected_points = _select_optimal_squad(
+        gw_points, solve_options_from_args(args)
+    )
     print(f"{expected_points=}")
     annotated_squad.write_csv("starting_squad.csv")
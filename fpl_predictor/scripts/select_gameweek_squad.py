@@ -3,8 +3,12 @@ from pathlib import Path
 
 import polars as pl
 
-from fpl_predictor.player_stats import get_player_data
-from fpl_predictor.squad_selection import squad_selection
+from fpl_predictor.scripts.solve_options import (
+    add_solve_options_arguments,
+    solve_options_from_args,
+)
+
+LAG_FEATURE_PREDICTION_METHODS = ("xgboost", "compiled_xgboost", "ridge")
 
 
 def _parse_args() -> argparse.Namespace:
@@ -31,7 +35,7 @@ def _parse_args() -> argparse.Namespace:
         "--n-prediction-weeks",
         type=int,
         required=False,
-        help="Only used with the xgboost prediction method",
+        help=f"Only used with the {', '.join(LAG_FEATURE_PREDICTION_METHODS)} prediction methods",
     )
     parser.add_argument(
         "--current-squad",
@@ -39,10 +43,14 @@ def _parse_args() -> argparse.Namespace:
         required=False,
         help="The number of transfers to make",
     )
+    add_solve_options_arguments(parser)
     args = parser.parse_args()
-    if args.prediction_method == "xgboost" and not args.n_prediction_weeks:
+    if (
+        args.prediction_method in LAG_FEATURE_PREDICTION_METHODS
+        and not args.n_prediction_weeks
+    ):
         parser.error(
-            "The --n_prediction_weeks argument is required when using the xgboost prediction method"
+            f"The --n_prediction_weeks argument is required when using the {args.prediction_method} prediction method"
         )
     return args
 
@@ -53,6 +61,11 @@ def _read_in_current_squad(current_squad_path: Path) -> pl.DataFrame:
 
 def main() -> None:
     args = _parse_args()
+    # imported once the arguments are parsed so that --help and argument errors
+    # don't wait for the optimisers and predictors to load
+    from fpl_predictor.player_stats import get_player_data
+    from fpl_predictor.squad_selection import squad_selection
+
     current_squad = (
         _read_in_current_squad(args.current_squad) if args.current_squad else None
     )
@@ -61,6 +74,7 @@ def main() -> None:
         current_squad=current_squad,
         n_free_transfers=args.n_free_transfers,
         prediction_method=args.prediction_method,
+        solve_options=solve_options_from_args(args),
         n_prediction_weeks=args.n_prediction_weeks,
     )
     print(f"{expected_points=}")
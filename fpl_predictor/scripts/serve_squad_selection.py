@@ -0,0 +1,61 @@
+import argparse
+import logging
+
+from fpl_predictor.squad_selection.service import (
+    REFRESH_INTERVAL,
+    SquadSelectionServer,
+    SquadSelectionService,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=REFRESH_INTERVAL,
+        help="Seconds between refreshes of the player data and predictions",
+    )
+    parser.add_argument(
+        "--gameweek",
+        type=int,
+        required=False,
+        help="Load the predictions for this gameweek before serving",
+    )
+    parser.add_argument(
+        "--prediction-method",
+        type=str,
+        default="median_past_score",
+        help="The prediction method to load with --gameweek",
+    )
+    parser.add_argument(
+        "--n-prediction-weeks",
+        type=int,
+        required=False,
+        help="Passed to the prediction method loaded with --gameweek",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    args = _parse_args()
+    service = SquadSelectionService()
+    if args.gameweek is not None:
+        kwargs = {}
+        if args.n_prediction_weeks is not None:
+            kwargs["n_prediction_weeks"] = args.n_prediction_weeks
+        service.player_data(args.gameweek, args.prediction_method, **kwargs)
+    stop_refreshing = service.start_refreshing(args.refresh_interval)
+    with SquadSelectionServer((args.host, args.port), service) as server:
+        logger.info("Serving squad selections on %s:%s", args.host, args.port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_refreshing.set()
@@ -0,0 +1,42 @@
+"""
+Command line flags for the optimisers' solve limits
+"""
+
+import argparse
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from fpl_predictor.squad_selection.solvers import SolveOptions
+
+
+def add_solve_options_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        required=False,
+        help="Stop the optimiser after this many seconds and use the best squad found",
+    )
+    parser.add_argument(
+        "--mip-rel-gap",
+        type=float,
+        required=False,
+        help="Stop the optimiser once the best squad is within this relative gap of the bound",
+    )
+    parser.add_argument(
+        "--node-limit",
+        type=int,
+        required=False,
+        help="Stop the optimiser after this many branch and bound nodes",
+    )
+
+
+def solve_options_from_args(args: argparse.Namespace) -> "SolveOptions":
+    # the solvers import scipy, which the scripts only need once they've parsed
+    # their arguments
+    from fpl_predictor.squad_selection.solvers import SolveOptions
+
+    return SolveOptions(
+        time_limit=args.time_limit,
+        mip_rel_gap=args.mip_rel_gap,
+        node_limit=args.node_limit,
+    )
@@ -1,9 +1,12 @@
 from decouple import config
 
-SQUAD_SELECTION_METHOD = config(
-    "SQUAD_SELECTION_METHOD", default="preselect_cheapest_players"
+SQUAD_SELECTION_METHOD = config("SQUAD_SELECTION_METHOD", default="joint")
+supported_squad_selection_methods = (
+    "joint",
+    "preselect_cheapest_players",
+    "naive",
+    "transfer_evaluator",
 )
-supported_squad_selection_methods = ("preselect_cheapest_players", "naive")
 if SQUAD_SELECTION_METHOD not in supported_squad_selection_methods:  # pragma: no cover
     raise ValueError(
         f"Invalid squad selection method, must be one of {supported_squad_selection_methods}"
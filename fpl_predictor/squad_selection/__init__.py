@@ -1,3 +1,22 @@
-from .squad_selection import select_squad
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["select_squad"]
+if TYPE_CHECKING:  # pragma: no cover
+    from .bulk_selection import select_squads
+    from .squad_selection import select_squad
+
+__all__ = ["select_squad", "select_squads"]
+
+# the optimisers import scipy, so they're only loaded when first used rather than
+# with any of this package's modules
+_LAZY_ATTRIBUTES = {
+    "select_squad": "squad_selection",
+    "select_squads": "bulk_selection",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    return getattr(import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__), name)
@@ -0,0 +1,157 @@
+"""
+Selects squads for many managers in one run, e.g. a whole mini-league, from one set
+of predictions shared by a pool of worker processes
+"""
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Mapping, NamedTuple, Sequence
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.solvers import SolveOptions
+from fpl_predictor.squad_selection.squad_selection import (
+    _get_player_data,
+    select_squad_from_player_data,
+)
+
+logger = logging.getLogger(__name__)
+
+# the player data of a worker process, set once when it starts
+_worker_player_data: pl.DataFrame | None = None
+
+
+class BulkSelection(NamedTuple):
+    squads: pl.DataFrame  # a row per manager and player in their selected squad
+    squads_per_second: float
+
+
+def _set_worker_player_data(player_data: pl.DataFrame) -> None:
+    global _worker_player_data
+    _worker_player_data = player_data
+
+
+def _select_managers_squads(
+    managers: Sequence[tuple[str, pl.DataFrame, int]],
+    solve_options: SolveOptions,
+    squad_selection_method: str | None,
+    player_data: pl.DataFrame | None = None,
+) -> list[pl.DataFrame]:
+    """
+    Selects the squad of each manager, given by their name, current squad and free
+    transfers, from player_data or else the worker's player data
+    """
+    if player_data is None:
+        player_data = _worker_player_data
+    assert player_data is not None, "The worker's player data hasn't been set"
+    squads = []
+    for manager, current_squad, n_free_transfers in managers:
+        squad, expected_points = select_squad_from_player_data(
+            player_data,
+            current_squad,
+            n_free_transfers=n_free_transfers,
+            solve_options=solve_options,
+            squad_selection_method=squad_selection_method,
+        )
+        squads.append(
+            squad.select(
+                pl.lit(manager).alias("manager"),
+                pl.lit(expected_points, dtype=pl.Float64).alias("expected_points"),
+                pl.all(),
+            )
+        )
+    return squads
+
+
+def select_squads_from_player_data(
+    player_data: pl.DataFrame,
+    current_squads: Mapping[str, pl.DataFrame],
+    n_free_transfers: int | Mapping[str, int] = 1,
+    solve_options: SolveOptions = SolveOptions(),
+    squad_selection_method: str | None = None,
+    max_workers: int = 1,
+) -> BulkSelection:
+    """
+    Selects a squad for each manager's current squad, keyed by the manager's name, as
+    select_squad_from_player_data would. n_free_transfers can be given per manager.
+    The squads are selected in this process unless max_workers is raised, as
+    starting worker processes takes longer than a small league's selections. Each
+    worker process is sent the player data once, when it starts, and then a
+    contiguous share of the managers.
+    """
+    managers = [
+        (
+            manager,
+            current_squad,
+            (
+                n_free_transfers
+                if isinstance(n_free_transfers, int)
+                else n_free_transfers[manager]
+            ),
+        )
+        for manager, current_squad in current_squads.items()
+    ]
+    n_workers = min(max_workers, len(managers))
+
+    start = time.perf_counter()
+    if n_workers <= 1:
+        squads = _select_managers_squads(
+            managers, solve_options, squad_selection_method, player_data
+        )
+    else:
+        chunks = np.array_split(np.arange(len(managers)), n_workers)
+        # forked workers can deadlock on thread pools inherited from the parent
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_set_worker_player_data,
+            initargs=(player_data,),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _select_managers_squads,
+                    [managers[i] for i in chunk],
+                    solve_options,
+                    squad_selection_method,
+                )
+                for chunk in chunks
+            ]
+            squads = [squad for future in futures for squad in future.result()]
+    squads_per_second = len(managers) / (time.perf_counter() - start)
+    logger.info(
+        "Selected %s squads with %s workers at %.1f squads per second",
+        len(managers),
+        n_workers,
+        squads_per_second,
+    )
+
+    return BulkSelection(
+        pl.concat(squads) if squads else pl.DataFrame(), squads_per_second
+    )
+
+
+def select_squads(
+    gameweek: int,
+    current_squads: Mapping[str, pl.DataFrame],
+    *,
+    n_free_transfers: int | Mapping[str, int] = 1,
+    prediction_method: str = "median_past_score",
+    solve_options: SolveOptions = SolveOptions(),
+    squad_selection_method: str | None = None,
+    max_workers: int = 1,
+    **kwargs,
+) -> BulkSelection:
+    """
+    select_squad for many managers, predicting the gameweek's points once
+    """
+    return select_squads_from_player_data(
+        _get_player_data(gameweek, prediction_method, **kwargs),
+        current_squads,
+        n_free_transfers,
+        solve_options,
+        squad_selection_method,
+        max_workers,
+    )
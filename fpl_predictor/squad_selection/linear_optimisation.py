@@ -1,92 +1,395 @@
+import logging
 from abc import ABC, abstractmethod
-from typing import Final
+from typing import Final, NamedTuple
 
 import numpy as np
 import polars as pl
-from scipy.optimize import Bounds, LinearConstraint, milp
-from sklearn.preprocessing import OneHotEncoder
+from scipy import sparse
+from scipy.optimize import LinearConstraint
+
+from fpl_predictor.squad_selection.presolve import undominated_players
+from fpl_predictor.squad_selection.solvers import (
+    OPTIMAL,
+    CompiledProblem,
+    ConstraintBounds,
+    ScipyBackend,
+    SolveOptions,
+    SolverBackend,
+    SolveResult,
+)
+
+logger = logging.getLogger(__name__)
 
 N_SELECTIONS: Final[int] = 15
 TOTAL_COST: Final[float] = 100.0
+MAX_PLAYERS_PER_TEAM: Final[int] = 3
 POSITION_MAX_SELECTIONS: Final[dict[str, int]] = {
     "GKP": 2,
     "DEF": 5,
     "MID": 5,
     "FWD": 3,
 }
+STARTING_POSITION_MIN_SELECTIONS: Final[dict[str, int]] = {
+    "GKP": 1,
+    "DEF": 3,
+    "MID": 0,
+    "FWD": 1,
+}
+STARTING_POSITION_MAX_SELECTIONS: Final[dict[str, int]] = {
+    "GKP": 1,
+    "DEF": 5,
+    "MID": 5,
+    "FWD": 3,
+}
+TRANSFER_HIT_COST: Final[int] = 4  # points lost for each transfer beyond the free ones
+N_STARTING_SELECTIONS: Final[int] = 11
+BENCH_WEIGHT: Final[float] = 0.1
+# max number of players in each position that can be selected but not named in the
+# starting team
+PRESELECTION_MAX_SELECTIONS: Final[dict[str, int]] = {
+    "GKP": 1,
+    "DEF": 2,
+    "MID": 5,
+    "FWD": 2,
+}
+
+
+def _encode(values: pl.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the sorted categories of values and the integer code of each value
+    """
+    return np.unique(values.to_numpy(), return_inverse=True)
+
+
+def _one_hot_rows(codes: np.ndarray, n_categories: int) -> sparse.csr_array:
+    """
+    A row per category with a one in each column whose code is that category
+    """
+    n_columns = len(codes)
+    return sparse.csr_array(
+        (np.ones(n_columns), (codes, np.arange(n_columns))),
+        shape=(n_categories, n_columns),
+    )
+
+
+def _dense_row(values: np.ndarray) -> sparse.csr_array:
+    return sparse.csr_array(values.astype(np.float64)[np.newaxis])
+
+
+class OptimisationResult(NamedTuple):
+    selection: pl.DataFrame | None  # the incumbent, if a feasible one was found
+    # the incumbent's objective: its predicted points net of any hits, or for
+    # JointSquadOptimiser the points weighted by the starting team, captain and bench
+    objective: float | None
+    bound: float | None  # the best objective any selection could reach
+    status: str
 
 
 class _BaseOptimiser(ABC):
-    def __init__(self, player_data: pl.DataFrame) -> None:
+    """
+    The problem is compiled once, the first time it is needed. Changes to the player
+    data invalidate it, while changes to constraint bounds only update the affected
+    rows. When presolve is set, players who are dominated by enough others are
+    dropped as the problem is compiled and the variables refer to the remaining
+    candidates.
+    """
+
+    presolve: bool = True
+    _problem: CompiledProblem | None = None
+    _candidates: pl.DataFrame | None = None
+    # limits the presolve depends on, so changing them recompiles the problem
+    _presolve_constraints: tuple[str, ...] = ("position", "total_selections")
+    _max_players_per_team: int | None = None
+
+    def __init__(
+        self,
+        player_data: pl.DataFrame,
+        solver: SolverBackend | None = None,
+        solve_options: SolveOptions = SolveOptions(),
+    ) -> None:
+        # each optimiser has its own backend, as a highspy backend keeps its model
+        self.solver = solver or ScipyBackend()
+        self.solve_options = solve_options
         self.player_data = player_data
 
+    @property
+    def player_data(self) -> pl.DataFrame:
+        return self._player_data
+
+    @player_data.setter
+    def player_data(self, value: pl.DataFrame) -> None:
+        self._player_data = value
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._candidates = None
+        self._problem = None
+
+    @property
+    def candidates(self) -> pl.DataFrame:
+        """
+        The players the problem's selection variables refer to
+        """
+        if self._candidates is None:
+            self._compile()
+        return self._candidates  # type: ignore[return-value]
+
     @property
     def n_players(self) -> int:
-        return self.player_data.shape[0]
+        return self.candidates.shape[0]
+
+    @property
+    def n_player_variables(self) -> int:
+        """
+        The number of binary variables, which start with a selection per player
+        """
+        return self.n_players
 
     @property
     @abstractmethod
     def n_selections(self) -> int:
         pass
 
-    @property
     @abstractmethod
-    def position_constraint(self) -> LinearConstraint:
+    def _position_bounds(self, positions: np.ndarray) -> ConstraintBounds:
         pass
 
-    @property
-    def total_selections_constraint(self) -> LinearConstraint:
-        return LinearConstraint(
-            np.ones(self.n_players), self.n_selections, self.n_selections
+    def _dominance_costs(self) -> np.ndarray:
+        """
+        The cost of each player, as far as it constrains the selection
+        """
+        return np.zeros(self.player_data.shape[0])
+
+    def _dominance_points(self) -> np.ndarray:
+        """
+        The points of each player, optionally with a column per scenario, which must
+        be no lower for a dominating player
+        """
+        return self.player_data["gameweek_points"].to_numpy()
+
+    def _protected_players(self) -> np.ndarray:
+        """
+        Players who are kept whether or not they are dominated
+        """
+        return np.zeros(self.player_data.shape[0], dtype=bool)
+
+    def _presolve(self) -> np.ndarray:
+        """
+        Returns a mask of the players in player_data to keep as candidates
+        """
+        positions, position_codes = _encode(self.player_data["position"])
+        position_max_selections = np.broadcast_to(
+            self._position_bounds(positions)[1], len(positions)
+        )
+        if self._max_players_per_team is None:
+            team_codes = None
+        else:
+            team_codes = _encode(self.player_data["team_id"])[1]
+        keep = undominated_players(
+            self._dominance_points(),
+            self._dominance_costs(),
+            position_codes,
+            position_max_selections,
+            self.n_selections,
+            team_codes,
+            self._max_players_per_team,
+            self._protected_players(),
+        )
+        logger.info(
+            "Presolve kept %d of %d players", keep.sum(), self.player_data.shape[0]
         )
+        return keep
+
+    def _constraint_matrices(self) -> dict[str, sparse.csr_array]:
+        return {
+            "position": _one_hot_rows(self._position_codes, len(self._positions)),
+            "total_selections": _dense_row(np.ones(self.n_players)),
+        }
+
+    def _constraint_bounds(self) -> dict[str, ConstraintBounds]:
+        return {
+            "position": self._position_bounds(self._positions),
+            "total_selections": (self.n_selections, self.n_selections),
+        }
+
+    def _player_variable_costs(self) -> np.ndarray:
+        # minimise negative gameweek points
+        return -self.candidates["gameweek_points"].to_numpy()
+
+    def _auxiliary_variable_costs(self) -> np.ndarray:
+        """
+        Objective coefficients of the variables which follow the players
+        """
+        return np.empty(0)
+
+    def _auxiliary_variable_bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        n_auxiliary = len(self._auxiliary_variable_costs())
+        return np.zeros(n_auxiliary), np.full(n_auxiliary, np.inf)
 
-    def get_position_encoder(self) -> tuple[OneHotEncoder, np.ndarray]:
-        position_encoder = OneHotEncoder(sparse_output=False).fit(
-            self.player_data.select("position")
+    def _auxiliary_variable_integrality(self) -> np.ndarray:
+        return np.ones(len(self._auxiliary_variable_costs()))
+
+    def _with_auxiliary_column(
+        self, players_row: sparse.csr_array, coefficient: float
+    ) -> sparse.csr_array:
+        """
+        Extends a constraint on the player selections with the first auxiliary
+        variable
+        """
+        padding = self.n_player_variables - self.n_players
+        return sparse.hstack(
+            [
+                players_row,
+                sparse.csr_array((1, padding)),
+                sparse.csr_array([[coefficient]]),
+            ],
+            format="csr",
         )
-        position_encoded_data = position_encoder.transform(
-            self.player_data.select("position")
+
+    def _update_bounds(self, name: str) -> None:
+        if self._problem is None or name not in self._problem.rows:
+            return
+        if self.presolve and name in self._presolve_constraints:
+            self._invalidate()  # the presolve may no longer be exact
+        else:
+            self._problem.set_bounds(name, *self._constraint_bounds()[name])
+
+    def _select_candidates(self) -> None:
+        """
+        Narrows player_data to the candidates, without compiling the problem
+        """
+        if self.presolve:
+            self._candidate_mask = self._presolve()
+        else:
+            self._candidate_mask = np.ones(self.player_data.shape[0], dtype=bool)
+        self._candidates = self.player_data.filter(self._candidate_mask)
+        self._positions, self._position_codes = _encode(self._candidates["position"])
+
+    def _compile(self) -> None:
+        self._select_candidates()
+        auxiliary_variable_costs = self._auxiliary_variable_costs()
+        auxiliary_lower, auxiliary_upper = self._auxiliary_variable_bounds()
+        self._problem = CompiledProblem.from_constraints(
+            np.concatenate([self._player_variable_costs(), auxiliary_variable_costs]),
+            # player decision variables can be only one or zero
+            np.concatenate([np.ones(self.n_player_variables), auxiliary_upper]),
+            self._constraint_matrices(),
+            self._constraint_bounds(),
+            lower=np.concatenate([np.zeros(self.n_player_variables), auxiliary_lower]),
+            integrality=np.concatenate(
+                [
+                    np.ones(self.n_player_variables),
+                    self._auxiliary_variable_integrality(),
+                ]
+            ),
         )
-        return position_encoder, position_encoded_data
 
-    def _constraints(self) -> list[LinearConstraint]:
-        return [
-            self.position_constraint,
-            self.total_selections_constraint,
-        ]
+    @property
+    def problem(self) -> CompiledProblem:
+        if self._problem is None:
+            self._compile()
+        return self._problem  # type: ignore[return-value]
+
+    @property
+    def position_constraint(self) -> LinearConstraint:
+        return self.problem.constraint("position")
+
+    @property
+    def total_selections_constraint(self) -> LinearConstraint:
+        return self.problem.constraint("total_selections")
 
     @property
     def constraints(self) -> list[LinearConstraint]:
-        return self._constraints()
+        return [self.problem.constraint(name) for name in self.problem.rows]
 
-    def optimise(self) -> pl.DataFrame:
-        gw_points = self.player_data.select("gameweek_points").to_numpy().squeeze()
-        res = milp(
-            c=-gw_points,  # minimise negative gameweek points
-            constraints=self.constraints,
-            integrality=np.ones(self.n_players),  # all decision variables are integers
-            bounds=Bounds(0, 1),  # decision variable can be only one or zero
+    def update_gameweek_points(self, gameweek_points: np.ndarray) -> None:
+        """
+        Replaces the predicted points of the players in player_data, in the same
+        order. Without the presolve only the objective of a compiled problem changes.
+        """
+        self._player_data = self.player_data.with_columns(
+            pl.Series("gameweek_points", gameweek_points)
+        )
+        if self._problem is None:
+            return
+        if self.presolve:
+            self._invalidate()  # the presolve may no longer be exact
+        else:
+            self._candidates = self._player_data
+            self._problem.c[: self.n_player_variables] = self._player_variable_costs()
+
+    def _run(self) -> SolveResult:
+        result = self.solver.run(self.problem, self.solve_options)
+        if result.x is not None and result.status != OPTIMAL:
+            logger.warning(
+                "Using the incumbent worth %s points against a bound of %s, the "
+                "solve stopped with status %s",
+                None if result.objective is None else -result.objective,
+                None if result.bound is None else -result.bound,
+                result.status,
+            )
+        return result
+
+    def _solve(self) -> np.ndarray:
+        result = self._run()
+        assert result.x is not None, f"Optimisation failed: {result.status}"
+        return np.round(result.x[: self.n_player_variables]).astype(bool)
+
+    def _selection(self, selections: np.ndarray) -> pl.DataFrame:
+        """
+        The players chosen by the selection variables of the first block
+        """
+        return self.candidates.filter(selections[: self.n_players])
+
+    def solve(self) -> OptimisationResult:
+        """
+        Solves within solve_options and returns the incumbent selection, if any, with
+        its predicted points, the bound on them and the status, without raising
+        """
+        result = self._run()
+        if result.x is None:
+            return OptimisationResult(None, None, None, result.status)
+        selections = np.round(result.x[: self.n_players]).astype(bool)
+        return OptimisationResult(
+            self._selection(selections),
+            None if result.objective is None else -result.objective,
+            None if result.bound is None else -result.bound,
+            result.status,
         )
-        assert res.success, "Optimisation failed"
-        selections = np.round(res.x).astype(bool)
-        return self.player_data.filter(selections)
+
+    def optimise(self) -> pl.DataFrame:
+        return self._selection(self._solve())
 
 
 class SquadOptimiser(_BaseOptimiser):
     _n_selections: int = N_SELECTIONS
     _total_cost: float = TOTAL_COST
     _position_max_selections: dict[str, int] | None = None
+    _current_squad: pl.DataFrame | None = None
+    _n_substitutions: int | None = None
+    _n_free_transfers: int | None = None
+    _max_players_per_team: int = MAX_PLAYERS_PER_TEAM
 
     def __init__(
         self,
         player_data: pl.DataFrame,
         current_squad: pl.DataFrame | None = None,
         n_substitutions: int | None = None,
+        n_free_transfers: int | None = None,
+        solver: SolverBackend | None = None,
+        solve_options: SolveOptions = SolveOptions(),
     ) -> None:
+        """
+        With a current squad, n_substitutions caps the number of players that can be
+        replaced, while n_free_transfers lets the optimiser choose the number of
+        transfers, deducting TRANSFER_HIT_COST points for each one beyond the free
+        transfers.
+        """
         self.current_squad = current_squad
         self.n_substitutions = n_substitutions
+        self.n_free_transfers = n_free_transfers
         self.position_max_selections = POSITION_MAX_SELECTIONS.copy()
-        super().__init__(player_data)
+        super().__init__(player_data, solver, solve_options)
 
     @property
     def n_selections(self) -> int:
@@ -95,6 +398,7 @@ class SquadOptimiser(_BaseOptimiser):
     @n_selections.setter
     def n_selections(self, value: int) -> None:
         self._n_selections = value
+        self._update_bounds("total_selections")
 
     @property
     def total_cost(self) -> float:
@@ -103,6 +407,7 @@ class SquadOptimiser(_BaseOptimiser):
     @total_cost.setter
     def total_cost(self, value: float) -> None:
         self._total_cost = value
+        self._update_bounds("cost")
 
     @property
     def position_max_selections(self) -> dict[str, int]:
@@ -111,91 +416,200 @@ class SquadOptimiser(_BaseOptimiser):
     @position_max_selections.setter
     def position_max_selections(self, value: dict[str, int]) -> None:
         self._position_max_selections = value
+        self._update_bounds("position")
 
     @property
-    def cost_constraint(self) -> LinearConstraint | None:
-        cost_matrix = self.player_data.select("cost").to_numpy().squeeze()
-        return LinearConstraint(cost_matrix, 0, self.total_cost)
+    def current_squad(self) -> pl.DataFrame | None:
+        return self._current_squad
+
+    @current_squad.setter
+    def current_squad(self, value: pl.DataFrame | None) -> None:
+        self._current_squad = value
+        self._invalidate()
 
     @property
-    def team_constraint(self) -> LinearConstraint | None:
-        team_encoder = OneHotEncoder(sparse_output=False).fit(
-            self.player_data.select("team_id")
-        )
-        team_encoding = team_encoder.transform(self.player_data.select("team_id"))
-        n_teams = len(team_encoder.categories_[0])
-        return LinearConstraint(
-            team_encoding.transpose(), np.zeros(n_teams), np.ones(n_teams) * 3
-        )
+    def n_substitutions(self) -> int | None:
+        return self._n_substitutions
+
+    @n_substitutions.setter
+    def n_substitutions(self, value: int | None) -> None:
+        rows_changed = (value is None) != (self._n_substitutions is None)
+        self._n_substitutions = value
+        if rows_changed:
+            self._invalidate()
+        else:
+            self._update_bounds("current_team")
 
     @property
-    def position_constraint(self) -> LinearConstraint:
-        position_encoder, position_encoded_data = self.get_position_encoder()
+    def n_free_transfers(self) -> int | None:
+        return self._n_free_transfers
+
+    @n_free_transfers.setter
+    def n_free_transfers(self, value: int | None) -> None:
+        rows_changed = (value is None) != (self._n_free_transfers is None)
+        self._n_free_transfers = value
+        if rows_changed:
+            self._invalidate()
+        else:
+            self._update_bounds("transfers")
+
+    @property
+    def _counts_transfers(self) -> bool:
+        return self.current_squad is not None and self.n_free_transfers is not None
+
+    def _preselected_transfers(self) -> int:
+        """
+        Transfers made outside the optimisation, which use up free transfers
+        """
+        return 0
+
+    def _auxiliary_variable_costs(self) -> np.ndarray:
+        # the number of transfers which aren't free
+        return np.array([TRANSFER_HIT_COST] if self._counts_transfers else [])
+
+    def _position_bounds(self, positions: np.ndarray) -> ConstraintBounds:
         pos_requirements = np.array(
-            [
-                self.position_max_selections[pos]
-                for pos in position_encoder.categories_[0]
-            ]
+            [self.position_max_selections[pos] for pos in positions]
         )
-        return LinearConstraint(
-            position_encoded_data.transpose(), pos_requirements, pos_requirements
+        return pos_requirements, pos_requirements
+
+    def _dominance_costs(self) -> np.ndarray:
+        return self.player_data["cost"].to_numpy()
+
+    def _protected_players(self) -> np.ndarray:
+        # replacing a player in the current squad uses a transfer
+        if self.current_squad is None:
+            return super()._protected_players()
+        return (
+            self.player_data["player_id"]
+            .is_in(self.current_squad["player_id"])
+            .to_numpy()
         )
 
-    @property
-    def current_team_constraint(self) -> LinearConstraint | None:
+    def _constraint_matrices(self) -> dict[str, sparse.csr_array]:
+        matrices = super()._constraint_matrices()
+        matrices["cost"] = _dense_row(self.candidates["cost"].to_numpy())
+        teams, team_codes = _encode(self.candidates["team_id"])
+        matrices["team"] = _one_hot_rows(team_codes, len(teams))
         if self.current_squad is None:
-            return None
-        players_in_current_team = self.player_data["player_id"].is_in(
+            return matrices
+        players_in_current_team = self.candidates["player_id"].is_in(
             self.current_squad["player_id"]
         )
-        current_team_encoded_data = players_in_current_team.cast(int).to_numpy()
-        return LinearConstraint(
-            current_team_encoded_data,
-            len(self.current_squad) - self.n_substitutions,  # type: ignore[operator]
-            len(self.current_squad),
-        )
+        if self.n_substitutions is not None:
+            matrices["current_team"] = _dense_row(players_in_current_team.to_numpy())
+        if self._counts_transfers:
+            # players brought in, less the transfers which aren't free
+            matrices["transfers"] = self._with_auxiliary_column(
+                _dense_row((~players_in_current_team).to_numpy()), -1
+            )
+        return matrices
+
+    def _constraint_bounds(self) -> dict[str, ConstraintBounds]:
+        bounds = super()._constraint_bounds()
+        bounds["cost"] = (0, self.total_cost)
+        bounds["team"] = (0, self._max_players_per_team)
+        if self.current_squad is not None and self.n_substitutions is not None:
+            bounds["current_team"] = (
+                len(self.current_squad) - self.n_substitutions,
+                len(self.current_squad),
+            )
+        if self._counts_transfers:
+            bounds["transfers"] = (
+                -np.inf,
+                self.n_free_transfers - self._preselected_transfers(),  # type: ignore[operator]
+            )
+        return bounds
 
-    def _constraints(self) -> list[LinearConstraint]:
-        required_constraints = super()._constraints()
-        return (
-            required_constraints
-            + [
-                self.cost_constraint,
-                self.team_constraint,
-            ]
-            + ([self.current_team_constraint] if self.current_team_constraint else [])
-        )
+    @property
+    def cost_constraint(self) -> LinearConstraint | None:
+        return self.problem.constraint("cost")
 
+    @property
+    def team_constraint(self) -> LinearConstraint | None:
+        return self.problem.constraint("team")
 
-class StartingTeamOptimiser(_BaseOptimiser):
-    n_selections = 11
+    @property
+    def current_team_constraint(self) -> LinearConstraint | None:
+        if "current_team" not in self.problem.rows:
+            return None
+        return self.problem.constraint("current_team")
 
     @property
-    def position_constraint(self) -> LinearConstraint:
-        position_encoder, position_encoded_data = self.get_position_encoder()
-        position_min_selections = {
-            "GKP": 1,
-            "DEF": 3,
-            "MID": 0,
-            "FWD": 1,
-        }
-        position_max_selections = {
-            "GKP": 1,
-            "DEF": 5,
-            "MID": 5,
-            "FWD": 3,
-        }
+    def transfers_constraint(self) -> LinearConstraint | None:
+        if "transfers" not in self.problem.rows:
+            return None
+        return self.problem.constraint("transfers")
+
+    def update_costs(self, cost: np.ndarray) -> None:
+        """
+        Replaces the costs of the players in player_data, in the same order. Without
+        the presolve only the coefficients of the cost constraint change.
+        """
+        self._player_data = self.player_data.with_columns(pl.Series("cost", cost))
+        if self._problem is None:
+            return
+        if self.presolve:
+            self._invalidate()  # the presolve may no longer be exact
+        else:
+            self._candidates = self._player_data
+            self._problem.set_coefficients(
+                "cost", _dense_row(self.candidates["cost"].to_numpy())
+            )
+
+    def optimise_top_k(self, k: int, min_hamming_distance: int = 2) -> pl.DataFrame:
+        """
+        Returns the k best squads, with their rank, in order. After each solve a
+        no-good cut is appended to the model so that the next squad differs from
+        every previous one by at least min_hamming_distance selection variables, i.e.
+        by at least half that many players. The highspy backend only passes each
+        cut to its live model and warm starts, while the scipy backend rebuilds the
+        model for every solve. The presolve is turned off, as the alternatives may
+        include dominated players. Fewer than k squads are returned if no more exist.
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        if min_hamming_distance < 1:
+            raise ValueError("min_hamming_distance must be at least 1")
+        n_changes = -(-min_hamming_distance // 2)
+
+        presolve = self.presolve
+        self.presolve = False
+        self._invalidate()
+        squads = []
+        try:
+            for rank in range(1, k + 1):
+                result = self._run()
+                if result.x is None:
+                    break  # every remaining squad is too close to one already found
+                selections = np.round(result.x[: self.n_players]).astype(bool)
+                squads.append(
+                    self._selection(selections).with_columns(pl.lit(rank).alias("rank"))
+                )
+                self.problem.add_constraint(
+                    f"no_good_{rank}",
+                    _dense_row(selections.astype(np.float64)),
+                    -np.inf,
+                    selections.sum() - n_changes,
+                )
+        finally:
+            # the cuts mustn't constrain later solves
+            self.presolve = presolve
+            self._invalidate()
+        return pl.concat(squads)
+
+
+class StartingTeamOptimiser(_BaseOptimiser):
+    n_selections = N_STARTING_SELECTIONS
+
+    def _position_bounds(self, positions: np.ndarray) -> ConstraintBounds:
         min_pos_requirements = np.array(
-            [position_min_selections[pos] for pos in position_encoder.categories_[0]]
+            [STARTING_POSITION_MIN_SELECTIONS[pos] for pos in positions]
         )
         max_pos_requirements = np.array(
-            [position_max_selections[pos] for pos in position_encoder.categories_[0]]
-        )
-        return LinearConstraint(
-            position_encoded_data.transpose(),
-            min_pos_requirements,
-            max_pos_requirements,
+            [STARTING_POSITION_MAX_SELECTIONS[pos] for pos in positions]
         )
+        return min_pos_requirements, max_pos_requirements
 
 
 class PSCPSquadOptimiser(SquadOptimiser):
@@ -206,8 +620,18 @@ class PSCPSquadOptimiser(SquadOptimiser):
         teams_to_exclude_from_preselection: tuple[int, ...] = (),
         current_squad: pl.DataFrame | None = None,
         n_substitutions: int | None = None,
+        n_free_transfers: int | None = None,
+        solver: SolverBackend | None = None,
+        solve_options: SolveOptions = SolveOptions(),
     ) -> None:
-        super().__init__(player_data, current_squad, n_substitutions)
+        super().__init__(
+            player_data,
+            current_squad,
+            n_substitutions,
+            n_free_transfers,
+            solver,
+            solve_options,
+        )
         self.players_to_preselect = players_to_preselect
         self.teams_to_exclude_from_preselection = teams_to_exclude_from_preselection
         self._preselect_cheapest_players()
@@ -217,42 +641,182 @@ class PSCPSquadOptimiser(SquadOptimiser):
         Selects 4 cheapest players to be named in the squad but not the starting team.
         Must be within the position constraints.
         """
-        max_selections = {
-            "GKP": 1,
-            "DEF": 2,
-            "MID": 5,
-            "FWD": 2,
-        }  # max number of players in each position that can be selected but not named in the starting team
+        rows = self._preselection_rows()
+        self.selected_players = self.player_data[rows]
+        self._update_constraints(rows)
 
-        selected_player_positions = {pos: 0 for pos in max_selections}
-        df = self.player_data.filter(
-            ~self.player_data["team_id"].is_in(self.teams_to_exclude_from_preselection)
+    def _preselection_rows(self) -> np.ndarray:
+        """
+        Returns the rows of player_data to preselect. Players are taken in order of
+        cost, then points, then row, as long as fewer than the position's cap have
+        been taken before them.
+        """
+        return (
+            self.player_data.with_row_index("row")
+            .filter(~pl.col("team_id").is_in(self.teams_to_exclude_from_preselection))
+            .sort(
+                ["cost", "gameweek_points"],
+                descending=[False, True],
+                maintain_order=True,
+            )
+            .filter(
+                pl.int_range(pl.len()).over("position")
+                < pl.col("position").replace(
+                    PRESELECTION_MAX_SELECTIONS, default=0, return_dtype=pl.Int64
+                )
+            )
+            .head(self.players_to_preselect)["row"]
+            .to_numpy()
         )
-        players_by_cost = df.sort(["cost", "gameweek_points"], descending=[False, True])
-        selected_players = [None for _ in range(self.players_to_preselect)]
-        i = 0
-        for row in players_by_cost.iter_rows(named=True):
-            position = row["position"]
-            if selected_player_positions[position] < max_selections[position]:
-                selected_player_positions[position] += 1
-                selected_players[i] = row  # type: ignore[call-overload]
-                i += 1
-            if i == self.players_to_preselect:
-                break
-
-        self.selected_players = pl.DataFrame(selected_players, self.player_data.schema)
-        self._update_constraints()
-
-    def _update_constraints(self) -> None:
+
+    def _update_constraints(self, rows: np.ndarray) -> None:
         self.total_cost = self.total_cost - self.selected_players["cost"].sum()
-        self.n_selections -= self.players_to_preselect
-        selected_positions = self.selected_players["position"].value_counts()
-        for pos, count in selected_positions.iter_rows():
-            self.position_max_selections[pos] -= count
-        self.player_data = self.player_data.filter(
-            ~self.player_data["player_id"].is_in(self.selected_players["player_id"])
+        self.n_selections -= len(rows)
+        selected_positions = dict(
+            self.selected_players["position"].value_counts().iter_rows()
         )
+        self.position_max_selections = {
+            pos: max_selections - selected_positions.get(pos, 0)
+            for pos, max_selections in self.position_max_selections.items()
+        }
+        keep = np.ones(self.player_data.shape[0], dtype=bool)
+        keep[rows] = False
+        self.player_data = self.player_data.filter(keep)
 
-    def optimise(self) -> pl.DataFrame:
-        df = super().optimise()
-        return pl.concat([df, self.selected_players])
+    def _preselected_transfers(self) -> int:
+        if self.current_squad is None:
+            return 0
+        preselected_players_in_current_squad = self.selected_players["player_id"].is_in(
+            self.current_squad["player_id"]
+        )
+        return int((~preselected_players_in_current_squad).sum())
+
+    def _selection(self, selections: np.ndarray) -> pl.DataFrame:
+        # updated costs or points may be floats where the preselected players' aren't
+        return pl.concat(
+            [super()._selection(selections), self.selected_players],
+            how="vertical_relaxed",
+        )
+
+    def solve(self) -> OptimisationResult:
+        """
+        As for SquadOptimiser, with the preselected players' points added to the
+        objective and the bound, since the selection includes them
+        """
+        result = super().solve()
+        preselected_points = float(self.selected_players["gameweek_points"].sum())
+        return OptimisationResult(
+            result.selection,
+            None if result.objective is None else result.objective + preselected_points,
+            None if result.bound is None else result.bound + preselected_points,
+            result.status,
+        )
+
+
+class JointSelection(NamedTuple):
+    squad: pl.DataFrame
+    starting_team: pl.DataFrame
+    captain: pl.DataFrame
+
+
+class JointSquadOptimiser(SquadOptimiser):
+    """
+    Chooses the squad, the starting team and the captain in a single problem. There
+    are three blocks of player variables: squad, starting and captain selections.
+    Starters score their points, the captain scores them again and the bench scores
+    them with bench_weight, a rough allowance for automatic substitutions.
+    """
+
+    def __init__(
+        self,
+        player_data: pl.DataFrame,
+        current_squad: pl.DataFrame | None = None,
+        n_substitutions: int | None = None,
+        n_free_transfers: int | None = None,
+        bench_weight: float = BENCH_WEIGHT,
+        solver: SolverBackend | None = None,
+        solve_options: SolveOptions = SolveOptions(),
+    ) -> None:
+        self.bench_weight = bench_weight
+        super().__init__(
+            player_data,
+            current_squad,
+            n_substitutions,
+            n_free_transfers,
+            solver,
+            solve_options,
+        )
+
+    @property
+    def n_player_variables(self) -> int:
+        return 3 * self.n_players
+
+    def _in_block(self, matrix: sparse.csr_array, block: int) -> sparse.csr_array:
+        """
+        Moves a constraint on the players into the columns of the given block
+        """
+        n_rows = matrix.shape[0]
+        return sparse.hstack(
+            [
+                sparse.csr_array((n_rows, block * self.n_players)),
+                matrix,
+                sparse.csr_array((n_rows, (2 - block) * self.n_players)),
+            ],
+            format="csr",
+        )
+
+    def _player_variable_costs(self) -> np.ndarray:
+        gw_points = self.candidates["gameweek_points"].to_numpy().astype(np.float64)
+        return -np.concatenate(
+            [
+                self.bench_weight * gw_points,
+                (1 - self.bench_weight) * gw_points,
+                gw_points,
+            ]
+        )
+
+    def _constraint_matrices(self) -> dict[str, sparse.csr_array]:
+        matrices = super()._constraint_matrices()
+        identity = sparse.identity(self.n_players, format="csr")
+        # starters must be in the squad and the captain must start
+        matrices["starting_in_squad"] = self._in_block(identity, 1) - self._in_block(
+            identity, 0
+        )
+        matrices["captain_starting"] = self._in_block(identity, 2) - self._in_block(
+            identity, 1
+        )
+        matrices["starting_position"] = self._in_block(
+            _one_hot_rows(self._position_codes, len(self._positions)), 1
+        )
+        matrices["total_starting_selections"] = self._in_block(
+            _dense_row(np.ones(self.n_players)), 1
+        )
+        matrices["captain"] = self._in_block(_dense_row(np.ones(self.n_players)), 2)
+        return matrices
+
+    def _constraint_bounds(self) -> dict[str, ConstraintBounds]:
+        bounds = super()._constraint_bounds()
+        bounds["starting_in_squad"] = (-np.inf, 0)
+        bounds["captain_starting"] = (-np.inf, 0)
+        bounds["starting_position"] = (
+            np.array(
+                [STARTING_POSITION_MIN_SELECTIONS[pos] for pos in self._positions]
+            ),
+            np.array(
+                [STARTING_POSITION_MAX_SELECTIONS[pos] for pos in self._positions]
+            ),
+        )
+        bounds["total_starting_selections"] = (
+            N_STARTING_SELECTIONS,
+            N_STARTING_SELECTIONS,
+        )
+        bounds["captain"] = (1, 1)
+        return bounds
+
+    def optimise_selection(self) -> JointSelection:
+        squad, starting, captain = self._solve().reshape(3, self.n_players)
+        return JointSelection(
+            squad=self.candidates.filter(squad),
+            starting_team=self.candidates.filter(starting),
+            captain=self.candidates.filter(captain),
+        )
@@ -0,0 +1,306 @@
+"""
+Selects a squad approximately without a MILP, starting from a greedy squad and
+improving it by swapping players while any swap gains points
+"""
+
+import itertools
+import time
+from typing import Final
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    MAX_PLAYERS_PER_TEAM,
+    TRANSFER_HIT_COST,
+    OptimisationResult,
+    SquadOptimiser,
+    _encode,
+)
+from fpl_predictor.squad_selection.solvers import FAILED, LIMIT_REACHED
+
+LOCAL_OPTIMUM: Final[str] = "local_optimum"
+MAX_ITERATIONS: Final[int] = 1000
+# frontier layers of cost against points in each position that pairs are swapped in
+# from
+SWAP_POOL_DEPTH: Final[int] = 3
+_TOLERANCE: Final[float] = 1e-9
+
+
+class LocalSearchSquadOptimiser(SquadOptimiser):
+    """
+    A drop-in for SquadOptimiser which trades optimality for speed. The squad starts
+    from the current squad, if any, and is filled in order of points per unit cost,
+    keeping enough budget for the cheapest players in the remaining places. It is
+    then improved by the best swap of one or two players at a time, evaluated for
+    every swap at once, until none gains points within the budget, position, team
+    and transfer rules. Pairs are only swapped in from the first few frontiers of
+    cost against points in each position, and players in the current squad, so the
+    presolve isn't needed to keep the search fast and is off by default. The solve
+    options' time limit stops the search early. solve() reports no bound, and the
+    MILP is never compiled.
+    """
+
+    presolve = False
+    max_iterations: int = MAX_ITERATIONS
+    swap_pool_depth: int = SWAP_POOL_DEPTH
+
+    def _arrays(self) -> None:
+        # the candidates are selected afresh, as no compiled problem tracks changes
+        self._select_candidates()
+        candidates = self.candidates
+        self._points = candidates["gameweek_points"].to_numpy().astype(np.float64)
+        self._cost = candidates["cost"].to_numpy().astype(np.float64)
+        self._position = self._position_codes
+        self._team = _encode(candidates["team_id"])[1]
+        if self.current_squad is None:
+            self._new = np.zeros(self.n_players, dtype=bool)
+        else:
+            self._new = (
+                ~candidates["player_id"].is_in(self.current_squad["player_id"])
+            ).to_numpy()
+        self._quota = np.asarray(
+            self._position_bounds(self._positions)[1], dtype=np.int64
+        )
+        if self._quota.sum() != self.n_selections:
+            raise ValueError("The position limits must add up to n_selections")
+        self._swap_pool = self._frontier_layers()
+        if self.current_squad is not None:
+            self._swap_pool |= ~self._new
+
+    def _frontier_layers(self) -> np.ndarray:
+        """
+        A mask of the players on the first swap_pool_depth frontiers of each position,
+        the first being those who outscore everyone in the position costing no more,
+        the next the same once the first is removed, and so on
+        """
+        on_frontier = np.zeros(self.n_players, dtype=bool)
+        for position in range(len(self._quota)):
+            players = np.flatnonzero(self._position == position)
+            players = players[np.lexsort((-self._points[players], self._cost[players]))]
+            for _ in range(self.swap_pool_depth):
+                if len(players) == 0:
+                    break
+                points = self._points[players]
+                best_cheaper = np.concatenate(
+                    [[-np.inf], np.maximum.accumulate(points)[:-1]]
+                )
+                layer = points > best_cheaper
+                on_frontier[players[layer]] = True
+                players = players[~layer]
+        return on_frontier
+
+    def _hits(self, n_new: np.ndarray | int) -> np.ndarray:
+        if not self._counts_transfers:
+            return np.zeros(np.shape(n_new))
+        return TRANSFER_HIT_COST * np.maximum(
+            np.asarray(n_new) - self.n_free_transfers, 0
+        )
+
+    def _feasible(self, selected: np.ndarray) -> bool:
+        n_new = self._new[selected].sum()
+        return bool(
+            self._cost[selected].sum() <= self.total_cost + _TOLERANCE
+            and (np.bincount(self._team[selected]) <= MAX_PLAYERS_PER_TEAM).all()
+            and np.array_equal(
+                np.bincount(self._position[selected], minlength=len(self._quota)),
+                self._quota,
+            )
+            and (self.n_substitutions is None or n_new <= self.n_substitutions)
+        )
+
+    def _greedy(self) -> np.ndarray:
+        """
+        A mask of the starting squad
+        """
+        selected = np.zeros(self.n_players, dtype=bool)
+        if self.current_squad is not None:
+            selected = ~self._new
+            position_counts = np.bincount(
+                self._position[selected], minlength=len(self._quota)
+            )
+            if (position_counts > self._quota).any():
+                selected = np.zeros(self.n_players, dtype=bool)
+
+        quota_left = self._quota - np.bincount(
+            self._position[selected], minlength=len(self._quota)
+        )
+        team_counts = np.bincount(self._team[selected], minlength=self._team.max() + 1)
+        spent = self._cost[selected].sum()
+        # the cost of the cheapest players to fill each position's remaining places
+        cheapest = [
+            np.concatenate([[0.0], np.cumsum(np.sort(self._cost[self._position == p]))])
+            for p in range(len(self._quota))
+        ]
+
+        def reserve() -> float:
+            return sum(cheapest[p][n] for p, n in enumerate(quota_left))
+
+        value = self._points / np.maximum(self._cost, _TOLERANCE)
+        for i in np.lexsort((-self._points, -value)):
+            if not quota_left.any():
+                break
+            position, team = self._position[i], self._team[i]
+            if (
+                selected[i]
+                or quota_left[position] == 0
+                or team_counts[team] >= MAX_PLAYERS_PER_TEAM
+            ):
+                continue
+            quota_left[position] -= 1
+            if spent + self._cost[i] + reserve() > self.total_cost + _TOLERANCE:
+                quota_left[position] += 1
+                continue
+            selected[i] = True
+            team_counts[team] += 1
+            spent += self._cost[i]
+        return selected
+
+    def _best_single_swap(
+        self, squad: np.ndarray, others: np.ndarray, team_counts: np.ndarray
+    ) -> tuple[float, tuple[int, ...], tuple[int, ...]]:
+        out_team, in_team = self._team[squad], self._team[others]
+        n_new = (
+            self._new[squad].sum()
+            - self._new[squad][:, np.newaxis]
+            + self._new[others][np.newaxis]
+        )
+        valid = (
+            (self._position[squad][:, np.newaxis] == self._position[others])
+            & (
+                self._cost[squad].sum()
+                - self._cost[squad][:, np.newaxis]
+                + self._cost[others]
+                <= self.total_cost + _TOLERANCE
+            )
+            & (
+                (out_team[:, np.newaxis] == in_team)
+                | (team_counts[in_team] < MAX_PLAYERS_PER_TEAM)
+            )
+        )
+        if self.n_substitutions is not None:
+            valid &= n_new <= self.n_substitutions
+        gain = (
+            self._points[others]
+            - self._points[squad][:, np.newaxis]
+            - self._hits(n_new)
+            + self._hits(self._new[squad].sum())
+        )
+        gain[~valid] = -np.inf
+        out, in_ = np.unravel_index(np.argmax(gain), gain.shape)
+        return gain[out, in_], (squad[out],), (others[in_],)
+
+    def _best_double_swap(
+        self, squad: np.ndarray, others: np.ndarray, team_counts: np.ndarray
+    ) -> tuple[float, tuple[int, ...], tuple[int, ...]]:
+        """
+        The best swap of two players for two others, evaluated for the pairs leaving
+        in each pair of positions at once
+        """
+        best: tuple[float, tuple[int, ...], tuple[int, ...]] = (-np.inf, (), ())
+        out_pairs = np.array(list(itertools.combinations(squad, 2)))
+        out_positions = np.sort(self._position[out_pairs], axis=1)
+        out_pairs = np.take_along_axis(
+            out_pairs, np.argsort(self._position[out_pairs], axis=1), axis=1
+        )
+        n_new_before = self._new[squad].sum()
+        slack = self.total_cost - self._cost[squad].sum() + _TOLERANCE
+
+        for first, second in np.unique(out_positions, axis=0):
+            pairs = out_pairs[
+                (out_positions[:, 0] == first) & (out_positions[:, 1] == second)
+            ]
+            a, b = pairs[:, 0], pairs[:, 1]
+            j = others[self._position[others] == first]
+            k = others[self._position[others] == second]
+            if len(j) == 0 or len(k) == 0:
+                continue
+
+            # players each team would have without the pair leaving
+            j_count = team_counts[self._team[j]] - (
+                (self._team[j] == self._team[a][:, np.newaxis]).astype(int)
+                + (self._team[j] == self._team[b][:, np.newaxis])
+            )
+            k_count = team_counts[self._team[k]] - (
+                (self._team[k] == self._team[a][:, np.newaxis]).astype(int)
+                + (self._team[k] == self._team[b][:, np.newaxis])
+            )
+            same_team = self._team[j][:, np.newaxis] == self._team[k]
+            valid = (
+                (j_count[:, :, np.newaxis] + 1 + same_team <= MAX_PLAYERS_PER_TEAM)
+                & (k_count[:, np.newaxis, :] + 1 + same_team <= MAX_PLAYERS_PER_TEAM)
+                & (
+                    (self._cost[j][:, np.newaxis] + self._cost[k])
+                    <= (slack + self._cost[a] + self._cost[b])[
+                        :, np.newaxis, np.newaxis
+                    ]
+                )
+            )
+            if first == second:
+                valid &= np.triu(np.ones((len(j), len(k)), dtype=bool), 1)
+
+            n_new = (
+                n_new_before
+                - (self._new[a].astype(int) + self._new[b])[:, np.newaxis, np.newaxis]
+                + (self._new[j][:, np.newaxis].astype(int) + self._new[k])
+            )
+            if self.n_substitutions is not None:
+                valid &= n_new <= self.n_substitutions
+            gain = (
+                (self._points[j][:, np.newaxis] + self._points[k])
+                - (self._points[a] + self._points[b])[:, np.newaxis, np.newaxis]
+                - self._hits(n_new)
+                + self._hits(n_new_before)
+            )
+            gain[~valid] = -np.inf
+            pair, j_index, k_index = np.unravel_index(np.argmax(gain), gain.shape)
+            if gain[pair, j_index, k_index] > best[0]:
+                best = (
+                    gain[pair, j_index, k_index],
+                    (a[pair], b[pair]),
+                    (j[j_index], k[k_index]),
+                )
+        return best
+
+    def _local_search(self, selected: np.ndarray) -> tuple[np.ndarray, str]:
+        deadline = (
+            None
+            if self.solve_options.time_limit is None
+            else time.perf_counter() + self.solve_options.time_limit
+        )
+        for _ in range(self.max_iterations):
+            if deadline is not None and time.perf_counter() > deadline:
+                return selected, LIMIT_REACHED
+            squad, others = np.flatnonzero(selected), np.flatnonzero(~selected)
+            team_counts = np.bincount(self._team[squad], minlength=self._team.max() + 1)
+            gain, out, in_ = self._best_single_swap(squad, others, team_counts)
+            if gain <= _TOLERANCE:
+                gain, out, in_ = self._best_double_swap(
+                    squad, np.flatnonzero(~selected & self._swap_pool), team_counts
+                )
+            if gain <= _TOLERANCE:
+                return selected, LOCAL_OPTIMUM
+            selected[list(out)] = False
+            selected[list(in_)] = True
+        return selected, LIMIT_REACHED
+
+    def solve(self) -> OptimisationResult:
+        self._arrays()
+        selected = self._greedy()
+        if not self._feasible(selected):
+            return OptimisationResult(None, None, None, FAILED)
+        selected, status = self._local_search(selected)
+        objective = self._points[selected].sum() - self._hits(self._new[selected].sum())
+        return OptimisationResult(
+            self._selection(selected), float(objective), None, status
+        )
+
+    def optimise_top_k(self, k: int, min_hamming_distance: int = 2) -> pl.DataFrame:
+        raise TypeError(
+            "The local search only finds one squad, use SquadOptimiser for the top k"
+        )
+
+    def optimise(self) -> pl.DataFrame:
+        result = self.solve()
+        assert result.selection is not None, f"Optimisation failed: {result.status}"
+        return result.selection
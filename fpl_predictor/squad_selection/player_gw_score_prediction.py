@@ -1,18 +1,26 @@
 from abc import ABC, abstractmethod
 from functools import reduce
+from typing import TYPE_CHECKING, Iterable, Mapping
 
-import joblib
+import numpy as np
 import polars as pl
-import s3fs
 
 from fpl_predictor.model_training.position_encoder import position_encoder
-from fpl_predictor.model_training.xgboost import XGBoostPredictor
+from fpl_predictor.model_training.ridge import RidgePredictor
+from fpl_predictor.model_training.tree_ensemble import CompiledTreeEnsemble
 from fpl_predictor.player_stats import (
     get_fixtures,
     get_player_data,
     get_player_gameweek_stats,
 )
 
+# joblib, s3fs and sklearn are imported where they're used so that importing the
+# predictors, e.g. for the median past score, doesn't load them
+if TYPE_CHECKING:  # pragma: no cover
+    # only imported for type checking so that the compiled predictor can run without
+    # importing xgboost
+    from fpl_predictor.model_training.xgboost import XGBoostPredictor
+
 
 def _process_home_away_teams(gw_fixture_stats: dict[str, object]) -> pl.DataFrame:
     gw_fixture_stats_df = pl.DataFrame(
@@ -94,6 +102,55 @@ def _append_prediction_gameweek_team_stats(
     return data.join(pl.concat((df1, df2)), on="team_id").drop("team_id")
 
 
+def _finished_gameweek_fixture_stats(
+    gameweeks: Iterable[int],
+) -> dict[int, pl.DataFrame]:
+    all_fixtures = get_fixtures()
+    relevant_fixtures = {
+        gw: [x for x in all_fixtures if x["event"] == gw] for gw in gameweeks
+    }
+    if not all([all([i["finished"] for i in v]) for v in relevant_fixtures.values()]):
+        raise ValueError("Not all relevant fixtures have finished")
+    return {
+        k: pl.concat([_process_home_away_teams(i) for i in v])
+        for k, v in relevant_fixtures.items()
+    }
+
+
+def _lagged_features(
+    gameweek: int,
+    n_prediction_weeks: int,
+    gw_player_stats: Mapping[int, pl.DataFrame],
+    gw_fixture_stats: Mapping[int, pl.DataFrame],
+    player_data: pl.DataFrame,
+) -> pl.DataFrame:
+    """
+    Builds the features for predicting gameweek from the player and fixture stats of
+    the previous n_prediction_weeks gameweeks, which are keyed by gameweek.
+    """
+    all_stats_with_gw = []
+    for i in range(1, n_prediction_weeks + 1):
+        stats = (
+            gw_player_stats[gameweek - i]
+            .join(player_data, on="player_id")
+            .join(gw_fixture_stats[gameweek - i], on="team_id")
+        )
+        all_stats_with_gw.append(
+            stats.rename(
+                {
+                    col: f"gw_-{i}_{col}"
+                    for col in stats.columns
+                    if col not in ["player_id", "team_id", "GKP", "DEF", "MID", "FWD"]
+                }
+            )
+        )
+    if len(all_stats_with_gw) > 1:
+        all_stats_df = reduce(lambda x, y: x.join(y, on="player_id"), all_stats_with_gw)
+    else:
+        all_stats_df = all_stats_with_gw[0]
+    return _append_prediction_gameweek_team_stats(all_stats_df, gameweek)
+
+
 class _BasePrediction(ABC):
     @abstractmethod
     def predict_gw_scores(self) -> pl.DataFrame:  # pragma: no cover
@@ -146,9 +203,14 @@ class MedianPastScore(_BasePrediction):
         return self.data.group_by("player_id").median()
 
 
-class XGBoost(_BasePrediction):
+class _LagFeaturePrediction(_BasePrediction):
+    """
+    Predicts player gameweek points with a model trained on player and fixture stats
+    from the previous n_prediction_weeks gameweeks.
+    """
+
     _bucket = "fpl-prediction-models"
-    _key_pattern = "xgboost/xgboost_{}_prediction_week.joblib"
+    _key_pattern: str
     _player_stats_cols = (
         "minutes",
         "goals_scored",
@@ -168,80 +230,190 @@ class XGBoost(_BasePrediction):
         "gameweek_points",
         "player_id",
     )
+    _id_columns: tuple[str, ...] = ("player_id",)
 
     def __init__(self, upcoming_gameweek: int, n_prediction_weeks: int) -> None:
         if upcoming_gameweek - n_prediction_weeks < 1:  # pragma: no cover
             raise ValueError("Not enough data to predict gameweek scores")
         self.n_prediction_weeks = n_prediction_weeks
         self.gameweek = upcoming_gameweek
-        self.data = self._load_data()
         self.model = self._load_model()
+        self.data = self._load_data()
+
+    def _required_player_stats_cols(self) -> tuple[str, ...]:
+        """
+        Player stats used by the model, features pruned during training aren't fetched
+        """
+        prediction_columns = set(self.model.prediction_columns)
+        return tuple(
+            col
+            for col in self._player_stats_cols
+            if col == "player_id"
+            or any(
+                f"gw_-{i}_{col}" in prediction_columns
+                for i in range(1, self.n_prediction_weeks + 1)
+            )
+        )
 
     def _load_data(self) -> pl.DataFrame:
+        player_stats_cols = self._required_player_stats_cols()
         gw_player_stats = {
-            f"gw_-{i}": get_player_gameweek_stats(
-                self.gameweek - i, self._player_stats_cols
-            )
+            self.gameweek
+            - i: get_player_gameweek_stats(self.gameweek - i, player_stats_cols)
             for i in range(1, self.n_prediction_weeks + 1)
         }
         player_data = _append_position_encodings(get_player_data())
-        gw_player_stats = {
-            k: v.join(player_data, on="player_id") for k, v in gw_player_stats.items()
-        }
-        gw_fixture_stats = self._load_fixture_data()
-        all_stats = {
-            k: v.join(gw_fixture_stats[k], on="team_id")
-            for k, v in gw_player_stats.items()
-        }
-        all_stats_with_gw = [
-            v.rename(
-                {
-                    i: f"{k}_{i}"
-                    for i in v.columns
-                    if i not in ["player_id", "team_id", "GKP", "DEF", "MID", "FWD"]
-                }
-            )
-            for k, v in all_stats.items()
-        ]
-        if len(all_stats_with_gw) > 1:
-            all_stats_df = reduce(
-                lambda x, y: x.join(y, on="player_id"), all_stats_with_gw
-            )
-        else:
-            all_stats_df = all_stats_with_gw[0]
-        return _append_prediction_gameweek_team_stats(all_stats_df, self.gameweek)
-
-    def _load_fixture_data(self) -> dict[str, pl.DataFrame]:
-        all_fixtures = get_fixtures()
-        relevant_fixtures = {
-            f"gw_-{i}": [x for x in all_fixtures if x["event"] == self.gameweek - i]
-            for i in range(1, self.n_prediction_weeks + 1)
-        }
-        if not all(
-            [all([i["finished"] for i in v]) for v in relevant_fixtures.values()]
-        ):
-            raise ValueError("Not all relevant fixtures have finished")
-        return {
-            k: pl.concat([_process_home_away_teams(i) for i in v])
-            for k, v in relevant_fixtures.items()
-        }
-
-    def _load_model(self) -> XGBoostPredictor:
-        fs = s3fs.S3FileSystem()
-        key = self._key_pattern.format(self.n_prediction_weeks)
-        filename = f"s3://{self._bucket}/{key}"
-        with fs.open(filename, encoding="utf8") as fh:
-            model = joblib.load(fh)
-        return model
+        gw_fixture_stats = _finished_gameweek_fixture_stats(gw_player_stats)
+        return _lagged_features(
+            self.gameweek,
+            self.n_prediction_weeks,
+            gw_player_stats,
+            gw_fixture_stats,
+            player_data,
+        )
 
     def predict_gw_scores(self) -> pl.DataFrame:
         if not "player_id" in self.data.columns:
             raise ValueError("Data must contain player_id column")
         data = self.data.select(self.model.prediction_columns)
-        preds = self.model.model.predict(data)
-        return pl.DataFrame(
-            {"player_id": self.data["player_id"], "gameweek_points": preds}
+        preds = self._predict(data)
+        return self.data.select(self._id_columns).with_columns(
+            pl.Series("gameweek_points", preds)
         )
 
+    def _model_filename(self) -> str:
+        key = self._key_pattern.format(self.n_prediction_weeks)
+        return f"s3://{self._bucket}/{key}"
+
+    @abstractmethod
+    def _load_model(self):  # pragma: no cover
+        pass
+
+    @abstractmethod
+    def _predict(self, data: pl.DataFrame) -> np.ndarray:  # pragma: no cover
+        pass
+
+
+class XGBoost(_LagFeaturePrediction):
+    _key_pattern = "xgboost/xgboost_{}_prediction_week.joblib"
+
+    def _load_model(self) -> "XGBoostPredictor":
+        import joblib
+        import s3fs
+
+        fs = s3fs.S3FileSystem()
+        with fs.open(self._model_filename(), encoding="utf8") as fh:
+            model = joblib.load(fh)
+        return model
+
+    def _predict(self, data: pl.DataFrame) -> np.ndarray:
+        return self.model.model.predict(data)
+
+
+class MultiGameweekXGBoost(XGBoost):
+    """
+    Predicts several gameweeks together. Each historical gameweek required by any of
+    them is fetched once and all gameweeks are scored with a single predict call,
+    returning a long frame with a row per player and gameweek. The lag features need
+    the results of the gameweeks before each one, so beyond the next gameweek this
+    only works for gameweeks that have been played, as in backtests.
+    """
+
+    _id_columns = ("player_id", "gameweek")
+
+    def __init__(
+        self, upcoming_gameweeks: Iterable[int], n_prediction_weeks: int
+    ) -> None:
+        self.gameweeks = tuple(sorted(set(upcoming_gameweeks)))
+        if not self.gameweeks:
+            raise ValueError("At least one gameweek must be predicted")
+        super().__init__(self.gameweeks[0], n_prediction_weeks)
+
+    def _load_data(self) -> pl.DataFrame:
+        player_stats_cols = self._required_player_stats_cols()
+        lag_gameweeks = sorted(
+            {
+                gw - i
+                for gw in self.gameweeks
+                for i in range(1, self.n_prediction_weeks + 1)
+            }
+        )
+        unfinished_gameweeks = sorted(
+            {
+                x["event"]
+                for x in get_fixtures()
+                if x["event"] in lag_gameweeks and not x["finished"]
+            }
+        )
+        if unfinished_gameweeks:
+            raise ValueError(
+                f"Gameweeks {unfinished_gameweeks} haven't finished, but the lag "
+                "features need their results. Only past gameweeks and the next one "
+                "can be predicted, so predictions can't be made further ahead."
+            )
+        gw_player_stats = {
+            gw: get_player_gameweek_stats(gw, player_stats_cols) for gw in lag_gameweeks
+        }
+        player_data = _append_position_encodings(get_player_data())
+        gw_fixture_stats = _finished_gameweek_fixture_stats(lag_gameweeks)
+        return pl.concat(
+            [
+                _lagged_features(
+                    gw,
+                    self.n_prediction_weeks,
+                    gw_player_stats,
+                    gw_fixture_stats,
+                    player_data,
+                ).with_columns(pl.lit(gw).alias("gameweek"))
+                for gw in self.gameweeks
+            ],
+            how="vertical_relaxed",
+        )
+
+
+class CompiledXGBoost(_LagFeaturePrediction):
+    """
+    Scores players with the XGBoost model exported as a CompiledTreeEnsemble, which
+    doesn't require xgboost to be installed or imported.
+    """
+
+    _key_pattern = "xgboost/xgboost_{}_prediction_week.npz"
+
+    def _load_model(self) -> CompiledTreeEnsemble:
+        import s3fs
+
+        fs = s3fs.S3FileSystem()
+        with fs.open(self._model_filename(), "rb") as fh:
+            model = CompiledTreeEnsemble.load(fh)
+        return model
+
+    def _predict(self, data: pl.DataFrame) -> np.ndarray:
+        return self.model.predict(data.cast(pl.Float32).to_numpy())
+
+
+class Ridge(_LagFeaturePrediction):
+    """
+    Scores players with a ridge regression on the lag features, which only needs a
+    small coefficient file and a single matrix-vector product.
+    """
+
+    _key_pattern = "ridge/ridge_{}_prediction_week.npz"
+
+    def _load_model(self) -> RidgePredictor:
+        import s3fs
+
+        fs = s3fs.S3FileSystem()
+        with fs.open(self._model_filename(), "rb") as fh:
+            model = RidgePredictor.load(fh)
+        return model
+
+    def _predict(self, data: pl.DataFrame) -> np.ndarray:
+        return self.model.predict(data.cast(pl.Float64).to_numpy())
+
 
-SCORE_PREDICTOR_FACTORY = {"median_past_score": MedianPastScore, "xgboost": XGBoost}
+SCORE_PREDICTOR_FACTORY = {
+    "median_past_score": MedianPastScore,
+    "xgboost": XGBoost,
+    "compiled_xgboost": CompiledXGBoost,
+    "ridge": Ridge,
+}
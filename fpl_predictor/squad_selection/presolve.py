@@ -0,0 +1,82 @@
+"""
+Removes players who can't be needed in an optimal selection before the MILP is built
+"""
+
+import numpy as np
+
+CHUNK_SIZE = 2**22  # elements of the dominance matrix evaluated at once
+
+
+def undominated_players(
+    gameweek_points: np.ndarray,
+    cost: np.ndarray,
+    position_codes: np.ndarray,
+    position_max_selections: np.ndarray,
+    n_selections: int,
+    team_codes: np.ndarray | None = None,
+    max_players_per_team: int | None = None,
+    protected: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Returns a mask of the players to keep. A player dominates another in the same
+    position if they cost no more and predict at least as many points, with ties
+    broken by order. A player can be dropped when, however the rest of the selection
+    is made, a dominating player would still be free to swap in. That is, after
+    discounting the dominating players who could already be selected in the position
+    and those in the teams which could already be full, at least one is left.
+    Swapping in a dominating player never lowers the points, raises the cost or
+    breaks a position or team limit, so an optimal selection among the kept players
+    is optimal overall. Protected players, e.g. those in the current squad whose
+    replacement would cost a transfer, are always kept.
+
+    gameweek_points may have a column per scenario, in which case a dominating
+    player must predict at least as many points in every scenario.
+
+    position_max_selections is indexed by position code and must be an upper bound on
+    the number of players selected in each position.
+    """
+    n_players = len(gameweek_points)
+    points = gameweek_points.reshape(n_players, -1)
+    keep = np.ones(n_players, dtype=bool)
+    # a total order in which every player comes after those who dominate them
+    order = np.lexsort((np.arange(n_players), cost, -points.mean(axis=1)))
+    rank = np.empty(n_players, dtype=np.intp)
+    rank[order] = np.arange(n_players)
+
+    if team_codes is None or max_players_per_team is None:
+        team_codes = np.zeros(n_players, dtype=np.intp)
+        n_full_teams = 0
+    else:
+        # teams other than the dropped player's which the rest of the selection fills
+        n_full_teams = (n_selections - 1) // max_players_per_team
+    n_teams = team_codes.max() + 1 if n_players else 0
+
+    for position_code in np.unique(position_codes):
+        players = np.flatnonzero(position_codes == position_code)
+        # other players in the position the rest of the selection could include
+        n_selected_others = max(position_max_selections[position_code] - 1, 0)
+        team_one_hot = np.zeros((len(players), n_teams), dtype=np.int32)
+        team_one_hot[np.arange(len(players)), team_codes[players]] = 1
+
+        chunk_size = max(CHUNK_SIZE // (len(players) * points.shape[1]), 1)
+        for start in range(0, len(players), chunk_size):
+            chunk = players[start : start + chunk_size]
+            dominates = (
+                (cost[players] <= cost[chunk, np.newaxis])
+                & (points[players] >= points[chunk, np.newaxis]).all(axis=2)
+                & (rank[players] < rank[chunk, np.newaxis])
+            )
+            dominating_per_team = dominates.astype(np.int32) @ team_one_hot
+            n_dominating = dominating_per_team.sum(axis=1)
+            # dominating players in the same team can always swap in
+            dominating_per_team[np.arange(len(chunk)), team_codes[chunk]] = 0
+            if n_full_teams:
+                dominating_per_team.sort(axis=1)
+                n_blocked = dominating_per_team[:, -n_full_teams:].sum(axis=1)
+            else:
+                n_blocked = 0
+            keep[chunk] = n_dominating - n_blocked - n_selected_others < 1
+
+    if protected is not None:
+        keep |= protected
+    return keep
@@ -0,0 +1,188 @@
+"""
+Selects a squad from sampled scenarios of the players' points rather than a single
+prediction, maximising the expected points with an optional floor on the
+conditional value at risk (CVaR) of the squad's points
+"""
+
+from typing import Final
+
+import numpy as np
+import polars as pl
+from scipy import sparse
+from scipy.optimize import LinearConstraint
+
+from fpl_predictor.squad_selection.linear_optimisation import SquadOptimiser, _dense_row
+from fpl_predictor.squad_selection.solvers import (
+    ConstraintBounds,
+    SolveOptions,
+    SolverBackend,
+)
+
+CVAR_ALPHA: Final[float] = 0.1
+
+
+def conditional_value_at_risk(points: np.ndarray, alpha: float = CVAR_ALPHA) -> float:
+    """
+    The mean of the worst alpha fraction of the scenarios' points, counting the
+    scenario on the boundary in part when alpha * len(points) isn't whole
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError("alpha must be in (0, 1]")
+    points = np.sort(points)
+    n_tail = alpha * len(points)
+    n_whole = int(np.floor(n_tail))
+    tail_points = points[:n_whole].sum()
+    if n_whole < len(points):
+        tail_points += (n_tail - n_whole) * points[n_whole]
+    return float(tail_points / n_tail)
+
+
+class ScenarioSquadOptimiser(SquadOptimiser):
+    """
+    scenario_points has a row per scenario and a column per player in player_data,
+    and may be sparse. The players' gameweek_points are replaced by their mean over
+    the scenarios, which is the objective. When min_cvar is set, the CVaR of the
+    squad's points at cvar_alpha must be at least min_cvar. This is linearised as
+    in Rockafellar and Uryasev, with a continuous variable for the value at risk and
+    a shortfall per scenario, so the scenarios add one sparse row each. With a CVaR
+    floor the presolve only drops players dominated in every scenario.
+    """
+
+    def __init__(
+        self,
+        player_data: pl.DataFrame,
+        scenario_points: np.ndarray | sparse.sparray,
+        min_cvar: float | None = None,
+        cvar_alpha: float = CVAR_ALPHA,
+        current_squad: pl.DataFrame | None = None,
+        n_substitutions: int | None = None,
+        n_free_transfers: int | None = None,
+        solver: SolverBackend | None = None,
+        solve_options: SolveOptions = SolveOptions(),
+    ) -> None:
+        scenario_points = sparse.csr_array(scenario_points, dtype=np.float64)
+        if scenario_points.shape[1] != player_data.shape[0]:
+            raise ValueError("scenario_points must have a column per player")
+        self.scenario_points = scenario_points
+        self.min_cvar = min_cvar
+        self.cvar_alpha = cvar_alpha
+        expected_points = np.asarray(scenario_points.mean(axis=0)).ravel()
+        super().__init__(
+            player_data.with_columns(pl.Series("gameweek_points", expected_points)),
+            current_squad,
+            n_substitutions,
+            n_free_transfers,
+            solver,
+            solve_options,
+        )
+
+    @property
+    def n_scenarios(self) -> int:
+        return self.scenario_points.shape[0]
+
+    @property
+    def min_cvar(self) -> float | None:
+        return self._min_cvar
+
+    @min_cvar.setter
+    def min_cvar(self, value: float | None) -> None:
+        rows_changed = (value is None) != (getattr(self, "_min_cvar", None) is None)
+        self._min_cvar = value
+        if rows_changed:
+            self._invalidate()
+        else:
+            self._update_bounds("cvar")
+
+    @property
+    def cvar_alpha(self) -> float:
+        return self._cvar_alpha
+
+    @cvar_alpha.setter
+    def cvar_alpha(self, value: float) -> None:
+        if not 0 < value <= 1:
+            raise ValueError("cvar_alpha must be in (0, 1]")
+        self._cvar_alpha = value
+        self._invalidate()  # alpha scales the shortfalls in the cvar row
+
+    def _dominance_points(self) -> np.ndarray:
+        if self.min_cvar is None:
+            return super()._dominance_points()
+        # swapping in a player who scores no less in any scenario can't lower the CVaR
+        return self.scenario_points.T.toarray()
+
+    @property
+    def _n_squad_auxiliary(self) -> int:
+        return len(super()._auxiliary_variable_costs())
+
+    def _auxiliary_variable_costs(self) -> np.ndarray:
+        costs = super()._auxiliary_variable_costs()
+        if self.min_cvar is None:
+            return costs
+        # the value at risk and the shortfall in each scenario
+        return np.concatenate([costs, np.zeros(1 + self.n_scenarios)])
+
+    def _auxiliary_variable_bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        lower, upper = super()._auxiliary_variable_bounds()
+        if self.min_cvar is not None:
+            # the value at risk can be negative
+            lower[self._n_squad_auxiliary] = -np.inf
+        return lower, upper
+
+    def _auxiliary_variable_integrality(self) -> np.ndarray:
+        integrality = super()._auxiliary_variable_integrality()
+        integrality[self._n_squad_auxiliary :] = 0
+        return integrality
+
+    def _constraint_matrices(self) -> dict[str, sparse.csr_array]:
+        matrices = super()._constraint_matrices()
+        if self.min_cvar is None:
+            return matrices
+        padding = self.n_player_variables - self.n_players + self._n_squad_auxiliary
+        # squad points less the value at risk, plus the shortfall, in each scenario
+        matrices["shortfall"] = sparse.hstack(
+            [
+                self.scenario_points[:, self._candidate_mask],
+                sparse.csr_array((self.n_scenarios, padding)),
+                sparse.csr_array(-np.ones((self.n_scenarios, 1))),
+                sparse.identity(self.n_scenarios, format="csr"),
+            ],
+            format="csr",
+        )
+        matrices["cvar"] = sparse.hstack(
+            [
+                sparse.csr_array((1, self.n_players + padding)),
+                _dense_row(
+                    np.concatenate(
+                        [
+                            [1.0],
+                            np.full(
+                                self.n_scenarios,
+                                -1 / (self.cvar_alpha * self.n_scenarios),
+                            ),
+                        ]
+                    )
+                ),
+            ],
+            format="csr",
+        )
+        return matrices
+
+    def _constraint_bounds(self) -> dict[str, ConstraintBounds]:
+        bounds = super()._constraint_bounds()
+        if self.min_cvar is not None:
+            bounds["shortfall"] = (0, np.inf)
+            bounds["cvar"] = (self.min_cvar, np.inf)
+        return bounds
+
+    @property
+    def cvar_constraint(self) -> LinearConstraint | None:
+        if "cvar" not in self.problem.rows:
+            return None
+        return self.problem.constraint("cvar")
+
+    def squad_scenario_points(self, squad: pl.DataFrame) -> np.ndarray:
+        """
+        The points of a squad in each scenario
+        """
+        in_squad = self.player_data["player_id"].is_in(squad["player_id"]).to_numpy()
+        return self.scenario_points @ in_squad.astype(np.float64)
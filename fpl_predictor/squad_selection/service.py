@@ -0,0 +1,239 @@
+"""
+Serves squad selections over HTTP from a long running process, so the player data,
+fixtures and predictions are fetched once and kept in memory rather than on every
+call. They are refreshed in the background.
+"""
+
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Final, Hashable
+
+import polars as pl
+
+from fpl_predictor.player_stats import get_fixtures, get_player_data
+from fpl_predictor.settings import supported_squad_selection_methods
+from fpl_predictor.squad_selection import squad_selection
+from fpl_predictor.squad_selection.solvers import SolveOptions
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL: Final[float] = 15 * 60.0  # seconds
+CURRENT_SQUAD_COLUMNS: Final[tuple[str, ...]] = (
+    "player_id",
+    "team_id",
+    "position",
+    "cost",
+)
+# the predictors' options a request may set, each an int
+PREDICTOR_FIELDS: Final[tuple[str, ...]] = (
+    "n_prediction_weeks",
+    "n_previous_weeks",
+    "min_required_weeks",
+)
+
+PlayerDataLoader = Callable[..., pl.DataFrame]
+_PlayerDataKey = tuple[int, str, tuple[tuple[str, Hashable], ...]]
+
+# held while the shared player data and fixtures caches are cleared and refilled
+_cache_lock = threading.Lock()
+
+
+def _load_player_data(
+    gameweek: int, prediction_method: str, **kwargs: Hashable
+) -> pl.DataFrame:
+    """
+    Fetches the player data and predictions afresh rather than from the caches. The
+    service only reads the caches here, so holding the lock keeps other loads from
+    reading them while they're cleared.
+    """
+    with _cache_lock:
+        get_player_data.cache_clear()
+        get_fixtures.cache_clear()
+        return squad_selection._get_player_data.__wrapped__(
+            gameweek, prediction_method, **kwargs
+        )
+
+
+class SquadSelectionService:
+    """
+    Keeps the player data and predictions for each gameweek and prediction method
+    which has been asked for, loading them with load_player_data on first use.
+    refresh reloads them all, and requests are answered from the old data until
+    the new data is ready.
+    """
+
+    def __init__(self, load_player_data: PlayerDataLoader = _load_player_data):
+        self.load_player_data = load_player_data
+        self.refreshed_at: float | None = None
+        self._player_data: dict[_PlayerDataKey, pl.DataFrame] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def player_data(
+        self, gameweek: int, prediction_method: str, **kwargs: Hashable
+    ) -> pl.DataFrame:
+        key = (gameweek, prediction_method, tuple(sorted(kwargs.items())))
+        with self._lock:
+            if key in self._player_data:
+                return self._player_data[key]
+        player_data = self.load_player_data(gameweek, prediction_method, **kwargs)
+        with self._lock:
+            return self._player_data.setdefault(key, player_data)
+
+    def refresh(self) -> None:
+        with self._refresh_lock:
+            with self._lock:
+                keys = list(self._player_data)
+            for key in keys:
+                gameweek, prediction_method, kwargs = key
+                try:
+                    player_data = self.load_player_data(
+                        gameweek, prediction_method, **dict(kwargs)
+                    )
+                except Exception:
+                    logger.exception("Failed to refresh the player data for %s", key)
+                    continue
+                with self._lock:
+                    self._player_data[key] = player_data
+            self.refreshed_at = time.time()
+            logger.info("Refreshed the player data for %s", keys)
+
+    def start_refreshing(self, interval: float = REFRESH_INTERVAL) -> threading.Event:
+        """
+        Refreshes the data every interval seconds in a daemon thread until the
+        returned event is set
+        """
+        stop = threading.Event()
+
+        def refresh_until_stopped() -> None:
+            while not stop.wait(interval):
+                self.refresh()
+
+        threading.Thread(target=refresh_until_stopped, daemon=True).start()
+        return stop
+
+    def _current_squad(
+        self, player_data: pl.DataFrame, current_squad: list[Any]
+    ) -> pl.DataFrame:
+        """
+        The current squad is a list of player ids, which are looked up in the player
+        data, or of records with the CURRENT_SQUAD_COLUMNS, as in the current squad
+        csv the command line takes
+        """
+        if all(isinstance(player, dict) for player in current_squad):
+            return pl.DataFrame(current_squad).select(list(CURRENT_SQUAD_COLUMNS))
+        squad = player_data.filter(pl.col("player_id").is_in(current_squad))
+        if squad.shape[0] != len(set(current_squad)):
+            raise ValueError(
+                "Some of the current squad have no predictions, pass them as records"
+            )
+        return squad.select(list(CURRENT_SQUAD_COLUMNS))
+
+    def select_squad(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        Answers a request with the fields of select_squad, plus an optional
+        squad_selection_method, the solve options' fields and the PREDICTOR_FIELDS.
+        Returns the selected squad's records and its expected points. Any other
+        field is rejected, since each combination of predictor options is kept and
+        refreshed.
+        """
+        request = dict(request)
+        gameweek = int(request.pop("gameweek"))
+        prediction_method = request.pop("prediction_method", "median_past_score")
+        current_squad = request.pop("current_squad", None)
+        n_free_transfers = int(request.pop("n_free_transfers", 1))
+        squad_selection_method = request.pop("squad_selection_method", None)
+        if (
+            squad_selection_method is not None
+            and squad_selection_method not in supported_squad_selection_methods
+        ):
+            raise ValueError(f"Invalid squad selection method {squad_selection_method}")
+        solve_options = SolveOptions(
+            time_limit=request.pop("time_limit", None),
+            mip_rel_gap=request.pop("mip_rel_gap", None),
+            node_limit=request.pop("node_limit", None),
+        )
+        predictor_options = {
+            field: int(request.pop(field))
+            for field in PREDICTOR_FIELDS
+            if field in request
+        }
+        if request:
+            raise ValueError(f"Unknown fields {sorted(request)}")
+        player_data = self.player_data(gameweek, prediction_method, **predictor_options)
+
+        squad, expected_points = squad_selection.select_squad_from_player_data(
+            player_data,
+            (
+                None
+                if current_squad is None
+                else self._current_squad(player_data, current_squad)
+            ),
+            n_free_transfers=n_free_transfers,
+            solve_options=solve_options,
+            squad_selection_method=squad_selection_method,
+        )
+        return {"squad": squad.to_dicts(), "expected_points": expected_points}
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            loaded = [
+                {"gameweek": gameweek, "prediction_method": method, **dict(kwargs)}
+                for gameweek, method, kwargs in self._player_data
+            ]
+        return {"loaded": loaded, "refreshed_at": self.refreshed_at}
+
+
+class _SquadSelectionHandler(BaseHTTPRequestHandler):
+    """
+    GET /status describes the loaded data and POST /select_squad takes a JSON
+    request for SquadSelectionService.select_squad
+    """
+
+    server: "SquadSelectionServer"
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path != "/status":
+            self._respond(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+            return
+        self._respond(HTTPStatus.OK, self.server.service.status())
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/select_squad":
+            self._respond(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            response = self.server.service.select_squad(json.loads(body))
+        except (KeyError, TypeError, ValueError) as e:
+            self._respond(HTTPStatus.BAD_REQUEST, {"error": repr(e)})
+            return
+        except Exception as e:
+            logger.exception("Failed to select a squad")
+            self._respond(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(e)})
+            return
+        self._respond(HTTPStatus.OK, response)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format, *args)
+
+
+class SquadSelectionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: SquadSelectionService):
+        super().__init__(address, _SquadSelectionHandler)
+        self.service = service
@@ -0,0 +1,258 @@
+"""
+Simulates the points squads score in a gameweek. Players appear with some
+probability and score around their predicted points, with the scores of players in the
+same team correlated through a Gaussian copula. Each draw applies the automatic
+substitution and vice captain rules, so the distributions include the bench.
+"""
+
+from typing import Final, NamedTuple
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    N_SELECTIONS,
+    N_STARTING_SELECTIONS,
+    STARTING_POSITION_MAX_SELECTIONS,
+    STARTING_POSITION_MIN_SELECTIONS,
+    _encode,
+)
+from fpl_predictor.squad_selection.scenario_optimisation import (
+    CVAR_ALPHA,
+    conditional_value_at_risk,
+)
+from fpl_predictor.squad_selection.squad_scoring import SquadScorer
+from fpl_predictor.squad_selection.starting_team import POSITIONS
+
+N_DRAWS: Final[int] = 100_000
+# used for players without an appearance_probability
+APPEARANCE_PROBABILITY: Final[float] = 0.9
+TEAM_CORRELATION: Final[float] = 0.2
+POINTS_SD: Final[float] = 3.0
+
+
+class SimulatedPoints(NamedTuple):
+    points: np.ndarray  # each squad's points in each draw, net of any hits
+    bench_points: np.ndarray  # the part of the points scored by substitutes
+
+
+class PointsSimulator:
+    """
+    Simulates squads of the players in player_data, indexed by their rows as for
+    SquadScorer, which picks each squad's starting team, captain and vice captain
+    from the predicted points. A player appears with their appearance_probability, a
+    column of player_data which defaults to APPEARANCE_PROBABILITY, and scores
+    nothing otherwise. An appearing player's points are normal with a standard
+    deviation of points_sd and a mean which keeps their expected points at
+    gameweek_points. The noise of players in the same team has a correlation of
+    team_correlation. Every squad sees the same draws, so they compare fairly.
+    """
+
+    def __init__(
+        self,
+        player_data: pl.DataFrame,
+        current_squad: pl.DataFrame | None = None,
+        n_free_transfers: int = 1,
+        team_correlation: float = TEAM_CORRELATION,
+        points_sd: float = POINTS_SD,
+        n_draws: int = N_DRAWS,
+        seed: int | None = None,
+    ):
+        if not 0 <= team_correlation <= 1:
+            raise ValueError("team_correlation must be in [0, 1]")
+        self.scorer = SquadScorer(player_data, current_squad, n_free_transfers)
+        self.team_correlation = team_correlation
+        self.points_sd = points_sd
+        self.n_draws = n_draws
+        self.seed = seed
+        self._points = player_data["gameweek_points"].to_numpy().astype(np.float64)
+        self._teams = _encode(player_data["team_id"])[1]
+        positions, position_codes = _encode(player_data["position"])
+        self._pitch_order = np.array([POSITIONS.index(p) for p in positions])[
+            position_codes
+        ]
+        if "appearance_probability" in player_data.columns:
+            self._appearance_probability = (
+                player_data["appearance_probability"]
+                .fill_null(APPEARANCE_PROBABILITY)
+                .to_numpy()
+                .astype(np.float64)
+            )
+        else:
+            self._appearance_probability = np.full(
+                player_data.shape[0], APPEARANCE_PROBABILITY
+            )
+        if not (
+            (self._appearance_probability > 0) & (self._appearance_probability <= 1)
+        ).all():
+            raise ValueError("appearance_probability must be in (0, 1]")
+
+    def _draw(self, players: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Whether each of the players appears in each draw, and their points, with a row
+        per player and a column per draw
+        """
+        rng = np.random.default_rng(self.seed)
+        teams, team_rows = np.unique(self._teams[players], return_inverse=True)
+        noise = rng.standard_normal((len(teams), self.n_draws), dtype=np.float32)[
+            team_rows
+        ]
+        noise *= np.sqrt(self.team_correlation)
+        noise += np.sqrt(1 - self.team_correlation) * rng.standard_normal(
+            (len(players), self.n_draws), dtype=np.float32
+        )
+        probability = self._appearance_probability[players][:, np.newaxis]
+        appeared = (
+            rng.random((len(players), self.n_draws), dtype=np.float32) < probability
+        )
+        points = self.points_sd * noise
+        points += (self._points[players][:, np.newaxis] / probability).astype(
+            np.float32
+        )
+        points[~appeared] = 0
+        return appeared, points
+
+    def _slots(self, squads: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Each squad's players in the order substitutions are made: the starters from
+        the goalkeeper forward, then the substitute goalkeeper and the outfield
+        substitutes from the highest predicted scorer down. Also returns the slots of
+        the captain and vice captain.
+        """
+        scores = self.scorer.score(squads)
+        members = np.nonzero(squads)[1].reshape(len(squads), N_SELECTIONS)
+        starting = np.take_along_axis(scores.starting, members, axis=1)
+        pitch_order = self._pitch_order[members]
+        group = np.where(starting, 0, np.where(pitch_order == 0, 1, 2))
+        order = np.lexsort(
+            (-self._points[members], np.where(starting, pitch_order, 0), group), axis=1
+        )
+        slots = np.take_along_axis(members, order, axis=1)
+        captain = np.argmax(slots == scores.captain[:, np.newaxis], axis=1)
+        vice_captain = np.argmax(slots == scores.vice_captain[:, np.newaxis], axis=1)
+        return slots, captain, vice_captain
+
+    def _substitutions(
+        self,
+        appeared: np.ndarray,
+        points: np.ndarray,
+        slots: np.ndarray,
+        pitch_order: np.ndarray,
+        missing: np.ndarray,
+        captain: int,
+        vice_captain: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        appeared and points have a row per player and a column per draw. slots are the
+        rows of one squad in the order from _slots, pitch_order their positions
+        counted from the goalkeeper forward and missing the number of the squad's
+        starters in each position who don't appear in each draw. Each substitute who
+        appears, in order, replaces the first missing starter, from the goalkeeper
+        forward, whose position they can take without breaking the starting position
+        rules. Returns the points scored by substitutes in each draw, and the extra
+        points for the captain, or the vice captain if the captain doesn't play.
+        """
+        formation = [
+            np.full(self.n_draws, (pitch_order[:N_STARTING_SELECTIONS] == p).sum())
+            for p in range(len(POSITIONS))
+        ]
+        plays = [appeared[row] for row in slots]
+        bench_points = np.zeros(self.n_draws, dtype=np.float32)
+        for slot in range(N_STARTING_SELECTIONS, N_SELECTIONS):
+            in_position = pitch_order[slot]
+            waiting = plays[slot].copy()
+            # goalkeepers only replace goalkeepers
+            for out_position in [0] if in_position == 0 else range(1, len(POSITIONS)):
+                swap = waiting & (missing[out_position] > 0)
+                if out_position != in_position:
+                    swap &= (
+                        formation[out_position]
+                        > STARTING_POSITION_MIN_SELECTIONS[POSITIONS[out_position]]
+                    ) & (
+                        formation[in_position]
+                        < STARTING_POSITION_MAX_SELECTIONS[POSITIONS[in_position]]
+                    )
+                missing[out_position] -= swap
+                formation[out_position] -= swap
+                formation[in_position] += swap
+                waiting &= ~swap
+            plays[slot] = plays[slot] & ~waiting
+            bench_points += np.where(plays[slot], points[slots[slot]], 0)
+
+        armband_points = np.where(
+            plays[captain],
+            points[slots[captain]],
+            np.where(plays[vice_captain], points[slots[vice_captain]], 0),
+        )
+        return bench_points, armband_points
+
+    def simulate(self, squads: np.ndarray) -> SimulatedPoints:
+        """
+        squads has a row per squad of N_SELECTIONS players and a column per player,
+        as for SquadScorer.score. The players' outcomes are drawn once and shared by
+        the squads. The starters' points and the missing starters of every squad come
+        from matrix products with the draws, leaving only the substitutions and
+        armband to simulate squad by squad.
+        """
+        squads = np.atleast_2d(np.asarray(squads, dtype=bool))
+        if (squads.sum(axis=1) != N_SELECTIONS).any():
+            raise ValueError(f"Every squad must have {N_SELECTIONS} players")
+        players = np.flatnonzero(squads.any(axis=0))
+        appeared, points = self._draw(players)
+        slots, captain, vice_captain = self._slots(squads)
+        pitch_order = self._pitch_order[slots]
+        # rows of the drawn players
+        slots = np.searchsorted(players, slots)
+
+        n_squads = len(squads)
+        starting = np.zeros((n_squads, len(players)), dtype=np.float32)
+        np.put_along_axis(starting, slots[:, :N_STARTING_SELECTIONS], 1, axis=1)
+        # squad and position, player
+        starting_in_position = (
+            starting[:, np.newaxis]
+            * (self._pitch_order[players] == np.arange(len(POSITIONS))[:, np.newaxis])
+        ).reshape(-1, len(players))
+        missing = (starting_in_position @ (~appeared).astype(np.float32)).reshape(
+            n_squads, len(POSITIONS), self.n_draws
+        )
+
+        total = starting @ points
+        bench_points = np.empty((n_squads, self.n_draws), dtype=np.float32)
+        for i in range(n_squads):
+            bench_points[i], armband_points = self._substitutions(
+                appeared,
+                points,
+                slots[i],
+                pitch_order[i],
+                missing[i],
+                captain[i],
+                vice_captain[i],
+            )
+            total[i] += bench_points[i] + armband_points
+        total -= self.scorer.hits(squads)[:, np.newaxis]
+        return SimulatedPoints(total, bench_points)
+
+    def simulate_squad(self, squad: pl.DataFrame) -> SimulatedPoints:
+        return self.simulate(self.scorer.squad_matrix([squad["player_id"].to_list()]))
+
+
+def summarise(
+    simulated_points: SimulatedPoints, alpha: float = CVAR_ALPHA
+) -> pl.DataFrame:
+    """
+    A row per squad with the mean, standard deviation, some quantiles and the CVaR
+    at alpha of its points, and the mean points scored by its substitutes
+    """
+    points = simulated_points.points
+    quantiles = np.quantile(points, [0.1, 0.5, 0.9], axis=1)
+    return pl.DataFrame(
+        {
+            "mean": points.mean(axis=1),
+            "std": points.std(axis=1),
+            "p10": quantiles[0],
+            "median": quantiles[1],
+            "p90": quantiles[2],
+            "cvar": [conditional_value_at_risk(row, alpha) for row in points],
+            "bench_points": simulated_points.bench_points.mean(axis=1),
+        }
+    )
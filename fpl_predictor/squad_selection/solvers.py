@@ -0,0 +1,383 @@
+"""
+Solver backends for the squad selection MILPs. The scipy backend solves each problem
+from scratch, while the highspy backend keeps the model between solves.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+ConstraintBounds = tuple[np.ndarray | float, np.ndarray | float]
+
+# solve statuses, the same for every backend
+OPTIMAL = "optimal"
+LIMIT_REACHED = "limit_reached"  # stopped by a time or node limit
+INFEASIBLE = "infeasible"
+UNBOUNDED = "unbounded"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class SolveOptions:
+    """
+    Limits which trade optimality for latency. Those left as None keep the solver's
+    defaults, i.e. no time or node limit and a relative gap of 0.01%.
+    """
+
+    time_limit: float | None = None  # seconds
+    mip_rel_gap: float | None = None
+    node_limit: int | None = None
+
+
+class SolveResult(NamedTuple):
+    x: np.ndarray | None  # the incumbent, if a feasible solution was found
+    objective: float | None  # the incumbent's objective
+    bound: float | None  # the best bound on the optimal objective
+    status: str
+
+
+@dataclass
+class CompiledProblem:
+    """
+    The optimisation problem in the form that the solvers expect. The rows of every
+    constraint are stacked into a single matrix, and the rows belonging to each named
+    constraint are recorded so that their bounds can be updated in place. The first
+    variables are the player selections and any after them are auxiliary. Variables
+    are non-negative integers unless their lower bounds or integrality say otherwise.
+    Rows appended by add_constraint are kept aside until A is next read, so that the
+    matrix is stacked at most once per solve however many constraints were added.
+    """
+
+    c: np.ndarray
+    _A: sparse.csr_array
+    lb: np.ndarray
+    ub: np.ndarray
+    upper: np.ndarray  # upper bounds of the variables
+    rows: dict[str, slice]
+    lower: np.ndarray  # lower bounds of the variables
+    integrality: np.ndarray  # one for integer variables and zero for continuous
+    _appended: list[sparse.csr_array] = field(default_factory=list)
+
+    @classmethod
+    def from_constraints(
+        cls,
+        c: np.ndarray,
+        upper: np.ndarray,
+        constraint_matrices: dict[str, sparse.csr_array],
+        constraint_bounds: dict[str, ConstraintBounds],
+        lower: np.ndarray | None = None,
+        integrality: np.ndarray | None = None,
+    ) -> "CompiledProblem":
+        rows, start = {}, 0
+        matrices = []
+        for name, matrix in constraint_matrices.items():
+            rows[name] = slice(start, start + matrix.shape[0])
+            start += matrix.shape[0]
+            # constraints on the players only don't include the auxiliary columns
+            matrix = sparse.csr_array(matrix)
+            matrix.resize((matrix.shape[0], len(c)))
+            matrices.append(matrix)
+        problem = cls(
+            c=c.astype(np.float64),
+            _A=sparse.vstack(matrices, format="csr"),
+            lb=np.empty(start),
+            ub=np.empty(start),
+            upper=upper,
+            rows=rows,
+            lower=np.zeros(len(c)) if lower is None else lower,
+            integrality=np.ones(len(c)) if integrality is None else integrality,
+        )
+        for name, bounds in constraint_bounds.items():
+            problem.set_bounds(name, *bounds)
+        return problem
+
+    @property
+    def A(self) -> sparse.csr_array:
+        if self._appended:
+            self._A = sparse.vstack([self._A, *self._appended], format="csr")
+            self._appended = []
+        return self._A
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.lb)
+
+    def coefficients(self) -> np.ndarray:
+        """
+        A copy of the non-zero coefficients of A, row by row, without stacking the
+        appended rows
+        """
+        return np.concatenate(
+            [self._A.data, *(matrix.data for matrix in self._appended)]
+        )
+
+    def rows_from(self, start: int) -> sparse.csr_array:
+        """
+        The rows of A from start on. Only the appended rows are stacked if they're
+        all after start.
+        """
+        if start < self._A.shape[0]:
+            return self.A[start:]
+        matrices, offset = [], self._A.shape[0]
+        for matrix in self._appended:
+            if offset + matrix.shape[0] > start:
+                matrices.append(matrix[max(start - offset, 0) :])
+            offset += matrix.shape[0]
+        if not matrices:
+            return sparse.csr_array((0, len(self.c)))
+        return sparse.vstack(matrices, format="csr")
+
+    def set_bounds(
+        self, name: str, lb: np.ndarray | float, ub: np.ndarray | float
+    ) -> None:
+        self.lb[self.rows[name]] = lb
+        self.ub[self.rows[name]] = ub
+
+    def set_coefficients(self, name: str, matrix: sparse.csr_array) -> None:
+        """
+        Replaces the coefficients of a constraint in place. The non-zero entries must
+        stay in the same columns.
+        """
+        rows = self.rows[name]
+        matrix = sparse.csr_array(matrix)
+        matrix.resize((matrix.shape[0], len(self.c)))
+        start, stop = self.A.indptr[rows.start], self.A.indptr[rows.stop]
+        if not np.array_equal(
+            self.A.indptr[rows.start : rows.stop + 1] - start, matrix.indptr
+        ) or not np.array_equal(self.A.indices[start:stop], matrix.indices):
+            raise ValueError(f"The non-zero coefficients of {name} can't move")
+        self.A.data[start:stop] = matrix.data
+
+    def add_constraint(
+        self,
+        name: str,
+        matrix: sparse.csr_array,
+        lb: np.ndarray | float,
+        ub: np.ndarray | float,
+    ) -> None:
+        """
+        Appends the rows of a new constraint, leaving the existing rows unchanged
+        """
+        start = self.n_rows
+        matrix = sparse.csr_array(matrix)
+        matrix.resize((matrix.shape[0], len(self.c)))
+        self._appended.append(matrix)
+        self.lb = np.append(self.lb, np.broadcast_to(lb, matrix.shape[0]))
+        self.ub = np.append(self.ub, np.broadcast_to(ub, matrix.shape[0]))
+        self.rows[name] = slice(start, start + matrix.shape[0])
+
+    def constraint(self, name: str) -> LinearConstraint:
+        rows = self.rows[name]
+        return LinearConstraint(self.A[rows], self.lb[rows], self.ub[rows])
+
+
+class SolverBackend(ABC):
+    @abstractmethod
+    def run(
+        self, problem: CompiledProblem, options: SolveOptions = SolveOptions()
+    ) -> SolveResult:
+        """
+        Solves the problem within the options' limits and returns the incumbent, the
+        bound and the status rather than raising
+        """
+        pass
+
+    def solve(
+        self, problem: CompiledProblem, options: SolveOptions = SolveOptions()
+    ) -> np.ndarray:
+        """
+        Returns the values of the problem's variables in the incumbent, which is
+        optimal unless a limit was reached
+        """
+        result = self.run(problem, options)
+        assert result.x is not None, f"Optimisation failed: {result.status}"
+        return result.x
+
+
+SCIPY_STATUSES = {0: OPTIMAL, 1: LIMIT_REACHED, 2: INFEASIBLE, 3: UNBOUNDED}
+
+
+class ScipyBackend(SolverBackend):
+    def run(
+        self, problem: CompiledProblem, options: SolveOptions = SolveOptions()
+    ) -> SolveResult:
+        res = milp(
+            c=problem.c,
+            constraints=LinearConstraint(problem.A, problem.lb, problem.ub),
+            integrality=problem.integrality,
+            bounds=Bounds(problem.lower, problem.upper),
+            options={
+                name: value
+                for name, value in (
+                    ("time_limit", options.time_limit),
+                    ("mip_rel_gap", options.mip_rel_gap),
+                    ("node_limit", options.node_limit),
+                )
+                if value is not None
+            },
+        )
+        status = SCIPY_STATUSES.get(res.status, FAILED)
+        if status not in (OPTIMAL, LIMIT_REACHED) or res.x is None:
+            return SolveResult(None, None, None, status)
+        return SolveResult(
+            res.x, float(res.fun), getattr(res, "mip_dual_bound", None), status
+        )
+
+
+FEASIBLE_SOLUTION_STATUS = 2  # HiGHS's kSolutionStatusFeasible
+
+
+class HighspyBackend(SolverBackend):
+    """
+    Keeps a live HiGHS model of the last problem solved. Solving the same problem
+    again, e.g. after its bounds or objective have been updated in place, only passes
+    the changes to HiGHS and starts from the previous solution. Rows may be appended
+    to the constraint matrix and its coefficients changed, but the non-zero entries
+    of the existing rows are assumed not to move.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import highspy
+        except ImportError as e:  # pragma: no cover
+            raise ImportError(
+                "The highspy backend needs the highspy extra, "
+                "install it with `poetry install --extras highspy`"
+            ) from e
+
+        self._highspy = highspy
+        self._highs = highspy.Highs()
+        self._highs.setOptionValue("output_flag", False)
+        self._problem: CompiledProblem | None = None
+        # the state of the problem as last passed to HiGHS
+        self._c = self._lb = self._ub = self._lower = self._upper = np.empty(0)
+        self._coefficients = np.empty(0)
+        self._solution: Any = None
+
+    def _pass_model(self, problem: CompiledProblem) -> None:
+        lp = self._highspy.HighsLp()
+        lp.num_col_, lp.num_row_ = len(problem.c), problem.A.shape[0]
+        lp.col_cost_ = problem.c
+        lp.col_lower_ = problem.lower
+        lp.col_upper_ = problem.upper
+        lp.row_lower_ = problem.lb
+        lp.row_upper_ = problem.ub
+        lp.a_matrix_.format_ = self._highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = problem.A.indptr
+        lp.a_matrix_.index_ = problem.A.indices
+        lp.a_matrix_.value_ = problem.A.data
+        lp.integrality_ = [
+            (
+                self._highspy.HighsVarType.kInteger
+                if integer
+                else self._highspy.HighsVarType.kContinuous
+            )
+            for integer in problem.integrality
+        ]
+        self._highs.passModel(lp)
+        self._problem = problem
+        self._solution = None
+
+    def _update_model(self, problem: CompiledProblem, coefficients: np.ndarray) -> None:
+        cols = np.flatnonzero(problem.c != self._c)
+        if len(cols):
+            self._highs.changeColsCost(len(cols), cols, problem.c[cols])
+        cols = np.flatnonzero(
+            (problem.lower != self._lower) | (problem.upper != self._upper)
+        )
+        if len(cols):
+            self._highs.changeColsBounds(
+                len(cols), cols, problem.lower[cols], problem.upper[cols]
+            )
+        changed = np.flatnonzero(
+            coefficients[: len(self._coefficients)] != self._coefficients
+        )
+        if len(changed):
+            # coefficients are only changed in place, once the rows are stacked
+            A = problem.A
+            rows = np.searchsorted(A.indptr, changed, side="right") - 1
+            for row, i in zip(rows, changed):
+                self._highs.changeCoeff(row, A.indices[i], A.data[i])
+        n_rows = len(self._lb)
+        rows = np.flatnonzero(
+            (problem.lb[:n_rows] != self._lb) | (problem.ub[:n_rows] != self._ub)
+        )
+        if len(rows):
+            self._highs.changeRowsBounds(  # type: ignore[attr-defined]
+                len(rows), rows, problem.lb[rows], problem.ub[rows]
+            )
+        if problem.n_rows > n_rows:
+            # the new rows are passed on without stacking them into A
+            new_rows = problem.rows_from(n_rows)
+            self._highs.addRows(
+                new_rows.shape[0],
+                problem.lb[n_rows:],
+                problem.ub[n_rows:],
+                new_rows.nnz,
+                new_rows.indptr[:-1],
+                new_rows.indices,
+                new_rows.data,
+            )
+
+    def _status(self, model_status: Any) -> str:
+        statuses = self._highspy.HighsModelStatus
+        if model_status == statuses.kOptimal:
+            return OPTIMAL
+        if model_status in (
+            statuses.kTimeLimit,
+            statuses.kIterationLimit,
+            statuses.kSolutionLimit,
+            statuses.kInterrupt,
+        ):
+            return LIMIT_REACHED
+        if model_status == statuses.kInfeasible:
+            return INFEASIBLE
+        if model_status == statuses.kUnbounded:
+            return UNBOUNDED
+        return FAILED
+
+    def run(
+        self, problem: CompiledProblem, options: SolveOptions = SolveOptions()
+    ) -> SolveResult:
+        coefficients = problem.coefficients()
+        if problem is self._problem:
+            self._update_model(problem, coefficients)
+            if self._solution is not None:
+                self._highs.setSolution(self._solution)
+        else:
+            self._pass_model(problem)
+        self._c, self._lb, self._ub, self._lower, self._upper = (
+            problem.c.copy(),
+            problem.lb.copy(),
+            problem.ub.copy(),
+            problem.lower.copy(),
+            problem.upper.copy(),
+        )
+        self._coefficients = coefficients
+
+        self._highs.resetOptions()
+        self._highs.setOptionValue("output_flag", False)
+        for name, value in (
+            ("time_limit", options.time_limit),
+            ("mip_rel_gap", options.mip_rel_gap),
+            ("mip_max_nodes", options.node_limit),
+        ):
+            if value is not None:
+                self._highs.setOptionValue(name, value)
+
+        self._highs.run()
+        status = self._status(self._highs.getModelStatus())
+        info = self._highs.getInfo()
+        if info.primal_solution_status != FEASIBLE_SOLUTION_STATUS:
+            return SolveResult(None, None, None, status)
+        self._solution = self._highs.getSolution()
+        return SolveResult(
+            np.array(self._solution.col_value),
+            info.objective_function_value,
+            info.mip_dual_bound,
+            status,
+        )
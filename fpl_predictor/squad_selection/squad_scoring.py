@@ -0,0 +1,139 @@
+"""
+Scores many squads at once. Squads are rows of a matrix over an index of players, so
+the starting team, captain and transfer hits of every squad come from array
+operations rather than a DataFrame per squad.
+"""
+
+from typing import NamedTuple, Sequence
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import TRANSFER_HIT_COST, _encode
+from fpl_predictor.squad_selection.starting_team import best_starting_teams
+
+
+class SquadScores(NamedTuple):
+    starting: np.ndarray  # a mask of the starters in each squad
+    captain: np.ndarray  # the index of each squad's captain
+    vice_captain: np.ndarray  # the index of each squad's vice captain
+    points: np.ndarray  # predicted points of each squad, net of any hits
+
+
+class SquadScorer:
+    """
+    Scores squads of the players in player_data, indexed by their rows. A squad's
+    points are its starters' points, doubled for the captain, less TRANSFER_HIT_COST
+    for each transfer beyond n_free_transfers. Transfers are counted against
+    current_squad if it is given.
+    """
+
+    def __init__(
+        self,
+        player_data: pl.DataFrame,
+        current_squad: pl.DataFrame | None = None,
+        n_free_transfers: int = 1,
+    ):
+        self.player_ids = player_data["player_id"].to_numpy()
+        self.n_free_transfers = n_free_transfers
+        self._points = player_data["gameweek_points"].to_numpy().astype(np.float64)
+        self._positions, self._position_codes = _encode(player_data["position"])
+        # players in position order, so that the members of squads with the same
+        # number of players in each position line up
+        self._by_position = np.argsort(self._position_codes, kind="stable")
+        self._in_current_squad = (
+            None
+            if current_squad is None
+            else player_data["player_id"].is_in(current_squad["player_id"]).to_numpy()
+        )
+
+    @property
+    def n_players(self) -> int:
+        return len(self.player_ids)
+
+    def squad_matrix(self, squads: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        A mask with a row for each squad, given by its player ids
+        """
+        matrix = np.zeros((len(squads), self.n_players), dtype=bool)
+        index = dict(zip(self.player_ids.tolist(), range(self.n_players)))
+        for row, player_ids in enumerate(squads):
+            matrix[row, [index[player_id] for player_id in player_ids]] = True
+        return matrix
+
+    def best_starting_teams(self, squads: np.ndarray) -> np.ndarray:
+        """
+        A mask of the best starting team in each squad. Squads with the same number of
+        players in each position are solved together.
+        """
+        squads = np.atleast_2d(np.asarray(squads, dtype=bool))
+        position_counts = (
+            squads @ np.eye(len(self._positions), dtype=np.int64)[self._position_codes]
+        )
+        starting = np.zeros(squads.shape, dtype=bool)
+        counts, groups = np.unique(position_counts, axis=0, return_inverse=True)
+        for group, group_counts in enumerate(counts):
+            rows = np.flatnonzero(groups.ravel() == group)
+            members = self._by_position[
+                np.nonzero(squads[rows][:, self._by_position])[1].reshape(len(rows), -1)
+            ]
+            group_starting, _ = best_starting_teams(
+                self._points[members], np.repeat(self._positions, group_counts).tolist()
+            )
+            starting[rows[:, np.newaxis], members] = group_starting
+        return starting
+
+    def hits(
+        self, squads: np.ndarray, n_transfers: np.ndarray | int | None = None
+    ) -> np.ndarray:
+        """
+        The points lost to transfers by each squad, with n_transfers as in score
+        """
+        squads = np.atleast_2d(np.asarray(squads, dtype=bool))
+        if n_transfers is None:
+            if self._in_current_squad is None:
+                return np.zeros(squads.shape[0])
+            n_transfers = (squads & ~self._in_current_squad).sum(axis=1)
+        return TRANSFER_HIT_COST * np.maximum(
+            np.broadcast_to(n_transfers, squads.shape[:1]) - self.n_free_transfers, 0
+        )
+
+    def score(
+        self,
+        squads: np.ndarray,
+        starting: np.ndarray | None = None,
+        n_transfers: np.ndarray | int | None = None,
+    ) -> SquadScores:
+        """
+        squads has a row per squad and a column per player, true for the players in
+        the squad. The best starting teams are picked unless starting gives them in
+        the same form. n_transfers defaults to the number of players in each squad who
+        aren't in current_squad, or no transfers without one. The captain is the top
+        scoring starter and the vice captain the next, or the top scoring substitute
+        if only one player starts.
+        """
+        squads = np.atleast_2d(np.asarray(squads, dtype=bool))
+        if starting is None:
+            starting = self.best_starting_teams(squads)
+        starting = np.atleast_2d(np.asarray(starting, dtype=bool)) & squads
+
+        # starters rank above every substitute, and players outside the squad below
+        # both
+        spread = self._points.max() - self._points.min() + 1 if self.n_players else 0
+        rank = np.where(
+            squads,
+            np.where(starting, self._points, self._points - spread),
+            -np.inf,
+        )
+        top_two = np.argpartition(-rank, 1, axis=1)[:, :2]
+        top_two = np.take_along_axis(
+            top_two, np.argsort(-np.take_along_axis(rank, top_two, axis=1)), axis=1
+        )
+        captain, vice_captain = top_two[:, 0], top_two[:, 1]
+
+        points = (
+            starting @ self._points
+            + self._points[captain]
+            - self.hits(squads, n_transfers)
+        )
+        return SquadScores(starting, captain, vice_captain, points)
@@ -1,18 +1,27 @@
 from functools import cache
 
+import numpy as np
 import polars as pl
 
 from fpl_predictor.player_stats import get_player_data
 from fpl_predictor.settings import N_WORST_TEAMS, SQUAD_SELECTION_METHOD
 from fpl_predictor.squad_selection.linear_optimisation import (
+    JointSquadOptimiser,
     PSCPSquadOptimiser,
     SquadOptimiser,
-    StartingTeamOptimiser,
 )
 from fpl_predictor.squad_selection.player_availability import get_unavailable_players
 from fpl_predictor.squad_selection.player_gw_score_prediction import (
     SCORE_PREDICTOR_FACTORY,
 )
+from fpl_predictor.squad_selection.solvers import SolveOptions
+from fpl_predictor.squad_selection.squad_scoring import SquadScorer
+from fpl_predictor.squad_selection.starting_team import select_starting_team
+from fpl_predictor.squad_selection.transfer_evaluator import (
+    MAX_TRANSFERS,
+    apply_transfers,
+    evaluate_transfers,
+)
 
 
 @cache
@@ -43,95 +52,132 @@ def annotate_squad_and_compute_points(
     n_transfers: int | None,
     n_free_transfers: int,
 ) -> tuple[pl.DataFrame, int]:
-    starting_team = starting_team.with_columns(pl.lit(True).alias("starting")).select(
-        pl.col("player_id"), pl.col("starting")
+    scores = SquadScorer(squad, n_free_transfers=n_free_transfers).score(
+        np.ones((1, squad.shape[0]), dtype=bool),
+        squad["player_id"].is_in(starting_team["player_id"]).to_numpy(),
+        n_transfers,
     )
-    squad = squad.join(
-        starting_team, on="player_id", how="left", coalesce=True
-    ).fill_null(False)
-    squad = squad.sort(["starting", "gameweek_points"], descending=[True, True])
+    player_annotation = np.full(squad.shape[0], "", dtype=object)
+    player_annotation[scores.captain[0]] = "captain"
+    player_annotation[scores.vice_captain[0]] = "vice_captain"
     squad = squad.with_columns(
-        pl.Series(
-            name="player_annotation",
-            values=["captain", "vice_captain"] + [""] * (len(squad) - 2),
-        )
-    )
-
-    # captain's points are doubled
-    total_points = (
-        squad.filter(squad["starting"])["gameweek_points"].sum()
-        + squad["gameweek_points"][0]
-    )
-    if n_transfers is not None and n_transfers > n_free_transfers:
-        total_points -= (
-            n_transfers - n_free_transfers
-        ) * 4  # -4 points for each transfer which isn't a free transfer
+        pl.Series("starting", scores.starting[0]),
+        pl.Series("player_annotation", player_annotation, dtype=pl.Utf8),
+    ).sort(["starting", "gameweek_points"], descending=[True, True])
+    return squad, scores.points[0].item()
 
-    return squad, total_points
 
-
-def _squad_and_predicted_score(
-    gameweek: int,
+def select_squad_from_player_data(
+    player_data: pl.DataFrame,
     current_squad: pl.DataFrame | None = None,
     n_transfers: int | None = None,
     n_free_transfers: int = 1,
-    prediction_method: str = "median_past_score",
-    **kwargs,
+    solve_options: SolveOptions = SolveOptions(),
+    squad_selection_method: str | None = None,
 ) -> tuple[pl.DataFrame, int]:
-    player_data = _get_player_data(gameweek, prediction_method, **kwargs)
+    """
+    With a current squad the number of transfers is chosen by the optimiser, up to
+    n_transfers if it is given, and the transfer evaluator makes no more than
+    MAX_TRANSFERS. solve_options can stop the optimiser early, in which case the best
+    squad found so far is used. squad_selection_method defaults to
+    SQUAD_SELECTION_METHOD.
+    """
+    if squad_selection_method is None:
+        squad_selection_method = SQUAD_SELECTION_METHOD
+    optimised_free_transfers = n_free_transfers if current_squad is not None else None
 
-    if SQUAD_SELECTION_METHOD == "preselect_cheapest_players":
+    starting_team = None
+    if squad_selection_method == "joint":
+        joint_optimiser = JointSquadOptimiser(
+            player_data,
+            current_squad=current_squad,
+            n_substitutions=n_transfers,
+            n_free_transfers=optimised_free_transfers,
+            solve_options=solve_options,
+        )
+        squad, starting_team, _ = joint_optimiser.optimise_selection()
+    elif squad_selection_method == "preselect_cheapest_players":
         points_per_team = player_data.group_by("team_id").agg(
             pl.col("gameweek_points").sum()
         )
         worst_teams = points_per_team.sort("gameweek_points").head(N_WORST_TEAMS)[
             "team_id"
         ]
-        squad = PSCPSquadOptimiser(
+        optimiser: SquadOptimiser = PSCPSquadOptimiser(
             player_data,
             teams_to_exclude_from_preselection=tuple(worst_teams),
             current_squad=current_squad,
             n_substitutions=n_transfers,
-        ).optimise()
-    elif SQUAD_SELECTION_METHOD == "naive":
-        squad = SquadOptimiser(
-            player_data, current_squad=current_squad, n_substitutions=n_transfers
-        ).optimise()
+            n_free_transfers=optimised_free_transfers,
+            solve_options=solve_options,
+        )
+        squad = optimiser.optimise()
+    elif squad_selection_method == "naive":
+        optimiser = SquadOptimiser(
+            player_data,
+            current_squad=current_squad,
+            n_substitutions=n_transfers,
+            n_free_transfers=optimised_free_transfers,
+            solve_options=solve_options,
+        )
+        squad = optimiser.optimise()
+    elif squad_selection_method == "transfer_evaluator":
+        if current_squad is None:
+            raise ValueError("The transfer_evaluator method needs a current squad")
+        best_transfers = evaluate_transfers(
+            player_data,
+            current_squad,
+            n_free_transfers,
+            MAX_TRANSFERS if n_transfers is None else min(n_transfers, MAX_TRANSFERS),
+            k=1,
+        ).row(0, named=True)
+        squad = apply_transfers(
+            player_data,
+            current_squad,
+            best_transfers["transfers_out"],
+            best_transfers["transfers_in"],
+        )
     else:
         raise ValueError(f"Invalid squad selection method")
 
-    starting_team = StartingTeamOptimiser(squad).optimise()
+    if current_squad is not None:
+        n_transfers = int((~squad["player_id"].is_in(current_squad["player_id"])).sum())
+    if starting_team is None:
+        starting_team = select_starting_team(squad)
     return annotate_squad_and_compute_points(
         squad, starting_team, n_transfers, n_free_transfers
     )
 
 
+def _squad_and_predicted_score(
+    gameweek: int,
+    current_squad: pl.DataFrame | None = None,
+    n_transfers: int | None = None,
+    n_free_transfers: int = 1,
+    prediction_method: str = "median_past_score",
+    solve_options: SolveOptions = SolveOptions(),
+    **kwargs,
+) -> tuple[pl.DataFrame, int]:
+    player_data = _get_player_data(gameweek, prediction_method, **kwargs)
+    return select_squad_from_player_data(
+        player_data, current_squad, n_transfers, n_free_transfers, solve_options
+    )
+
+
 def select_squad(
     gameweek: int,
     *,
     current_squad: pl.DataFrame | None = None,
     n_free_transfers: int = 1,
     prediction_method: str = "median_past_score",
+    solve_options: SolveOptions = SolveOptions(),
     **kwargs,
 ) -> tuple[pl.DataFrame, int]:
-    if current_squad is None:
-        return _squad_and_predicted_score(
-            gameweek, prediction_method=prediction_method, **kwargs
-        )
-
-    predicted_points_and_squad = {
-        points: squad
-        for squad, points in (
-            _squad_and_predicted_score(
-                gameweek,
-                current_squad,
-                n,
-                n_free_transfers,
-                prediction_method=prediction_method,
-                **kwargs,
-            )
-            for n in range(1, 15)
-        )
-    }
-    max_points = max(predicted_points_and_squad)
-    return predicted_points_and_squad[max_points], max_points
+    return _squad_and_predicted_score(
+        gameweek,
+        current_squad,
+        n_free_transfers=n_free_transfers,
+        prediction_method=prediction_method,
+        solve_options=solve_options,
+        **kwargs,
+    )
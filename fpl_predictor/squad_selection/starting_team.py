@@ -0,0 +1,101 @@
+"""
+Picks the starting team from a squad exactly without a MILP. The best team for a
+formation is the highest scorers in each position, so it is enough to try every
+formation the position rules allow.
+"""
+
+import itertools
+from typing import Sequence
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    N_SELECTIONS,
+    N_STARTING_SELECTIONS,
+    STARTING_POSITION_MAX_SELECTIONS,
+    STARTING_POSITION_MIN_SELECTIONS,
+    StartingTeamOptimiser,
+)
+
+POSITIONS = tuple(STARTING_POSITION_MIN_SELECTIONS)
+
+
+def formations(position_counts: dict[str, int] | None = None) -> list[dict[str, int]]:
+    """
+    The numbers of starters in each position which meet the starting position rules,
+    optionally limited to the players available in each position
+    """
+    ranges = []
+    for position in POSITIONS:
+        max_selections = STARTING_POSITION_MAX_SELECTIONS[position]
+        if position_counts is not None:
+            max_selections = min(max_selections, position_counts.get(position, 0))
+        ranges.append(
+            range(STARTING_POSITION_MIN_SELECTIONS[position], max_selections + 1)
+        )
+    return [
+        dict(zip(POSITIONS, counts))
+        for counts in itertools.product(*ranges)
+        if sum(counts) == N_STARTING_SELECTIONS
+    ]
+
+
+def best_starting_teams(
+    gameweek_points: np.ndarray, positions: Sequence[str]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    gameweek_points has a row per squad and a column per player, the players in each
+    column playing the given position in every squad. Returns a mask of the starters
+    in each squad and their total points. Each formation's score is read off
+    cumulative sums of each position's points sorted in descending order.
+    """
+    gameweek_points = np.atleast_2d(np.asarray(gameweek_points, dtype=np.float64))
+    position_array = np.asarray(positions)
+    n_squads = gameweek_points.shape[0]
+    position_columns = {pos: np.flatnonzero(position_array == pos) for pos in POSITIONS}
+    candidate_formations = formations(
+        {pos: len(columns) for pos, columns in position_columns.items()}
+    )
+    if not candidate_formations:
+        raise ValueError("The squad can't field a legal starting team")
+
+    scores = np.zeros((n_squads, len(candidate_formations)))
+    rankings = {}
+    for pos, columns in position_columns.items():
+        # columns of the position's players from the highest scorer down
+        ranking = columns[np.argsort(-gameweek_points[:, columns], axis=1)]
+        rankings[pos] = ranking
+        cumulative_points = np.zeros((n_squads, len(columns) + 1))
+        np.cumsum(
+            np.take_along_axis(gameweek_points, ranking, axis=1),
+            axis=1,
+            out=cumulative_points[:, 1:],
+        )
+        n_starters = np.array([formation[pos] for formation in candidate_formations])
+        scores += cumulative_points[:, n_starters]
+
+    best = np.argmax(scores, axis=1)
+    starting = np.zeros(gameweek_points.shape, dtype=bool)
+    for i, formation in enumerate(candidate_formations):
+        squads = np.flatnonzero(best == i)
+        for pos, ranking in rankings.items():
+            starters = ranking[squads, : formation[pos]]
+            starting[squads[:, np.newaxis], starters] = True
+    return starting, scores[np.arange(n_squads), best]
+
+
+def select_starting_team(squad: pl.DataFrame) -> pl.DataFrame:
+    """
+    The best starting team from a squad, like StartingTeamOptimiser. A full squad is
+    solved by trying each formation, and anything else falls back to the MILP.
+    """
+    if squad.shape[0] != N_SELECTIONS:
+        return StartingTeamOptimiser(squad).optimise()
+    try:
+        starting, _ = best_starting_teams(
+            squad["gameweek_points"].to_numpy(), squad["position"].to_list()
+        )
+    except ValueError:
+        return StartingTeamOptimiser(squad).optimise()
+    return squad.filter(starting[0])
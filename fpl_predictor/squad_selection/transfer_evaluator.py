@@ -0,0 +1,446 @@
+"""
+Ranks every way of making up to two transfers to the current squad, without a MILP.
+The transfers are enumerated as arrays of the squad's slots going out and the
+candidates coming in, and the squads that result are scored all at once.
+"""
+
+import itertools
+from typing import Final
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    MAX_PLAYERS_PER_TEAM,
+    N_SELECTIONS,
+    TOTAL_COST,
+    TRANSFER_HIT_COST,
+    _encode,
+)
+from fpl_predictor.squad_selection.presolve import undominated_players
+from fpl_predictor.squad_selection.starting_team import POSITIONS, formations
+
+MAX_TRANSFERS: Final[int] = 2
+N_TOP_TRANSFERS: Final[int] = 10
+_TOLERANCE: Final[float] = 1e-9
+
+
+def _top_sums(points: np.ndarray, size: int) -> np.ndarray:
+    """
+    The sums of the n highest points for n from 0 to size, which are -inf for more
+    players than there are
+    """
+    sums = np.full(size + 1, -np.inf)
+    sums[0] = 0
+    sums[1 : len(points) + 1] = np.cumsum(np.sort(points)[::-1])
+    return sums
+
+
+class _TransferScorer:
+    """
+    Scores the squads left by transfers from a squad: the best starting team's points
+    with the captain's doubled. Every formation starts someone in each position, so
+    the top scorer always starts and is the captain. A formation's points are the
+    sums of the top scorers in each position, and a transfer only changes the sums in
+    the positions it touches. Those are found from the sums of the players who stay,
+    as a player coming in either is among the top n or isn't.
+    """
+
+    def __init__(self, squad_points: np.ndarray, squad_position: np.ndarray) -> None:
+        n_players = len(squad_points)
+        position_slots = {
+            pos: np.flatnonzero(squad_position == pos) for pos in POSITIONS
+        }
+        squad_formations = formations(
+            {pos: len(slots) for pos, slots in position_slots.items()}
+        )
+        if not squad_formations:
+            raise ValueError("The squad can't field a legal starting team")
+        self.formation_counts = {
+            pos: np.array([formation[pos] for formation in squad_formations])
+            for pos in POSITIONS
+        }
+        # indexed by the one or two slots going out, which are the same for one
+        self.best_points_without = np.full((n_players, n_players), -np.inf)
+        self.top_sums = {}
+        self.top_sums_without = {}
+        for pos, slots in position_slots.items():
+            self.top_sums[pos] = _top_sums(squad_points[slots], len(slots))
+            self.top_sums_without[pos] = np.full(
+                (n_players, n_players, len(slots) + 1), -np.inf
+            )
+        for a, b in itertools.combinations_with_replacement(range(n_players), 2):
+            staying = np.ones(n_players, dtype=bool)
+            staying[[a, b]] = False
+            self.best_points_without[a, b] = self.best_points_without[b, a] = (
+                squad_points[staying].max()
+            )
+            pos = squad_position[a]
+            if squad_position[b] == pos:
+                top_sums = _top_sums(
+                    squad_points[staying & (squad_position == pos)],
+                    len(position_slots[pos]),
+                )
+                self.top_sums_without[pos][a, b] = top_sums
+                self.top_sums_without[pos][b, a] = top_sums
+        self.best_points = squad_points.max()
+
+    def _position_top_sums(
+        self, pos: str, slots: np.ndarray, points_in: np.ndarray
+    ) -> np.ndarray:
+        """
+        The sums of the top scorers in a position after its one or two slots in each
+        row are replaced by the players coming in
+        """
+        top_sums = self.top_sums_without[pos][slots[:, 0], slots[:, -1]]
+        result = top_sums.copy()
+        best_in = points_in[:, 0]
+        if points_in.shape[1] == 2:
+            best_in = np.maximum(points_in[:, 0], points_in[:, 1])
+            np.maximum(
+                result[:, 2:],
+                top_sums[:, :-2] + (points_in[:, 0] + points_in[:, 1])[:, np.newaxis],
+                out=result[:, 2:],
+            )
+        np.maximum(
+            result[:, 1:], top_sums[:, :-1] + best_in[:, np.newaxis], out=result[:, 1:]
+        )
+        return result
+
+    def score(
+        self, slots: np.ndarray, points_in: np.ndarray, positions: tuple[str, ...]
+    ) -> np.ndarray:
+        """
+        slots has a row per squad of the slots going out, which play the given
+        positions, and points_in the points of the players coming in to them
+        """
+        formation_points = sum(
+            self.top_sums[pos][self.formation_counts[pos]]
+            for pos in POSITIONS
+            if pos not in positions
+        )
+        for pos in set(positions):
+            columns = [i for i, slot_pos in enumerate(positions) if slot_pos == pos]
+            top_sums = self._position_top_sums(
+                pos, slots[:, columns], points_in[:, columns]
+            )
+            formation_points = (
+                formation_points + top_sums[:, self.formation_counts[pos]]
+            )
+
+        # the best player who stays, or the best coming in
+        if not positions:
+            captain_points = np.full(len(slots), self.best_points)
+        else:
+            captain_points = self.best_points_without[slots[:, 0], slots[:, -1]]
+            for points in points_in.T:
+                captain_points = np.maximum(captain_points, points)
+        return np.max(np.atleast_2d(formation_points), axis=1) + captain_points
+
+
+def _current_squad_data(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> pl.DataFrame:
+    """
+    The current squad at the players' current costs and predicted points. Players
+    missing from player_data, e.g. those unavailable, keep the cost they have in
+    current_squad and are predicted no points.
+    """
+    return (
+        current_squad.select("player_id", "team_id", "position", "cost")
+        .join(
+            player_data.select("player_id", "cost", "gameweek_points"),
+            on="player_id",
+            how="left",
+            coalesce=True,
+        )
+        .select(
+            "player_id",
+            "team_id",
+            "position",
+            pl.coalesce("cost_right", "cost").alias("cost"),
+            pl.col("gameweek_points").fill_null(0).cast(pl.Float64),
+        )
+    )
+
+
+def apply_transfers(
+    player_data: pl.DataFrame,
+    current_squad: pl.DataFrame,
+    transfers_out: list[int],
+    transfers_in: list[int],
+) -> pl.DataFrame:
+    """
+    The squad after the transfers, with the players' current costs and predicted
+    points
+    """
+    return pl.concat(
+        [
+            _current_squad_data(player_data, current_squad).filter(
+                ~pl.col("player_id").is_in(transfers_out)
+            ),
+            player_data.filter(pl.col("player_id").is_in(transfers_in)).select(
+                "player_id",
+                "team_id",
+                "position",
+                "cost",
+                pl.col("gameweek_points").cast(pl.Float64),
+            ),
+        ]
+    )
+
+
+def _candidates(
+    player_data: pl.DataFrame, squad: pl.DataFrame, max_transfers: int
+) -> pl.DataFrame:
+    """
+    The players who could be brought in. A player can be left out when, whoever else
+    is brought in, a player who costs no more and predicts at least as many points
+    would still be free to take their place, as that swap can't lower the best
+    starting team's points or the captain's.
+    """
+    others = player_data.filter(~pl.col("player_id").is_in(squad["player_id"]))
+    positions, position_codes = _encode(others["position"])
+    keep = undominated_players(
+        others["gameweek_points"].to_numpy(),
+        others["cost"].to_numpy(),
+        position_codes,
+        np.full(len(positions), max_transfers),
+        N_SELECTIONS,
+        _encode(others["team_id"])[1],
+        MAX_PLAYERS_PER_TEAM,
+    )
+    return others.filter(keep)
+
+
+def _single_transfers(
+    squad_position: np.ndarray,
+    squad_cost: np.ndarray,
+    squad_team: np.ndarray,
+    position_in: np.ndarray,
+    cost_in: np.ndarray,
+    team_in: np.ndarray,
+    team_counts: np.ndarray,
+    slack: float,
+) -> list[tuple[tuple[str, ...], np.ndarray, np.ndarray]]:
+    """
+    The positions, slots and candidates of the single transfers in each position
+    """
+    transfers: list[tuple[tuple[str, ...], np.ndarray, np.ndarray]] = []
+    for pos in POSITIONS:
+        slots = np.flatnonzero(squad_position == pos)
+        j = np.flatnonzero(position_in == pos)
+        out, in_ = np.nonzero(
+            (cost_in[j] - squad_cost[slots][:, np.newaxis] <= slack)
+            & (
+                team_counts[team_in[j]]
+                + 1
+                - (squad_team[slots][:, np.newaxis] == team_in[j])
+                <= MAX_PLAYERS_PER_TEAM
+            )
+        )
+        transfers.append(((pos,), slots[out][:, np.newaxis], j[in_][:, np.newaxis]))
+    return transfers
+
+
+def _double_transfers(
+    squad_position: np.ndarray,
+    squad_cost: np.ndarray,
+    squad_team: np.ndarray,
+    position_in: np.ndarray,
+    cost_in: np.ndarray,
+    team_in: np.ndarray,
+    team_counts: np.ndarray,
+    slack: float,
+    squad_points: np.ndarray,
+    points_in: np.ndarray,
+    single_transfer_points: np.ndarray,
+    min_points: float,
+) -> list[tuple[tuple[str, ...], np.ndarray, np.ndarray]]:
+    """
+    The positions, pairs of slots and pairs of candidates of the double transfers for
+    each pair of positions, evaluated for every pair leaving the positions at once.
+    single_transfer_points are the points after transferring each slot for each
+    candidate, whether or not the squad could afford it. Swapping one player for
+    another can then gain no more than twice the difference in their points, once in
+    the starting team and once for the captain, so pairs which can't reach
+    min_points are left out.
+    """
+    out_pairs = np.array(list(itertools.combinations(range(len(squad_position)), 2)))
+    out_pairs = np.take_along_axis(
+        out_pairs, np.argsort(squad_position[out_pairs], axis=1), axis=1
+    )
+    out_positions = squad_position[out_pairs]
+    transfers: list[tuple[tuple[str, ...], np.ndarray, np.ndarray]] = []
+    for first, second in sorted({tuple(positions) for positions in out_positions}):
+        pairs = out_pairs[
+            (out_positions[:, 0] == first) & (out_positions[:, 1] == second)
+        ]
+        a, b = pairs[:, 0], pairs[:, 1]
+        j = np.flatnonzero(position_in == first)
+        k = np.flatnonzero(position_in == second)
+
+        # players each team would have without the pair leaving
+        j_count = team_counts[team_in[j]] - (
+            (team_in[j] == squad_team[a][:, np.newaxis]).astype(int)
+            + (team_in[j] == squad_team[b][:, np.newaxis])
+        )
+        k_count = team_counts[team_in[k]] - (
+            (team_in[k] == squad_team[a][:, np.newaxis]).astype(int)
+            + (team_in[k] == squad_team[b][:, np.newaxis])
+        )
+        same_team = team_in[j][:, np.newaxis] == team_in[k]
+        valid = (
+            (j_count[:, :, np.newaxis] + 1 + same_team <= MAX_PLAYERS_PER_TEAM)
+            & (k_count[:, np.newaxis, :] + 1 + same_team <= MAX_PLAYERS_PER_TEAM)
+            & (
+                cost_in[j][:, np.newaxis] + cost_in[k]
+                <= (slack + squad_cost[a] + squad_cost[b])[:, np.newaxis, np.newaxis]
+            )
+        )
+        j_gain = 2 * np.maximum(points_in[j] - squad_points[a][:, np.newaxis], 0)
+        k_gain = 2 * np.maximum(points_in[k] - squad_points[b][:, np.newaxis], 0)
+        j_points = single_transfer_points[a[:, np.newaxis], j]
+        k_points = single_transfer_points[b[:, np.newaxis], k]
+        valid &= (
+            np.minimum(
+                j_points[:, :, np.newaxis] + k_gain[:, np.newaxis, :],
+                k_points[:, np.newaxis, :] + j_gain[:, :, np.newaxis],
+            )
+            >= min_points - _TOLERANCE
+        )
+        if first == second:
+            valid &= j[:, np.newaxis] < k
+        pair, j_index, k_index = np.nonzero(valid)
+        transfers.append(
+            (
+                (first, second),
+                pairs[pair],
+                np.stack([j[j_index], k[k_index]], axis=1),
+            )
+        )
+    return transfers
+
+
+def evaluate_transfers(
+    player_data: pl.DataFrame,
+    current_squad: pl.DataFrame,
+    n_free_transfers: int = 1,
+    max_transfers: int = MAX_TRANSFERS,
+    total_cost: float = TOTAL_COST,
+    k: int = N_TOP_TRANSFERS,
+) -> pl.DataFrame:
+    """
+    Returns the k best ways to make up to max_transfers transfers, including making
+    none, best first. Each is scored by its best starting team's predicted points
+    with the captain's doubled, less TRANSFER_HIT_COST for each transfer beyond the
+    free ones, and has the ids of the players transferred out and in and the squad's
+    cost. The squad after the transfers must keep to the budget, position and team
+    rules. Two transfers are only ranked if they score more than either one alone.
+    """
+    if not 0 <= max_transfers <= MAX_TRANSFERS:
+        raise ValueError(f"max_transfers must be between 0 and {MAX_TRANSFERS}")
+    if current_squad.shape[0] != N_SELECTIONS:
+        raise ValueError(f"The current squad must have {N_SELECTIONS} players")
+
+    squad = _current_squad_data(player_data, current_squad)
+    candidates = _candidates(player_data, squad, max_transfers)
+    squad_points = squad["gameweek_points"].to_numpy()
+    squad_cost = squad["cost"].to_numpy().astype(np.float64)
+    squad_position = squad["position"].to_numpy()
+    points_in = candidates["gameweek_points"].to_numpy().astype(np.float64)
+    cost_in = candidates["cost"].to_numpy().astype(np.float64)
+    _, team_codes = _encode(pl.concat([squad["team_id"], candidates["team_id"]]))
+    squad_team, team_in = team_codes[:N_SELECTIONS], team_codes[N_SELECTIONS:]
+    arrays = (
+        squad_position,
+        squad_cost,
+        squad_team,
+        candidates["position"].to_numpy(),
+        cost_in,
+        team_in,
+        np.bincount(squad_team, minlength=team_codes.max() + 1),
+        total_cost - squad_cost.sum() + _TOLERANCE,
+    )
+    scorer = _TransferScorer(squad_points, squad_position)
+
+    def hits(n_transfers: int) -> int:
+        return TRANSFER_HIT_COST * max(n_transfers - n_free_transfers, 0)
+
+    no_transfers = np.empty((1, 0), dtype=np.intp)
+    transfers = []
+    if squad_cost.sum() <= total_cost + _TOLERANCE:
+        transfers.append(
+            (
+                no_transfers,
+                no_transfers,
+                scorer.score(no_transfers, np.empty((1, 0)), ()),
+            )
+        )
+    # the score of a single transfer of each slot for each candidate
+    single_scores = np.full((N_SELECTIONS, len(candidates)), -np.inf)
+    if max_transfers >= 1:
+        for positions, slots, in_ in _single_transfers(*arrays):
+            scores = scorer.score(slots, points_in[in_], positions) - hits(1)
+            single_scores[slots[:, 0], in_[:, 0]] = scores
+            transfers.append((slots, in_, scores))
+    if max_transfers >= 2:
+        single_transfer_points = np.full((N_SELECTIONS, len(candidates)), -np.inf)
+        for pos in POSITIONS:
+            slots, in_ = np.meshgrid(
+                np.flatnonzero(squad_position == pos),
+                np.flatnonzero(arrays[3] == pos),
+                indexing="ij",
+            )
+            slots, in_ = slots.reshape(-1, 1), in_.reshape(-1, 1)
+            single_transfer_points[slots[:, 0], in_[:, 0]] = scorer.score(
+                slots, points_in[in_], (pos,)
+            )
+        scores = np.concatenate([scores for *_, scores in transfers])
+        # the k best so far are a floor for any double transfer that makes the cut
+        floor = -np.inf if len(scores) < k else -np.partition(-scores, k - 1)[k - 1]
+        for positions, slots, in_ in _double_transfers(
+            *arrays,
+            squad_points,
+            points_in,
+            single_transfer_points,
+            floor + hits(2),
+        ):
+            scores = scorer.score(slots, points_in[in_], positions) - hits(2)
+            better = scores > _TOLERANCE + np.maximum(
+                single_scores[slots[:, 0], in_[:, 0]],
+                single_scores[slots[:, 1], in_[:, 1]],
+            )
+            transfers.append((slots[better], in_[better], scores[better]))
+
+    scores = np.concatenate([scores for *_, scores in transfers])
+    # fewer transfers first among equal scores
+    best = np.argsort(-scores, kind="stable")[:k]
+    all_slots = [slots for slots, *_ in transfers]
+    all_in = [in_ for _, in_, _ in transfers]
+    offsets = np.cumsum([0] + [len(slots) for slots in all_slots])
+    groups = np.searchsorted(offsets, best, side="right") - 1
+    best_slots = [all_slots[g][i - offsets[g]] for g, i in zip(groups, best)]
+    best_in = [all_in[g][i - offsets[g]] for g, i in zip(groups, best)]
+    player_ids, candidate_ids = squad["player_id"], candidates["player_id"]
+    return pl.DataFrame(
+        {
+            "transfers_out": [
+                player_ids.gather(slots).to_list() for slots in best_slots
+            ],
+            "transfers_in": [candidate_ids.gather(in_).to_list() for in_ in best_in],
+            "n_transfers": [len(slots) for slots in best_slots],
+            "cost": [
+                squad_cost.sum() - squad_cost[slots].sum() + cost_in[in_].sum()
+                for slots, in_ in zip(best_slots, best_in)
+            ],
+            "predicted_points": scores[best],
+        },
+        schema={
+            "transfers_out": pl.List(pl.Int64),
+            "transfers_in": pl.List(pl.Int64),
+            "n_transfers": pl.Int64,
+            "cost": pl.Float64,
+            "predicted_points": pl.Float64,
+        },
+    )
@@ -0,0 +1,320 @@
+"""
+Plans transfers over several gameweeks with a single MILP, so that a transfer can be
+made early for a player who scores later on, and free transfers can be banked
+"""
+
+from typing import Final, NamedTuple
+
+import numpy as np
+import polars as pl
+from scipy import sparse
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    BENCH_WEIGHT,
+    MAX_PLAYERS_PER_TEAM,
+    N_SELECTIONS,
+    N_STARTING_SELECTIONS,
+    POSITION_MAX_SELECTIONS,
+    STARTING_POSITION_MAX_SELECTIONS,
+    STARTING_POSITION_MIN_SELECTIONS,
+    TOTAL_COST,
+    TRANSFER_HIT_COST,
+    _dense_row,
+    _encode,
+    _one_hot_rows,
+)
+from fpl_predictor.squad_selection.solvers import (
+    OPTIMAL,
+    CompiledProblem,
+    ConstraintBounds,
+    ScipyBackend,
+    SolveOptions,
+    SolverBackend,
+)
+
+MAX_BANKED_TRANSFERS: Final[int] = 5
+
+# blocks of player variables in each gameweek
+SQUAD, STARTING, CAPTAIN, BOUGHT = range(4)
+N_BLOCKS = 4
+# auxiliary variables in each gameweek
+HITS, FREE_TRANSFERS = range(2)
+N_AUXILIARY = 2
+
+
+class TransferPlan(NamedTuple):
+    squads: pl.DataFrame  # the squad for each gameweek, with starting and captain flags
+    transfers: pl.DataFrame  # players bought and sold in each gameweek
+    expected_points: float  # the objective, net of transfer hits
+    bound: float | None = None  # the most points any plan could reach
+    status: str = OPTIMAL
+
+
+class TransferPlanner:
+    """
+    player_data has a row per player and gameweek of the horizon, with the player's
+    team, position, cost and predicted gameweek_points. Each gameweek has squad,
+    starting, captain and bought binaries for every player, and integer hits and free
+    transfers. Squads are linked by the players bought, free transfers roll over one
+    at a time up to max_banked_transfers and each transfer beyond them costs
+    TRANSFER_HIT_COST points. With solve_options limits the plan may be the incumbent
+    rather than the optimum, as its status says.
+    """
+
+    def __init__(
+        self,
+        player_data: pl.DataFrame,
+        current_squad: pl.DataFrame,
+        n_free_transfers: int = 1,
+        total_cost: float = TOTAL_COST,
+        bench_weight: float = BENCH_WEIGHT,
+        max_banked_transfers: int = MAX_BANKED_TRANSFERS,
+        solver: SolverBackend | None = None,
+        solve_options: SolveOptions = SolveOptions(),
+    ) -> None:
+        self.gameweeks = tuple(sorted(player_data["gameweek"].unique()))
+        # players without a prediction for a gameweek score nothing in it
+        self.gw_points = player_data.pivot(
+            values="gameweek_points",
+            index="player_id",
+            columns="gameweek",
+            aggregate_function="first",
+        ).fill_null(0)
+        self.players = (
+            player_data.select("player_id", "team_id", "position", "cost")
+            .unique("player_id", keep="first")
+            .join(self.gw_points.select("player_id"), on="player_id")
+        )
+        self.current_squad = current_squad
+        self.n_free_transfers = n_free_transfers
+        self.total_cost = total_cost
+        self.bench_weight = bench_weight
+        self.max_banked_transfers = max_banked_transfers
+        self.solver = solver or ScipyBackend()
+        self.solve_options = solve_options
+        self._problem: CompiledProblem | None = None
+
+    @property
+    def n_players(self) -> int:
+        return self.players.shape[0]
+
+    @property
+    def n_gameweeks(self) -> int:
+        return len(self.gameweeks)
+
+    @property
+    def n_player_variables(self) -> int:
+        return self.n_gameweeks * N_BLOCKS * self.n_players
+
+    def _player_columns(self, gameweek: int, block: int) -> int:
+        return (gameweek * N_BLOCKS + block) * self.n_players
+
+    def _auxiliary_column(self, gameweek: int, variable: int) -> int:
+        return self.n_player_variables + gameweek * N_AUXILIARY + variable
+
+    def _in_block(
+        self, matrix: sparse.csr_array, gameweek: int, block: int
+    ) -> sparse.coo_array:
+        """
+        Moves a constraint on the players into the columns of a gameweek's block
+        """
+        matrix = sparse.coo_array(matrix)
+        return sparse.coo_array(
+            (
+                matrix.data,
+                (matrix.row, matrix.col + self._player_columns(gameweek, block)),
+            ),
+            shape=(matrix.shape[0], self._auxiliary_column(self.n_gameweeks, 0)),
+        )
+
+    def _auxiliary_rows(
+        self, n_rows: int, gameweek: int, variable: int, coefficient: float
+    ) -> sparse.coo_array:
+        return sparse.coo_array(
+            (
+                np.full(n_rows, coefficient),
+                (
+                    np.arange(n_rows),
+                    np.full(n_rows, self._auxiliary_column(gameweek, variable)),
+                ),
+            ),
+            shape=(n_rows, self._auxiliary_column(self.n_gameweeks, 0)),
+        )
+
+    def _constraints(
+        self,
+    ) -> tuple[dict[str, sparse.csr_array], dict[str, ConstraintBounds]]:
+        positions, position_codes = _encode(self.players["position"])
+        teams, team_codes = _encode(self.players["team_id"])
+        position_rows = _one_hot_rows(position_codes, len(positions))
+        team_rows = _one_hot_rows(team_codes, len(teams))
+        ones = _dense_row(np.ones(self.n_players))
+        identity = sparse.identity(self.n_players, format="csr")
+        in_current_squad = (
+            self.players["player_id"]
+            .is_in(self.current_squad["player_id"])
+            .cast(int)
+            .to_numpy()
+        )
+
+        position_selections = np.array(
+            [POSITION_MAX_SELECTIONS[pos] for pos in positions]
+        )
+
+        matrices: dict[str, sparse.csr_array] = {}
+        bounds: dict[str, ConstraintBounds] = {}
+        for t in range(self.n_gameweeks):
+            gw = self.gameweeks[t]
+            matrices[f"position_{gw}"] = self._in_block(position_rows, t, SQUAD)
+            bounds[f"position_{gw}"] = (position_selections, position_selections)
+            matrices[f"total_selections_{gw}"] = self._in_block(ones, t, SQUAD)
+            bounds[f"total_selections_{gw}"] = (N_SELECTIONS, N_SELECTIONS)
+            matrices[f"cost_{gw}"] = self._in_block(
+                _dense_row(self.players["cost"].to_numpy()), t, SQUAD
+            )
+            bounds[f"cost_{gw}"] = (0, self.total_cost)
+            matrices[f"team_{gw}"] = self._in_block(team_rows, t, SQUAD)
+            bounds[f"team_{gw}"] = (0, MAX_PLAYERS_PER_TEAM)
+
+            # starters must be in the squad and the captain must start
+            matrices[f"starting_in_squad_{gw}"] = self._in_block(
+                identity, t, STARTING
+            ) - self._in_block(identity, t, SQUAD)
+            bounds[f"starting_in_squad_{gw}"] = (-np.inf, 0)
+            matrices[f"captain_starting_{gw}"] = self._in_block(
+                identity, t, CAPTAIN
+            ) - self._in_block(identity, t, STARTING)
+            bounds[f"captain_starting_{gw}"] = (-np.inf, 0)
+            matrices[f"starting_position_{gw}"] = self._in_block(
+                position_rows, t, STARTING
+            )
+            bounds[f"starting_position_{gw}"] = (
+                np.array([STARTING_POSITION_MIN_SELECTIONS[pos] for pos in positions]),
+                np.array([STARTING_POSITION_MAX_SELECTIONS[pos] for pos in positions]),
+            )
+            matrices[f"total_starting_selections_{gw}"] = self._in_block(
+                ones, t, STARTING
+            )
+            bounds[f"total_starting_selections_{gw}"] = (
+                N_STARTING_SELECTIONS,
+                N_STARTING_SELECTIONS,
+            )
+            matrices[f"captain_{gw}"] = self._in_block(ones, t, CAPTAIN)
+            bounds[f"captain_{gw}"] = (1, 1)
+
+            # a player can only join the squad by being bought
+            squad_change = self._in_block(identity, t, SQUAD) - self._in_block(
+                identity, t, BOUGHT
+            )
+            if t == 0:
+                matrices[f"bought_{gw}"] = squad_change
+                bounds[f"bought_{gw}"] = (-np.inf, in_current_squad)
+            else:
+                matrices[f"bought_{gw}"] = squad_change - self._in_block(
+                    identity, t - 1, SQUAD
+                )
+                bounds[f"bought_{gw}"] = (-np.inf, 0)
+
+            # the transfers which aren't free are hits
+            transfers = self._in_block(ones, t, BOUGHT)
+            matrices[f"hits_{gw}"] = (
+                transfers
+                - self._auxiliary_rows(1, t, FREE_TRANSFERS, 1)
+                - self._auxiliary_rows(1, t, HITS, 1)
+            )
+            bounds[f"hits_{gw}"] = (-np.inf, 0)
+            if t == 0:
+                matrices[f"free_transfers_{gw}"] = self._auxiliary_rows(
+                    1, t, FREE_TRANSFERS, 1
+                )
+                bounds[f"free_transfers_{gw}"] = (
+                    self.n_free_transfers,
+                    self.n_free_transfers,
+                )
+            else:
+                # unused free transfers roll over, plus one for the new gameweek
+                matrices[f"free_transfers_{gw}"] = (
+                    self._auxiliary_rows(1, t, FREE_TRANSFERS, 1)
+                    - self._auxiliary_rows(1, t - 1, FREE_TRANSFERS, 1)
+                    + self._in_block(ones, t - 1, BOUGHT)
+                    - self._auxiliary_rows(1, t - 1, HITS, 1)
+                )
+                bounds[f"free_transfers_{gw}"] = (-np.inf, 1)
+        return matrices, bounds
+
+    @property
+    def problem(self) -> CompiledProblem:
+        if self._problem is None:
+            gw_points = self.gw_points.select(
+                pl.col(str(gw)) for gw in self.gameweeks
+            ).to_numpy()
+            c = np.zeros(self._auxiliary_column(self.n_gameweeks, 0))
+            upper = np.ones_like(c)
+            for t in range(self.n_gameweeks):
+                points = gw_points[:, t].astype(np.float64)
+                for block, weight in (
+                    (SQUAD, self.bench_weight),
+                    (STARTING, 1 - self.bench_weight),
+                    (CAPTAIN, 1),
+                ):
+                    start = self._player_columns(t, block)
+                    c[start : start + self.n_players] = -weight * points
+                c[self._auxiliary_column(t, HITS)] = TRANSFER_HIT_COST
+                upper[self._auxiliary_column(t, HITS)] = np.inf
+                upper[self._auxiliary_column(t, FREE_TRANSFERS)] = max(
+                    self.max_banked_transfers, self.n_free_transfers
+                )
+            matrices, bounds = self._constraints()
+            self._problem = CompiledProblem.from_constraints(c, upper, matrices, bounds)
+        return self._problem
+
+    def plan(self) -> TransferPlan:
+        problem = self.problem
+        result = self.solver.run(problem, self.solve_options)
+        assert result.x is not None, f"Optimisation failed: {result.status}"
+        x = result.x
+        selections = (
+            np.round(x[: self.n_player_variables])
+            .astype(bool)
+            .reshape(self.n_gameweeks, N_BLOCKS, self.n_players)
+        )
+
+        squads, transfers = [], []
+        previous_squad = self.players["player_id"].is_in(
+            self.current_squad["player_id"]
+        )
+        for t, gw in enumerate(self.gameweeks):
+            squad = pl.Series(selections[t, SQUAD])
+            squads.append(
+                self.players.with_columns(
+                    pl.lit(gw).alias("gameweek"),
+                    self.gw_points[str(gw)].alias("gameweek_points"),
+                    pl.Series("starting", selections[t, STARTING]),
+                    pl.Series("captain", selections[t, CAPTAIN]),
+                ).filter(squad)
+            )
+            if t == 0:
+                # current squad players without predictions must be sold
+                sold = self.current_squad.select("player_id").filter(
+                    ~pl.col("player_id").is_in(self.players.filter(squad)["player_id"])
+                )
+            else:
+                sold = self.players.select("player_id").filter(previous_squad & ~squad)
+            bought = self.players.select("player_id").filter(squad & ~previous_squad)
+            transfers += [
+                sold.with_columns(
+                    pl.lit(gw).alias("gameweek"), pl.lit("out").alias("direction")
+                ),
+                bought.with_columns(
+                    pl.lit(gw).alias("gameweek"), pl.lit("in").alias("direction")
+                ),
+            ]
+            previous_squad = squad
+
+        return TransferPlan(
+            squads=pl.concat(squads),
+            transfers=pl.concat(transfers).select("gameweek", "player_id", "direction"),
+            expected_points=-float(problem.c @ x),
+            bound=None if result.bound is None else -result.bound,
+            status=result.status,
+        )
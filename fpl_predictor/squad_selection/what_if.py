@@ -0,0 +1,176 @@
+"""
+Sweeps a squad optimiser over what-if questions, such as a bigger budget or a price
+rise, solving them all on one compiled problem per worker process
+"""
+
+import copy
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Mapping, Sequence
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import SquadOptimiser
+from fpl_predictor.squad_selection.solvers import (
+    HighspyBackend,
+    ScipyBackend,
+    SolverBackend,
+)
+
+
+@dataclass(frozen=True)
+class WhatIf:
+    """
+    Changes to the optimiser's budget and to the players' costs and predicted
+    points, keyed by player_id. Anything not set is left as it is.
+    """
+
+    name: str = ""
+    total_cost: float | None = None
+    cost_changes: Mapping[int, float] = field(default_factory=dict)
+    points_changes: Mapping[int, float] = field(default_factory=dict)
+
+
+def budget_what_ifs(total_costs: Sequence[float]) -> list[WhatIf]:
+    return [WhatIf(f"total_cost={cost}", total_cost=cost) for cost in total_costs]
+
+
+def price_what_ifs(player_id: int, cost_changes: Sequence[float]) -> list[WhatIf]:
+    return [
+        WhatIf(f"cost[{player_id}]{change:+}", cost_changes={player_id: change})
+        for change in cost_changes
+    ]
+
+
+def _default_solver_class() -> type[SolverBackend]:
+    # highspy keeps the model between what-ifs and warm starts from the last squad
+    if importlib.util.find_spec("highspy") is None:
+        return ScipyBackend
+    return HighspyBackend
+
+
+def _apply(what_if: WhatIf, player_data: pl.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The players' costs and predicted points in the what-if
+    """
+    cost = player_data["cost"].to_numpy().astype(np.float64)
+    points = player_data["gameweek_points"].to_numpy().astype(np.float64)
+    player_ids = player_data["player_id"].to_numpy()
+    for changes, values in (
+        (what_if.cost_changes, cost),
+        (what_if.points_changes, points),
+    ):
+        if changes:
+            rows = np.isin(player_ids, list(changes))
+            values[rows] += [changes[player_id] for player_id in player_ids[rows]]
+    return cost, points
+
+
+def _candidates(optimiser: SquadOptimiser, what_ifs: Sequence[WhatIf]) -> np.ndarray:
+    """
+    A mask of the players who survive the presolve in at least one what-if, among
+    whom the best squad of every what-if can be found. The budget doesn't affect
+    the presolve, so only the distinct changes to costs and points are presolved.
+    """
+    keep = np.zeros(optimiser.player_data.shape[0], dtype=bool)
+    changes = {
+        (tuple(w.cost_changes.items()), tuple(w.points_changes.items())): w
+        for w in what_ifs
+    }
+    what_if_optimiser = copy.copy(optimiser)
+    for what_if in changes.values():
+        cost, points = _apply(what_if, optimiser.player_data)
+        what_if_optimiser.player_data = optimiser.player_data.with_columns(
+            pl.Series("cost", cost), pl.Series("gameweek_points", points)
+        )
+        keep |= what_if_optimiser._presolve()
+    return keep
+
+
+def _solve_what_ifs(
+    optimiser: SquadOptimiser,
+    what_ifs: Sequence[tuple[int, WhatIf]],
+    solver_class: type[SolverBackend],
+) -> list[pl.DataFrame]:
+    optimiser.solver = solver_class()
+    player_data = optimiser.player_data
+    base_total_cost = optimiser.total_cost
+
+    squads = []
+    for i, what_if in what_ifs:
+        cost, points = _apply(what_if, player_data)
+        total_cost = (
+            base_total_cost if what_if.total_cost is None else what_if.total_cost
+        )
+        optimiser.total_cost = total_cost
+        optimiser.update_costs(cost)
+        optimiser.update_gameweek_points(points)
+
+        result = optimiser.solve()
+        # a failed what-if keeps a row, with no squad, so the others still solve
+        squad = player_data.clear(1) if result.selection is None else result.selection
+        squads.append(
+            squad.with_columns(
+                pl.lit(i).alias("what_if"),
+                pl.lit(what_if.name).alias("name"),
+                pl.lit(float(total_cost)).alias("total_cost"),
+                pl.lit(result.objective, dtype=pl.Float64).alias("objective"),
+                pl.lit(result.status).alias("status"),
+            )
+        )
+    return squads
+
+
+def sweep(
+    optimiser: SquadOptimiser,
+    what_ifs: Sequence[WhatIf],
+    max_workers: int = 1,
+    solver_class: type[SolverBackend] | None = None,
+) -> pl.DataFrame:
+    """
+    Solves the optimiser for each what-if and returns a row per what-if and player in
+    its squad, with the objective, the solve status and the what-if's costs and
+    points. A what-if with no feasible squad has a single row with a null objective
+    and players. The players are
+    narrowed to those who survive the presolve in some what-if, and the problem is
+    compiled once over them, so each worker updates the same problem in place for
+    its share of the what-ifs. Neighbouring what-ifs go to the same worker so that
+    warm starts are close. The what-ifs are solved in this process unless
+    max_workers is raised, as starting worker processes takes longer than the
+    solves unless each worker has many what-ifs.
+    """
+    player_data = optimiser.player_data
+    if optimiser.presolve:
+        player_data = player_data.filter(_candidates(optimiser, what_ifs))
+    optimiser = copy.copy(optimiser)
+    optimiser.presolve = False
+    optimiser.player_data = player_data
+    optimiser.solver = ScipyBackend()  # a live highspy model can't be pickled
+    solver_class = solver_class or _default_solver_class()
+    indexed_what_ifs = list(enumerate(what_ifs))
+    n_workers = min(max_workers, len(indexed_what_ifs))
+
+    if n_workers <= 1:
+        squads = _solve_what_ifs(optimiser, indexed_what_ifs, solver_class)
+    else:
+        chunks = np.array_split(np.arange(len(indexed_what_ifs)), n_workers)
+        # forked workers can deadlock on thread pools inherited from the parent
+        with ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _solve_what_ifs,
+                    optimiser,
+                    [indexed_what_ifs[i] for i in chunk],
+                    solver_class,
+                )
+                for chunk in chunks
+            ]
+            squads = [squad for future in futures for squad in future.result()]
+    return pl.concat(squads, how="vertical_relaxed").select(
+        "what_if", "name", "total_cost", "objective", "status", *player_data.columns
+    )
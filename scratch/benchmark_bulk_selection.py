@@ -0,0 +1,32 @@
+"""
+Times selecting squads for a mini-league of managers, each with a squad a couple of
+transfers from the sample squad, with one and two worker processes
+"""
+
+import polars as pl
+
+from fpl_predictor.squad_selection.bulk_selection import select_squads_from_player_data
+from fpl_predictor.squad_selection.transfer_evaluator import (
+    apply_transfers,
+    evaluate_transfers,
+)
+from scratch.sample_data import current_squad, sample_player_data
+
+N_MANAGERS = 40
+
+if __name__ == "__main__":
+    transfers = evaluate_transfers(sample_player_data, current_squad, k=N_MANAGERS)
+    current_squads = {
+        f"manager_{i}": apply_transfers(
+            sample_player_data, current_squad, row["transfers_out"], row["transfers_in"]
+        ).select("player_id", "team_id", "position", "cost")
+        for i, row in enumerate(transfers.iter_rows(named=True))
+    }
+    for max_workers in (1, 2):
+        selection = select_squads_from_player_data(
+            sample_player_data, current_squads, max_workers=max_workers
+        )
+        print(
+            f"{max_workers} workers: {selection.squads_per_second:.1f} squads per second"
+        )
+    print(selection.squads.group_by("manager").agg(pl.first("expected_points")).head())
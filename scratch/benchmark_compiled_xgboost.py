@@ -0,0 +1,46 @@
+"""
+Compares import time and predict latency of the xgboost model with its compiled tree
+ensemble export on a synthetic player matrix the size of the FPL player pool
+"""
+
+import subprocess
+import sys
+import timeit
+
+import numpy as np
+import xgboost as xgb
+
+from fpl_predictor.model_training.tree_ensemble import compile_booster
+
+N_PLAYERS = 700
+N_FEATURES = 40
+
+
+def _import_time(module: str, repeats: int = 5) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    return min(
+        float(subprocess.check_output([sys.executable, "-c", code]))
+        for _ in range(repeats)
+    )
+
+
+rng = np.random.default_rng(1)
+X = rng.normal(size=(5000, N_FEATURES)).astype(np.float32)
+y = X[:, :5].sum(axis=1) + rng.normal(size=5000)
+model = xgb.XGBRegressor(n_estimators=500, max_depth=6, random_state=1).fit(X, y)
+compiled = compile_booster(
+    model.get_booster(), tuple(f"f{i}" for i in range(N_FEATURES))
+)
+
+players = X[:N_PLAYERS]
+max_abs_diff = np.abs(model.predict(players) - compiled.predict(players)).max()
+print(f"{max_abs_diff=}")
+
+print(f"xgboost import: {_import_time('xgboost') * 1000:.0f}ms")
+print(
+    f"tree_ensemble import: "
+    f"{_import_time('fpl_predictor.model_training.tree_ensemble') * 1000:.0f}ms"
+)
+for name, predict in (("xgboost", model.predict), ("compiled", compiled.predict)):
+    n, total = timeit.Timer(lambda: predict(players)).autorange()
+    print(f"{name} predict ({N_PLAYERS} players): {total / n * 1000:.2f}ms")
@@ -0,0 +1,34 @@
+"""
+Prints the cumulative import time of the command line scripts and the squad selection
+modules, each in a fresh interpreter, and the slowest packages they import
+"""
+
+import subprocess
+import sys
+
+MODULES = (
+    "fpl_predictor.scripts.select_gameweek_squad",
+    "fpl_predictor.squad_selection",
+    "fpl_predictor.squad_selection.player_gw_score_prediction",
+    "fpl_predictor.squad_selection.squad_selection",
+)
+
+for module in MODULES:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    cumulative_times = {}
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        cumulative_times[name.strip()] = int(cumulative) / 1000
+    print(f"{module}: {cumulative_times[module]:.0f}ms")
+    packages: dict[str, float] = {}
+    for name, time in cumulative_times.items():
+        package = name.split(".")[0]
+        packages[package] = max(packages.get(package, 0), time)
+    packages.pop("fpl_predictor", None)
+    for name, time in sorted(packages.items(), key=lambda x: -x[1])[:5]:
+        print(f"    {name}: {time:.0f}ms")
@@ -0,0 +1,102 @@
+"""
+Compares the joint squad, starting team and captain optimiser with choosing the squad
+and then the starting team, on the sample player data: solve time and the objective the
+joint model maximises (starting points, doubled captain and weighted bench, less any
+transfer hits)
+"""
+
+import time
+from typing import Callable
+
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    BENCH_WEIGHT,
+    TRANSFER_HIT_COST,
+    JointSquadOptimiser,
+    PSCPSquadOptimiser,
+    SquadOptimiser,
+    StartingTeamOptimiser,
+)
+
+player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+    "player_id", "team_id", "position", "cost", "gameweek_points"
+)
+current_squad = pl.read_csv("tests/sample_data/sample_squad.csv")
+N_FREE_TRANSFERS = 1
+
+
+def _objective(
+    squad: pl.DataFrame, starting_team: pl.DataFrame, with_current_squad: bool
+) -> float:
+    starting_points = starting_team["gameweek_points"].to_numpy()
+    bench_points = squad["gameweek_points"].to_numpy().sum() - starting_points.sum()
+    objective = (
+        starting_points.sum() + starting_points.max() + BENCH_WEIGHT * bench_points
+    )
+    if with_current_squad:
+        n_transfers = (~squad["player_id"].is_in(current_squad["player_id"])).sum()
+        objective -= max(n_transfers - N_FREE_TRANSFERS, 0) * TRANSFER_HIT_COST
+    return objective
+
+
+def _two_stage(squad_optimiser: SquadOptimiser) -> tuple[pl.DataFrame, pl.DataFrame]:
+    squad = squad_optimiser.optimise()
+    return squad, StartingTeamOptimiser(squad).optimise()
+
+
+def _joint(squad_optimiser: JointSquadOptimiser) -> tuple[pl.DataFrame, pl.DataFrame]:
+    squad, starting_team, _ = squad_optimiser.optimise_selection()
+    return squad, starting_team
+
+
+def _run(
+    name: str,
+    select: Callable[[], tuple[pl.DataFrame, pl.DataFrame]],
+    with_current_squad: bool,
+) -> None:
+    start = time.perf_counter()
+    squad, starting_team = select()
+    elapsed = time.perf_counter() - start
+    objective = _objective(squad, starting_team, with_current_squad)
+    print(f"  {name}: objective {objective:.1f}, {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    for squad in (None, current_squad):
+        with_current_squad = squad is not None
+        n_free_transfers = N_FREE_TRANSFERS if with_current_squad else None
+        print("with current squad" if with_current_squad else "without current squad")
+        for name, select in (
+            (
+                "naive",
+                lambda: _two_stage(
+                    SquadOptimiser(
+                        player_data,
+                        current_squad=squad,
+                        n_free_transfers=n_free_transfers,
+                    )
+                ),
+            ),
+            (
+                "pscp",
+                lambda: _two_stage(
+                    PSCPSquadOptimiser(
+                        player_data,
+                        current_squad=squad,
+                        n_free_transfers=n_free_transfers,
+                    )
+                ),
+            ),
+            (
+                "joint",
+                lambda: _joint(
+                    JointSquadOptimiser(
+                        player_data,
+                        current_squad=squad,
+                        n_free_transfers=n_free_transfers,
+                    )
+                ),
+            ),
+        ):
+            _run(name, select, with_current_squad)
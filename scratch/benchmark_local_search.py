@@ -0,0 +1,81 @@
+"""
+Compares the local search optimiser with the MILP: the optimality gap and the time per
+squad, on the recorded gameweek in the sample data, on gameweeks resampled from it and
+on a larger synthetic pool, and for a sweep re-solving one optimiser after updating
+the points
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import SquadOptimiser
+from fpl_predictor.squad_selection.local_search import LocalSearchSquadOptimiser
+from scratch.sample_data import current_squad, sample_player_data, synthetic_player_data
+
+N_GAMEWEEKS = 38
+
+
+def _gameweeks(player_data: pl.DataFrame, n_gameweeks: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    points = player_data["gameweek_points"].to_numpy()
+    return [points] + [
+        np.round(points + rng.normal(0, 2, len(points)), 1)
+        for _ in range(n_gameweeks - 1)
+    ]
+
+
+def _compare(name: str, player_data: pl.DataFrame, n_gameweeks: int, **kwargs) -> None:
+    gaps, times = [], {"milp": 0.0, "local search": 0.0}
+    for gameweek_points in _gameweeks(player_data, n_gameweeks):
+        points: dict[str, float] = {}
+        for label, optimiser_class in (
+            ("milp", SquadOptimiser),
+            ("local search", LocalSearchSquadOptimiser),
+        ):
+            start = time.perf_counter()
+            optimiser = optimiser_class(player_data, **kwargs)
+            optimiser.update_gameweek_points(gameweek_points)
+            objective = optimiser.solve().objective
+            if objective is None:
+                raise RuntimeError(f"The {label} optimiser found no squad")
+            points[label] = objective
+            times[label] += time.perf_counter() - start
+        gaps.append(1 - points["local search"] / points["milp"])
+    print(
+        f"{name}: gap mean {np.mean(gaps):.2%} max {np.max(gaps):.2%}, "
+        f"exact in {np.mean(np.array(gaps) < 1e-9):.0%}; per squad milp "
+        f"{times['milp'] / n_gameweeks * 1000:.1f}ms, local search "
+        f"{times['local search'] / n_gameweeks * 1000:.1f}ms"
+    )
+
+
+def _sweep(player_data: pl.DataFrame, n_gameweeks: int) -> None:
+    for label, optimiser_class in (
+        ("milp", SquadOptimiser),
+        ("local search", LocalSearchSquadOptimiser),
+    ):
+        optimiser = optimiser_class(player_data)
+        optimiser.presolve = False
+        optimiser.solve()
+        start = time.perf_counter()
+        for gameweek_points in _gameweeks(player_data, n_gameweeks):
+            optimiser.update_gameweek_points(gameweek_points)
+            optimiser.solve()
+        elapsed = (time.perf_counter() - start) / n_gameweeks
+        print(f"sweep {label}: {elapsed * 1000:.1f}ms per squad")
+
+
+if __name__ == "__main__":
+    _compare("recorded gameweek", sample_player_data, 1)
+    _compare("resampled gameweeks", sample_player_data, N_GAMEWEEKS)
+    _compare(
+        "resampled gameweeks, current squad",
+        sample_player_data,
+        N_GAMEWEEKS,
+        current_squad=current_squad,
+        n_free_transfers=1,
+    )
+    _compare("synthetic 7k pool", synthetic_player_data(7000), 10)
+    _sweep(sample_player_data, N_GAMEWEEKS)
@@ -0,0 +1,34 @@
+"""
+Compares the squad optimisers with and without the dominance presolve, on the sample
+player data and a larger synthetic pool: players kept, wall time and objective
+"""
+
+import time
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    JointSquadOptimiser,
+    SquadOptimiser,
+)
+from scratch.sample_data import current_squad, sample_player_data, synthetic_player_data
+
+if __name__ == "__main__":
+    for name, player_data, squad, n_free_transfers in (
+        ("sample", sample_player_data, None, None),
+        ("sample, current squad", sample_player_data, current_squad, 1),
+        ("synthetic 7k", synthetic_player_data(7_000), None, None),
+    ):
+        for optimiser_class in (SquadOptimiser, JointSquadOptimiser):
+            results = []
+            for presolve in (False, True):
+                optimiser = optimiser_class(
+                    player_data, current_squad=squad, n_free_transfers=n_free_transfers
+                )
+                optimiser.presolve = presolve
+                start = time.perf_counter()
+                squad = optimiser.optimise()
+                elapsed = time.perf_counter() - start
+                results.append(
+                    f"{optimiser.n_players} players {elapsed:.2f}s "
+                    f"({squad['gameweek_points'].sum():.1f} points)"
+                )
+            print(f"{name}, {optimiser_class.__name__}: {' -> '.join(results)}")
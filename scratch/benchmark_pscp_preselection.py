@@ -0,0 +1,65 @@
+"""
+Times the PSCP optimiser's construction, which runs the preselection, on pools of
+increasing size against the row-by-row walk the preselection replaced
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    PRESELECTION_MAX_SELECTIONS,
+    PSCPSquadOptimiser,
+)
+
+PLAYERS_TO_PRESELECT = 4
+
+
+def greedy_walk(player_data: pl.DataFrame, players_to_preselect: int) -> list[int]:
+    taken = {pos: 0 for pos in PRESELECTION_MAX_SELECTIONS}
+    player_ids = []
+    for row in player_data.sort(
+        ["cost", "gameweek_points"], descending=[False, True], maintain_order=True
+    ).iter_rows(named=True):
+        if taken[row["position"]] < PRESELECTION_MAX_SELECTIONS[row["position"]]:
+            taken[row["position"]] += 1
+            player_ids.append(row["player_id"])
+        if len(player_ids) == players_to_preselect:
+            break
+    return player_ids
+
+
+def _player_data(n_players: int, rng: np.random.Generator) -> pl.DataFrame:
+    # the cheapest players are all goalkeepers, so the walk goes a long way
+    cheap = np.arange(n_players) < n_players // 2
+    return pl.DataFrame(
+        {
+            "player_id": np.arange(n_players),
+            "team_id": rng.integers(1, 21, n_players),
+            "position": np.where(
+                cheap, "GKP", rng.choice(["DEF", "MID", "FWD"], n_players)
+            ),
+            "cost": np.where(cheap, 4.0, rng.uniform(4.5, 13.0, n_players).round(1)),
+            "gameweek_points": rng.integers(0, 15, n_players),
+        }
+    )
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for n_players in (1_000, 100_000, 1_000_000):
+        player_data = _player_data(n_players, rng)
+        start = time.perf_counter()
+        optimiser = PSCPSquadOptimiser(
+            player_data, players_to_preselect=PLAYERS_TO_PRESELECT
+        )
+        construction = time.perf_counter() - start
+        start = time.perf_counter()
+        expected_player_ids = greedy_walk(player_data, PLAYERS_TO_PRESELECT)
+        walk = time.perf_counter() - start
+        assert optimiser.selected_players["player_id"].to_list() == expected_player_ids
+        print(
+            f"{n_players} players: walk {walk:.3f}s, "
+            f"construction with the vectorised preselection {construction:.3f}s"
+        )
@@ -0,0 +1,39 @@
+"""
+Times simulating 100k draws of the sample squad, and of batches of squads within two
+transfers of it, and prints their distributions
+"""
+
+import time
+
+from fpl_predictor.squad_selection.simulation import PointsSimulator, summarise
+from fpl_predictor.squad_selection.transfer_evaluator import (
+    apply_transfers,
+    evaluate_transfers,
+)
+from scratch.sample_data import current_squad, sample_player_data
+
+simulator = PointsSimulator(sample_player_data, current_squad=current_squad, seed=0)
+simulator.simulate_squad(current_squad)
+
+start = time.perf_counter()
+simulated_points = simulator.simulate_squad(current_squad)
+print(f"one squad: {(time.perf_counter() - start) * 1000:.0f}ms")
+print(summarise(simulated_points))
+
+for n_squads in (10, 50):
+    transfers = evaluate_transfers(sample_player_data, current_squad, k=n_squads)
+    squads = simulator.scorer.squad_matrix(
+        [
+            apply_transfers(
+                sample_player_data,
+                current_squad,
+                row["transfers_out"],
+                row["transfers_in"],
+            )["player_id"].to_list()
+            for row in transfers.iter_rows(named=True)
+        ]
+    )
+    start = time.perf_counter()
+    simulated_points = simulator.simulate(squads)
+    print(f"{n_squads} squads: {(time.perf_counter() - start) * 1000:.0f}ms")
+print(summarise(simulated_points).head())
@@ -0,0 +1,43 @@
+"""
+Times the joint optimiser without presolve under looser solve options, on the sample
+player data and a larger synthetic pool: the status, the incumbent's points and the
+bound for each
+"""
+
+import time
+
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import JointSquadOptimiser
+from fpl_predictor.squad_selection.solvers import (
+    HighspyBackend,
+    ScipyBackend,
+    SolveOptions,
+)
+from scratch.sample_data import sample_player_data, synthetic_player_data
+
+OPTIONS = (
+    SolveOptions(),
+    SolveOptions(mip_rel_gap=0.01),
+    SolveOptions(mip_rel_gap=0.05),
+    SolveOptions(node_limit=1),
+    SolveOptions(time_limit=0.5),
+)
+
+for name, player_data in (
+    ("sample", sample_player_data),
+    ("synthetic", synthetic_player_data(7000)),
+):
+    for solver_class in (ScipyBackend, HighspyBackend):
+        for options in OPTIONS:
+            optimiser = JointSquadOptimiser(
+                player_data, solver=solver_class(), solve_options=options
+            )
+            optimiser.presolve = False
+            start = time.perf_counter()
+            result = optimiser.solve()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name} {solver_class.__name__} {options}: {elapsed:.3f}s "
+                f"{result.status} objective={result.objective} bound={result.bound}"
+            )
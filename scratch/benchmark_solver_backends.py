@@ -0,0 +1,80 @@
+"""
+Compares the scipy and highspy backends when the same squad problem is re-solved
+after small changes to the budget and predicted points, as in a what-if sweep
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    JointSquadOptimiser,
+    SquadOptimiser,
+)
+from fpl_predictor.squad_selection.solvers import HighspyBackend, ScipyBackend
+
+N_RESOLVES = 20
+POSITIONS = np.array(["GKP", "DEF", "MID", "FWD"])
+
+sample_player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+    "player_id", "team_id", "position", "cost", "gameweek_points"
+)
+current_squad = pl.read_csv("tests/sample_data/sample_squad.csv")
+
+
+def _synthetic_player_data(n_players: int, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    cost = rng.integers(40, 130, n_players) / 10
+    return pl.DataFrame(
+        {
+            "player_id": np.arange(n_players),
+            "team_id": rng.integers(1, 21, n_players),
+            "position": POSITIONS[rng.integers(0, 4, n_players)],
+            "cost": cost,
+            "gameweek_points": np.round(rng.gamma(cost / 2, 0.5), 1),
+        }
+    )
+
+
+def _resolve(
+    optimiser: SquadOptimiser, seed: int = 0
+) -> tuple[float, float, list[float]]:
+    rng = np.random.default_rng(seed)
+    gameweek_points = optimiser.player_data["gameweek_points"].to_numpy()
+    optimiser.presolve = False  # keep one problem so that it can be updated in place
+    start = time.perf_counter()
+    objectives = [optimiser.optimise()["gameweek_points"].sum()]
+    first_solve_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(N_RESOLVES):
+        optimiser.total_cost = 100 - i % 3
+        optimiser.update_gameweek_points(
+            gameweek_points + rng.normal(0, 0.2, len(gameweek_points))
+        )
+        objectives.append(optimiser.optimise()["gameweek_points"].sum())
+    return first_solve_time, (time.perf_counter() - start) / N_RESOLVES, objectives
+
+
+if __name__ == "__main__":
+    for name, player_data, optimiser_class in (
+        ("sample, squad", sample_player_data, SquadOptimiser),
+        ("sample, joint", sample_player_data, JointSquadOptimiser),
+        ("synthetic 7k, squad", _synthetic_player_data(7_000), SquadOptimiser),
+    ):
+        results = {}
+        for solver in (ScipyBackend(), HighspyBackend()):
+            optimiser = optimiser_class(
+                player_data,
+                current_squad=current_squad,
+                n_free_transfers=1,
+                solver=solver,
+            )
+            first, resolve, objectives = _resolve(optimiser)
+            results[type(solver).__name__] = objectives
+            print(
+                f"{name}, {type(solver).__name__}: first solve {first:.3f}s, "
+                f"re-solve {resolve:.3f}s"
+            )
+        scipy_objectives, highspy_objectives = results.values()
+        assert np.allclose(scipy_objectives, highspy_objectives)
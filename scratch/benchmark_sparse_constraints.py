@@ -0,0 +1,59 @@
+"""
+Compares building and solving the squad selection problem with sparse constraint
+matrices against the same problem solved from dense matrices, for synthetic player
+pools of increasing size
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from fpl_predictor.squad_selection.linear_optimisation import SquadOptimiser
+
+N_PLAYERS = (700, 7_000, 70_000)
+POSITIONS = np.array(["GKP", "DEF", "MID", "FWD"])
+
+
+def _player_data(n_players: int, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pl.DataFrame(
+        {
+            "player_id": np.arange(n_players),
+            "team_id": rng.integers(1, 21, n_players),
+            "position": POSITIONS[rng.integers(0, 4, n_players)],
+            "cost": rng.integers(40, 130, n_players) / 10,
+            "gameweek_points": rng.poisson(3, n_players).astype(float),
+        }
+    )
+
+
+def _solve(c: np.ndarray, A, lb: np.ndarray, ub: np.ndarray) -> float:
+    start = time.perf_counter()
+    res = milp(
+        c=c,
+        constraints=LinearConstraint(A, lb, ub),
+        integrality=np.ones(len(c)),
+        bounds=Bounds(0, 1),
+    )
+    assert res.success
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    for n_players in N_PLAYERS:
+        optimiser = SquadOptimiser(_player_data(n_players))
+        start = time.perf_counter()
+        problem = optimiser.problem
+        build_time = time.perf_counter() - start
+        dense_A = problem.A.toarray()
+
+        sparse_time = _solve(problem.c, problem.A, problem.lb, problem.ub)
+        dense_time = _solve(problem.c, dense_A, problem.lb, problem.ub)
+        print(
+            f"{n_players} variables: build {build_time * 1000:.1f}ms, "
+            f"A {problem.A.data.nbytes / 1e6:.2f}MB sparse vs "
+            f"{dense_A.nbytes / 1e6:.2f}MB dense, "
+            f"solve {sparse_time:.2f}s sparse vs {dense_time:.2f}s dense"
+        )
@@ -0,0 +1,46 @@
+"""
+Compares scoring squads one at a time, picking each starting team and annotating the
+squad, with scoring them all at once with SquadScorer
+"""
+
+import time
+
+import numpy as np
+
+from fpl_predictor.squad_selection.squad_scoring import SquadScorer
+from fpl_predictor.squad_selection.squad_selection import (
+    annotate_squad_and_compute_points,
+)
+from fpl_predictor.squad_selection.starting_team import select_starting_team
+from fpl_predictor.squad_selection.transfer_evaluator import (
+    apply_transfers,
+    evaluate_transfers,
+)
+from scratch.sample_data import current_squad, sample_player_data
+
+N_SQUADS = 1000
+
+transfers = evaluate_transfers(sample_player_data, current_squad, k=N_SQUADS)
+squads = [
+    apply_transfers(
+        sample_player_data, current_squad, row["transfers_out"], row["transfers_in"]
+    )
+    for row in transfers.iter_rows(named=True)
+]
+
+start = time.perf_counter()
+loop_points = [
+    annotate_squad_and_compute_points(
+        squad, select_starting_team(squad), n_transfers, 1
+    )[1]
+    for squad, n_transfers in zip(squads, transfers["n_transfers"])
+]
+loop = (time.perf_counter() - start) / N_SQUADS
+print(f"one squad at a time: {loop * 1e6:.0f}us per squad")
+
+start = time.perf_counter()
+scorer = SquadScorer(sample_player_data, current_squad=current_squad)
+scores = scorer.score(scorer.squad_matrix([s["player_id"].to_list() for s in squads]))
+batch = (time.perf_counter() - start) / N_SQUADS
+print(f"SquadScorer: {batch * 1e6:.1f}us per squad, {loop / batch:.0f}x faster")
+print(f"max difference {np.abs(scores.points - loop_points).max():.2g} points")
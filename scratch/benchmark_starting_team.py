@@ -0,0 +1,43 @@
+"""
+Compares picking starting teams by enumerating formations with the MILP, for one
+squad and for a batch of resampled squad points
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    SquadOptimiser,
+    StartingTeamOptimiser,
+)
+from fpl_predictor.squad_selection.starting_team import (
+    best_starting_teams,
+    select_starting_team,
+)
+
+N_SQUADS = 10_000
+N_MILP_SQUADS = 200
+
+squad = SquadOptimiser(pl.read_csv("tests/sample_data/player_data.csv")).optimise()
+rng = np.random.default_rng(0)
+gameweek_points = rng.normal(3, 3, (N_SQUADS, squad.shape[0]))
+
+start = time.perf_counter()
+for _ in range(100):
+    select_starting_team(squad)
+print(f"select_starting_team: {(time.perf_counter() - start) * 10:.2f}ms per squad")
+
+start = time.perf_counter()
+for points in gameweek_points[:N_MILP_SQUADS]:
+    StartingTeamOptimiser(
+        squad.with_columns(pl.Series("gameweek_points", points))
+    ).optimise()
+milp = (time.perf_counter() - start) / N_MILP_SQUADS
+print(f"StartingTeamOptimiser: {milp * 1000:.2f}ms per squad")
+
+start = time.perf_counter()
+best_starting_teams(gameweek_points, squad["position"].to_list())
+batch = (time.perf_counter() - start) / N_SQUADS
+print(f"best_starting_teams on {N_SQUADS} squads: {batch * 1e6:.2f}us per squad")
@@ -0,0 +1,41 @@
+"""
+Times optimise_top_k for K=100 with each backend, against rebuilding the problem
+with all the cuts for every squad.
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import SquadOptimiser, _dense_row
+from fpl_predictor.squad_selection.solvers import HighspyBackend, ScipyBackend
+
+player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+    "player_id", "team_id", "position", "cost", "gameweek_points"
+)
+K = 100
+
+for solver in (ScipyBackend(), HighspyBackend()):
+    optimiser = SquadOptimiser(player_data, solver=solver)
+    start = time.perf_counter()
+    squads = optimiser.optimise_top_k(K)
+    elapsed = time.perf_counter() - start
+    points = (
+        squads.group_by("rank").agg(pl.col("gameweek_points").sum())["gameweek_points"]
+    ).to_numpy()
+    print(
+        f"{type(solver).__name__}: {elapsed:.2f}s for {K} squads, points "
+        f"{points.max():.1f}..{points.min():.1f}"
+    )
+
+# rebuilding the constraints for every solve
+start = time.perf_counter()
+cuts: list[np.ndarray] = []
+for _ in range(K):
+    optimiser = SquadOptimiser(player_data)
+    optimiser.presolve = False
+    for i, cut in enumerate(cuts):
+        optimiser.problem.add_constraint(f"cut_{i}", _dense_row(cut), -np.inf, 14)
+    cuts.append(optimiser._solve().astype(np.float64))
+print(f"rebuilding: {time.perf_counter() - start:.2f}s for {K} squads")
@@ -0,0 +1,63 @@
+"""
+Compares the transfer evaluator's best option with the joint MILP limited to two
+transfers, and the time for each, on the recorded gameweek in the sample data and on
+gameweeks resampled from it
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import JointSquadOptimiser
+from fpl_predictor.squad_selection.transfer_evaluator import evaluate_transfers
+from scratch.sample_data import current_squad, sample_player_data
+
+N_GAMEWEEKS = 38
+
+
+def _gameweeks(player_data: pl.DataFrame, n_gameweeks: int) -> list[pl.DataFrame]:
+    rng = np.random.default_rng(0)
+    points = player_data["gameweek_points"].to_numpy()
+    return [player_data] + [
+        player_data.with_columns(
+            pl.Series(
+                "gameweek_points",
+                np.round(points + rng.normal(0, 2, len(points)), 1),
+            )
+        )
+        for _ in range(n_gameweeks - 1)
+    ]
+
+
+def _compare(n_free_transfers: int) -> None:
+    gaps, times = [], {"joint milp": 0.0, "transfer evaluator": 0.0}
+    for player_data in _gameweeks(sample_player_data, N_GAMEWEEKS):
+        start = time.perf_counter()
+        best = evaluate_transfers(player_data, current_squad, n_free_transfers, k=1)
+        times["transfer evaluator"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        joint_optimiser = JointSquadOptimiser(
+            player_data,
+            current_squad=current_squad,
+            n_substitutions=2,
+            n_free_transfers=n_free_transfers,
+            bench_weight=0,
+        )
+        objective = joint_optimiser.solve().objective
+        times["joint milp"] += time.perf_counter() - start
+        assert objective is not None
+        gaps.append(objective - best["predicted_points"][0])
+    print(
+        f"{n_free_transfers} free transfers: max gap {np.max(np.abs(gaps)):.2g} points; "
+        + ", ".join(
+            f"{label} {elapsed / N_GAMEWEEKS * 1000:.1f}ms"
+            for label, elapsed in times.items()
+        )
+    )
+
+
+if __name__ == "__main__":
+    for n_free_transfers in (1, 2):
+        _compare(n_free_transfers)
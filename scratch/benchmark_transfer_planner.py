@@ -0,0 +1,48 @@
+"""
+Times building and solving the transfer planner for horizons of one to six gameweeks,
+using the sample player pool with random predicted points for each gameweek
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.transfer_planner import TransferPlanner
+
+HORIZONS = range(1, 7)
+
+player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+    "player_id", "team_id", "position", "cost", "gameweek_points"
+)
+current_squad = pl.read_csv("tests/sample_data/sample_squad.csv")
+
+
+def _multi_gameweek_data(n_gameweeks: int, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pl.concat(
+        player_data.with_columns(
+            pl.lit(gw).alias("gameweek"),
+            pl.Series(
+                "gameweek_points", rng.poisson(2, len(player_data)).astype(float)
+            ),
+        )
+        for gw in range(1, n_gameweeks + 1)
+    )
+
+
+if __name__ == "__main__":
+    for n_gameweeks in HORIZONS:
+        planner = TransferPlanner(_multi_gameweek_data(n_gameweeks), current_squad)
+        start = time.perf_counter()
+        problem = planner.problem
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        plan = planner.plan()
+        solve_time = time.perf_counter() - start
+        n_transfers = (plan.transfers["direction"] == "in").sum()
+        print(
+            f"{n_gameweeks} gameweeks: {len(problem.c)} variables, "
+            f"{problem.A.shape[0]} constraints, build {build_time:.2f}s, "
+            f"solve {solve_time:.2f}s, {n_transfers} transfers"
+        )
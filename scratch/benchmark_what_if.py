@@ -0,0 +1,45 @@
+"""
+Compares sweeping 40 what-ifs over budgets and one player's price against building
+a new SquadOptimiser for each question
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+from fpl_predictor.squad_selection.linear_optimisation import SquadOptimiser
+from fpl_predictor.squad_selection.solvers import HighspyBackend, ScipyBackend
+from fpl_predictor.squad_selection.what_if import budget_what_ifs, price_what_ifs, sweep
+
+if __name__ == "__main__":
+    player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+        "player_id", "team_id", "position", "cost", "gameweek_points"
+    )
+    best_player = player_data.sort("gameweek_points", descending=True)["player_id"][0]
+    what_ifs = [
+        *budget_what_ifs(list(np.arange(95.0, 105.0, 0.5))),
+        *price_what_ifs(best_player, list(np.arange(-1.0, 1.0, 0.1))),
+    ]
+
+    start = time.perf_counter()
+    for what_if in what_ifs:
+        data = player_data.with_columns(
+            pl.when(pl.col("player_id").is_in(list(what_if.cost_changes)))
+            .then(pl.col("cost") + sum(what_if.cost_changes.values()))
+            .otherwise(pl.col("cost"))
+        )
+        optimiser = SquadOptimiser(data)
+        if what_if.total_cost is not None:
+            optimiser.total_cost = what_if.total_cost
+        optimiser.optimise()
+    print(f"new optimiser per what-if: {time.perf_counter() - start:.2f}s")
+
+    for solver_class in (ScipyBackend, HighspyBackend):
+        for max_workers in (1, 2):
+            start = time.perf_counter()
+            sweep(SquadOptimiser(player_data), what_ifs, max_workers, solver_class)
+            print(
+                f"sweep with {solver_class.__name__}, {max_workers} workers: "
+                f"{time.perf_counter() - start:.2f}s"
+            )
@@ -0,0 +1,52 @@
+"""
+Compares a single xgboost model with a model per position on the 23/24 season data:
+test set mse, training wall time and predict latency for a gameweek's worth of players
+"""
+
+import time
+import timeit
+
+from sklearn.metrics import mean_squared_error
+
+from fpl_predictor.model_training import load_23_24_season_data, xgboost
+
+N_PREDICTION_WEEKS = 2
+N_ESTIMATORS = 300
+LEARNING_RATE = 0.05
+SINGLE_MODEL_MAX_DEPTH = 8
+POSITION_MODEL_MAX_DEPTH = 4
+
+if __name__ == "__main__":
+    data = load_23_24_season_data.load_data(N_PREDICTION_WEEKS)
+    players = data.test_X.head(700)
+
+    start = time.perf_counter()
+    single_model = xgboost.train(
+        data.train_X,
+        data.train_y,
+        n_estimators=N_ESTIMATORS,
+        max_depth=SINGLE_MODEL_MAX_DEPTH,
+        learning_rate=LEARNING_RATE,
+    )
+    single_model_train_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    position_models = xgboost.train_position_models(
+        data.train_X,
+        data.train_y,
+        n_estimators=N_ESTIMATORS,
+        max_depth=POSITION_MODEL_MAX_DEPTH,
+        learning_rate=LEARNING_RATE,
+    )
+    position_models_train_time = time.perf_counter() - start
+
+    for name, model, train_time in (
+        ("single model", single_model, single_model_train_time),
+        ("position models", position_models, position_models_train_time),
+    ):
+        mse = mean_squared_error(data.test_y, model.predict(data.test_X))
+        n, total = timeit.Timer(lambda: model.predict(players)).autorange()
+        print(
+            f"{name}: {mse=:.3f}, train time {train_time:.1f}s, "
+            f"predict {total / n * 1000:.2f}ms for {len(players)} players"
+        )
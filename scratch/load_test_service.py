@@ -0,0 +1,84 @@
+"""
+Load tests the squad selection service with concurrent clients, reporting the
+throughput and latency percentiles. Without --url a server is started in this process
+on the sample player data, so nothing is fetched.
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from fpl_predictor.squad_selection.service import (
+    SquadSelectionServer,
+    SquadSelectionService,
+)
+from scratch.sample_data import current_squad, sample_player_data
+
+REQUESTS: dict[str, dict[str, Any]] = {
+    "new squad": {"gameweek": 1},
+    "transfers": {
+        "gameweek": 1,
+        "current_squad": current_squad["player_id"].to_list(),
+        "n_free_transfers": 1,
+    },
+    "transfer evaluator": {
+        "gameweek": 1,
+        "current_squad": current_squad["player_id"].to_list(),
+        "n_free_transfers": 1,
+        "squad_selection_method": "transfer_evaluator",
+    },
+}
+
+
+def _post(url: str, body: dict[str, Any]) -> float:
+    request = urllib.request.Request(
+        f"{url}/select_squad",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def _load_test(url: str, body: dict[str, Any], n_clients: int, n_requests: int) -> str:
+    _post(url, body)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_clients) as executor:
+        latencies = np.array(
+            list(executor.map(lambda _: _post(url, body), range(n_requests)))
+        )
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.quantile(latencies, [0.5, 0.95, 0.99]) * 1000
+    return (
+        f"{n_requests / elapsed:.0f} requests/s, latency p50 {p50:.1f}ms "
+        f"p95 {p95:.1f}ms p99 {p99:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", type=str, required=False)
+    parser.add_argument("--n-requests", type=int, default=200)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        server = SquadSelectionServer(
+            ("127.0.0.1", 0),
+            SquadSelectionService(lambda *args, **kwargs: sample_player_data),
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    for name, body in REQUESTS.items():
+        for n_clients in (1, 4, 16):
+            result = _load_test(url, body, n_clients, args.n_requests)
+            print(f"{name}, {n_clients} clients: {result}")
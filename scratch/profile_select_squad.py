@@ -0,0 +1,38 @@
+"""
+Profiles select_squad end to end on the sample player data, with the predictions and
+player availability lookups replaced by the recorded gameweek points
+"""
+
+import cProfile
+import pstats
+import time
+from unittest import mock
+
+import polars as pl
+
+from fpl_predictor.settings import supported_squad_selection_methods
+from fpl_predictor.squad_selection import squad_selection
+
+player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+    "player_id", "team_id", "position", "cost", "gameweek_points"
+)
+current_squad = pl.read_csv("tests/sample_data/sample_squad.csv")
+
+
+def _select_squad() -> None:
+    squad_selection.select_squad(1, current_squad=current_squad, n_free_transfers=1)
+
+
+if __name__ == "__main__":
+    with mock.patch.object(
+        squad_selection, "_get_player_data", return_value=player_data
+    ):
+        for method in supported_squad_selection_methods:
+            with mock.patch.object(squad_selection, "SQUAD_SELECTION_METHOD", method):
+                start = time.perf_counter()
+                _select_squad()
+                print(f"select_squad ({method}): {time.perf_counter() - start:.2f}s")
+
+        profiler = cProfile.Profile()
+        profiler.runcall(_select_squad)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
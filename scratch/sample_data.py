@@ -0,0 +1,29 @@
+"""
+The sample player data and squad from the tests, and a synthetic player pool of any
+size, shared by the benchmarks
+"""
+
+import numpy as np
+import polars as pl
+
+POSITIONS = np.array(["GKP", "DEF", "MID", "FWD"])
+
+sample_player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+    "player_id", "team_id", "position", "cost", "gameweek_points"
+)
+current_squad = pl.read_csv("tests/sample_data/sample_squad.csv")
+
+
+def synthetic_player_data(n_players: int, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    cost = rng.integers(40, 130, n_players) / 10
+    return pl.DataFrame(
+        {
+            "player_id": np.arange(n_players),
+            "team_id": rng.integers(1, 21, n_players),
+            "position": POSITIONS[rng.integers(0, 4, n_players)],
+            "cost": cost,
+            # more expensive players tend to score more
+            "gameweek_points": np.round(rng.gamma(cost / 2, 0.5), 1),
+        }
+    )
@@ -207,3 +207,19 @@ def test_load_data(gw_stats: pl.DataFrame, gw_fixtures: pl.DataFrame) -> None:
     ), mock.patch.object(load_23_24_season_data, "_fixtures", return_value=gw_fixtures):
         response = load_23_24_season_data.load_data(1)
         assert isinstance(response, load_23_24_season_data.TrainTestValData)
+
+
+def test_load_data_feature_columns(
+    gw_stats: pl.DataFrame, gw_fixtures: pl.DataFrame
+) -> None:
+    feature_columns = ["gw_-1_minutes", "gw_-1_team_score", "home_team", "DEF"]
+    with mock.patch.object(
+        load_23_24_season_data, "player_gameweek_stats", return_value=gw_stats
+    ), mock.patch.object(load_23_24_season_data, "_fixtures", return_value=gw_fixtures):
+        response = load_23_24_season_data.load_data(1)
+        pruned_response = load_23_24_season_data.load_data(
+            1, feature_columns=feature_columns
+        )
+    assert pruned_response.train_X.columns == feature_columns
+    assert pruned_response.train_X.equals(response.train_X.select(feature_columns))
+    assert pruned_response.train_y.equals(response.train_y)
@@ -0,0 +1,81 @@
+import io
+
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.model_training import ridge
+
+
+@pytest.fixture
+def linear_data() -> tuple[pl.DataFrame, pl.Series]:
+    rng = np.random.default_rng(1)
+    n = 500
+    X = pl.DataFrame(
+        {
+            "foo": rng.normal(size=n),
+            "bar": rng.normal(loc=5, scale=3, size=n),
+            "home_team": rng.random(n) > 0.5,
+            "constant": np.ones(n),
+        }
+    )
+    y = pl.Series(
+        2 * X["foo"] - 0.5 * X["bar"] + X["home_team"] + 3 + rng.normal(0, 0.1, n)
+    )
+    return X, y
+
+
+def test_train(linear_data: tuple[pl.DataFrame, pl.Series]) -> None:
+    X, y = linear_data
+    model = ridge.train(X, y, alpha=1e-6)
+    assert model.prediction_columns == ("foo", "bar", "home_team", "constant")
+    np.testing.assert_allclose(model.coefficients, [2, -0.5, 1, 0], atol=0.05)
+    assert model.intercept == pytest.approx(3, abs=0.1)
+    assert ridge.mean_squared_error(model, X, y) < 0.02
+
+
+def test_train_shrinks_coefficients(
+    linear_data: tuple[pl.DataFrame, pl.Series]
+) -> None:
+    X, y = linear_data
+    weak, strong = (ridge.train(X, y, alpha=alpha) for alpha in (1e-3, 1e4))
+    assert np.abs(strong.coefficients).sum() < np.abs(weak.coefficients).sum()
+
+
+def test_predict_imputes_missing_values(
+    linear_data: tuple[pl.DataFrame, pl.Series]
+) -> None:
+    X, y = linear_data
+    model = ridge.train(X, y)
+    X_ = X.head(3).cast(pl.Float64).to_numpy()
+    X_[0, 1] = np.nan
+    preds = model.predict(X_)
+    X_[0, 1] = model.feature_means[1]
+    np.testing.assert_allclose(preds, model.predict(X_))
+
+    with pytest.raises(ValueError):
+        model.predict(X_[:, :2])
+
+
+def test_optimise_alpha(linear_data: tuple[pl.DataFrame, pl.Series]) -> None:
+    X, y = linear_data
+    model = ridge.optimise_alpha(
+        X.head(400), y.head(400), X.tail(100), y.tail(100), alphas=(1e-3, 1e5)
+    )
+    expected_model = ridge.train(X.head(400), y.head(400), alpha=1e-3)
+    np.testing.assert_allclose(model.coefficients, expected_model.coefficients)
+
+
+def test_ridge_predictor_save_and_load(
+    linear_data: tuple[pl.DataFrame, pl.Series]
+) -> None:
+    X, y = linear_data
+    model = ridge.train(X, y)
+    fh = io.BytesIO()
+    model.save(fh)
+    fh.seek(0)
+    loaded = ridge.RidgePredictor.load(fh)
+    assert loaded.prediction_columns == model.prediction_columns
+    assert loaded.intercept == model.intercept
+    np.testing.assert_array_equal(loaded.coefficients, model.coefficients)
+    np.testing.assert_array_equal(loaded.feature_means, model.feature_means)
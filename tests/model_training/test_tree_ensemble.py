@@ -0,0 +1,76 @@
+import io
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.datasets import load_diabetes
+
+from fpl_predictor.model_training import tree_ensemble
+from fpl_predictor.model_training.xgboost import PositionModels, XGBoostPredictor
+
+
+@pytest.fixture(scope="module")
+def diabetes_data() -> tuple[np.ndarray, np.ndarray]:
+    diabetes = load_diabetes()
+    X = diabetes.data.copy()
+    X[np.random.default_rng(1).random(X.shape) < 0.1] = (
+        np.nan
+    )  # exercise missing values
+    return X, diabetes.target
+
+
+@pytest.fixture(scope="module")
+def model(diabetes_data: tuple[np.ndarray, np.ndarray]) -> xgb.XGBRegressor:
+    X, y = diabetes_data
+    return xgb.XGBRegressor(n_estimators=50, max_depth=5, random_state=1).fit(X, y)
+
+
+def test_compile_predictor(
+    model: xgb.XGBRegressor, diabetes_data: tuple[np.ndarray, np.ndarray]
+) -> None:
+    X, _ = diabetes_data
+    columns = tuple(f"col_{i}" for i in range(X.shape[1]))
+    compiled = tree_ensemble.compile_predictor(XGBoostPredictor(model, columns))
+    assert compiled.n_trees == 50
+    assert compiled.max_depth == 5
+    assert compiled.prediction_columns == columns
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-5)
+
+
+def test_compiled_tree_ensemble_save_and_load(
+    model: xgb.XGBRegressor, diabetes_data: tuple[np.ndarray, np.ndarray]
+) -> None:
+    X, _ = diabetes_data
+    columns = tuple(f"col_{i}" for i in range(X.shape[1]))
+    compiled = tree_ensemble.compile_booster(model.get_booster(), columns)
+    fh = io.BytesIO()
+    compiled.save(fh)
+    fh.seek(0)
+    loaded = tree_ensemble.CompiledTreeEnsemble.load(fh)
+    assert loaded.prediction_columns == columns
+    assert loaded.max_depth == compiled.max_depth
+    np.testing.assert_array_equal(loaded.predict(X), compiled.predict(X))
+
+
+def test_compiled_tree_ensemble_wrong_shape(
+    model: xgb.XGBRegressor, diabetes_data: tuple[np.ndarray, np.ndarray]
+) -> None:
+    X, _ = diabetes_data
+    compiled = tree_ensemble.compile_booster(model.get_booster(), ("col_0",))
+    with pytest.raises(ValueError):
+        compiled.predict(X)
+
+
+def test_compile_booster_unsupported_objective(
+    diabetes_data: tuple[np.ndarray, np.ndarray]
+) -> None:
+    X, y = diabetes_data
+    model = xgb.XGBRegressor(n_estimators=2, objective="count:poisson").fit(X, y)
+    with pytest.raises(ValueError):
+        tree_ensemble.compile_booster(model.get_booster(), ())
+
+
+def test_compile_predictor_position_models() -> None:
+    predictor = XGBoostPredictor(PositionModels({}), ())
+    with pytest.raises(ValueError):
+        tree_ensemble.compile_predictor(predictor)
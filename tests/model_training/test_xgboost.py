@@ -1,9 +1,13 @@
+from unittest import mock
+
+import numpy as np
 import polars as pl
 import pytest
 import xgboost as xgb
 from sklearn.datasets import load_diabetes
 
 from fpl_predictor.model_training import xgboost
+from fpl_predictor.model_training.position_encoder import POSITIONS
 
 
 @pytest.fixture
@@ -24,3 +28,97 @@ def test_train_and_evaluate(test_data: dict[str, pl.DataFrame | pl.Series]) -> N
 def test_optimise_hyperparameters(test_data: tuple[pl.DataFrame, pl.Series]) -> None:
     model = xgboost.optimise_hyperparameters(**test_data, init_points=1, n_iter=1)  # type: ignore[arg-type]
     assert isinstance(model, xgb.XGBRegressor)
+
+
+def test_feature_importance(test_data: dict[str, pl.DataFrame | pl.Series]) -> None:
+    train_X = test_data["train_X"]
+    assert isinstance(train_X, pl.DataFrame)
+    model = xgboost.train(train_X, test_data["train_y"], n_estimators=10)  # type: ignore[arg-type]
+    importance = xgboost.feature_importance(model, train_X)
+    assert importance.columns == ["feature", "importance"]
+    assert sorted(importance["feature"]) == sorted(train_X.columns)
+    assert (importance["importance"] >= 0).all()
+    assert importance["importance"].is_sorted(descending=True)
+
+
+def test_prune_features(test_data: dict[str, pl.DataFrame | pl.Series]) -> None:
+    train_X = test_data["train_X"].with_columns(pl.lit(0.0).alias("constant"))  # type: ignore[union-attr]
+    model = xgboost.train(train_X, test_data["train_y"], n_estimators=10)  # type: ignore[arg-type]
+    predictor = xgboost.prune_features(model, train_X, test_data["train_y"])  # type: ignore[arg-type]
+    assert isinstance(predictor, xgboost.XGBoostPredictor)
+    assert "constant" not in predictor.prediction_columns
+    assert predictor.model is not model
+    assert isinstance(predictor.model, xgb.XGBRegressor)
+    assert predictor.model.get_params() == model.get_params()
+    preds = predictor.model.predict(
+        test_data["val_X"].select(predictor.prediction_columns)  # type: ignore[union-attr]
+    )
+    assert len(preds) == len(test_data["val_X"])
+
+
+def test_prune_features_nothing_to_prune(
+    test_data: dict[str, pl.DataFrame | pl.Series]
+) -> None:
+    model = xgboost.train(test_data["train_X"], test_data["train_y"], n_estimators=10)  # type: ignore[arg-type]
+    predictor = xgboost.prune_features(
+        model, test_data["train_X"], test_data["train_y"], min_importance=-1  # type: ignore[arg-type]
+    )
+    assert predictor.model is model
+    assert predictor.prediction_columns == tuple(test_data["train_X"].columns)  # type: ignore[union-attr]
+
+
+@pytest.fixture
+def position_data() -> tuple[pl.DataFrame, pl.Series]:
+    rng = np.random.default_rng(1)
+    n = 200
+    positions = rng.choice(POSITIONS, size=n)
+    X = pl.DataFrame(
+        {"foo": rng.normal(size=n), "bar": rng.normal(size=n)}
+        | {pos: (positions == pos).astype(float) for pos in POSITIONS}
+    )
+    y = pl.Series(X["foo"] * (positions == "FWD") + X["bar"])
+    return X, y
+
+
+def test_position_models_predict(position_data: tuple[pl.DataFrame, pl.Series]) -> None:
+    X, _ = position_data
+    models = {}
+    for i, position in enumerate(POSITIONS):
+        models[position] = mock.Mock()
+        models[position].predict.side_effect = lambda df, i=i: np.full(len(df), i)
+    preds = xgboost.PositionModels(models).predict(X)
+    for i, position in enumerate(POSITIONS):
+        rows = (X[position] == 1).to_numpy()
+        assert (preds[rows] == i).all()
+        assert len(models[position].predict.call_args.args[0]) == rows.sum()
+
+
+def test_train_position_models(position_data: tuple[pl.DataFrame, pl.Series]) -> None:
+    X, y = position_data
+    position_models = xgboost.train_position_models(
+        X, y, max_workers=2, n_estimators=5, max_depth=2
+    )
+    assert sorted(position_models.models) == sorted(POSITIONS)
+    for position, model in position_models.models.items():
+        assert isinstance(model, xgb.XGBRegressor)
+        assert model.get_params()["max_depth"] == 2
+        rows = X[position] == 1
+        np.testing.assert_allclose(
+            position_models.predict(X).compress(rows.to_numpy()),
+            model.predict(X.filter(rows)),
+        )
+
+
+def test_optimise_position_hyperparameters(
+    position_data: tuple[pl.DataFrame, pl.Series]
+) -> None:
+    X, y = position_data
+    position_models = xgboost.optimise_position_hyperparameters(
+        X.head(150), y.head(150), X.tail(50), y.tail(50), init_points=1, n_iter=1
+    )
+    assert sorted(position_models.models) == sorted(POSITIONS)
+    for model in position_models.models.values():
+        assert (
+            model.get_params()["max_depth"]
+            <= xgboost.POSITION_MODEL_PBOUNDS["max_depth"][1]
+        )
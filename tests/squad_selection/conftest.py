@@ -0,0 +1,14 @@
+import polars as pl
+import pytest
+
+
+@pytest.fixture(scope="module")
+def player_data() -> pl.DataFrame:
+    return pl.read_csv("tests/sample_data/player_data.csv").select(
+        "player_id", "team_id", "position", "cost", "gameweek_points"
+    )
+
+
+@pytest.fixture(scope="module")
+def current_squad() -> pl.DataFrame:
+    return pl.read_csv("tests/sample_data/sample_squad.csv")
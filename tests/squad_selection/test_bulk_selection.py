@@ -0,0 +1,75 @@
+from unittest import mock
+
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection import bulk_selection
+from fpl_predictor.squad_selection.bulk_selection import select_squads_from_player_data
+from fpl_predictor.squad_selection.squad_selection import select_squad_from_player_data
+from fpl_predictor.squad_selection.transfer_evaluator import (
+    apply_transfers,
+    evaluate_transfers,
+)
+
+
+@pytest.fixture(scope="module")
+def current_squads(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> dict[str, pl.DataFrame]:
+    current_squad = current_squad.select("player_id", "team_id", "position", "cost")
+    transfers = evaluate_transfers(player_data, current_squad, max_transfers=1, k=3)
+    return {"a": current_squad} | {
+        manager: apply_transfers(
+            player_data, current_squad, row["transfers_out"], row["transfers_in"]
+        ).select(current_squad.columns)
+        for manager, row in zip(["b", "c"], transfers.tail(2).iter_rows(named=True))
+    }
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_select_squads_from_player_data(
+    player_data: pl.DataFrame,
+    current_squads: dict[str, pl.DataFrame],
+    max_workers: int,
+) -> None:
+    n_free_transfers = {"a": 1, "b": 2, "c": 1}
+    selection = select_squads_from_player_data(
+        player_data, current_squads, n_free_transfers, max_workers=max_workers
+    )
+    assert selection.squads_per_second > 0
+    assert selection.squads.columns[:2] == ["manager", "expected_points"]
+    for manager, current_squad in current_squads.items():
+        squad, expected_points = select_squad_from_player_data(
+            player_data, current_squad, n_free_transfers=n_free_transfers[manager]
+        )
+        manager_squad = selection.squads.filter(pl.col("manager") == manager)
+        assert manager_squad["expected_points"].to_list() == pytest.approx(
+            [expected_points] * 15
+        )
+        assert manager_squad.drop("manager", "expected_points").equals(squad)
+
+
+def test_select_squads_no_managers(player_data: pl.DataFrame) -> None:
+    assert select_squads_from_player_data(player_data, {}).squads.is_empty()
+
+
+def test_select_squads(
+    player_data: pl.DataFrame, current_squads: dict[str, pl.DataFrame]
+) -> None:
+    with mock.patch.object(
+        bulk_selection, "_get_player_data", return_value=player_data
+    ) as mock_get_player_data:
+        selection = bulk_selection.select_squads(
+            1,
+            current_squads,
+            n_free_transfers=2,
+            squad_selection_method="transfer_evaluator",
+            n_prediction_weeks=3,
+        )
+    mock_get_player_data.assert_called_once_with(
+        1, "median_past_score", n_prediction_weeks=3
+    )
+    expected = select_squads_from_player_data(
+        player_data, current_squads, 2, squad_selection_method="transfer_evaluator"
+    )
+    assert selection.squads.equals(expected.squads)
@@ -3,7 +3,13 @@ import pytest
 from polars.datatypes import Float64, Int32, Int64, Utf8
 
 from fpl_predictor.squad_selection.linear_optimisation import (
+    BENCH_WEIGHT,
     POSITION_MAX_SELECTIONS,
+    PRESELECTION_MAX_SELECTIONS,
+    STARTING_POSITION_MAX_SELECTIONS,
+    STARTING_POSITION_MIN_SELECTIONS,
+    TRANSFER_HIT_COST,
+    JointSquadOptimiser,
     PSCPSquadOptimiser,
     SquadOptimiser,
     StartingTeamOptimiser,
@@ -151,3 +157,225 @@ def test_pscp_squad_optimiser(player_data: pl.DataFrame) -> None:
         )
     df = pscp_squad_optimiser.optimise()
     assert df.shape[0] == 15
+
+
+def test_setters_update_compiled_problem(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    squad_optimiser = SquadOptimiser(player_data, current_squad, n_substitutions=1)
+    squad_optimiser.presolve = False
+    problem = squad_optimiser.problem
+    A = problem.A.copy()
+
+    squad_optimiser.total_cost = 80
+    squad_optimiser.n_substitutions = 3
+    squad_optimiser.n_selections = 14
+    assert squad_optimiser.problem is problem
+    assert (problem.A != A).nnz == 0
+    assert squad_optimiser.cost_constraint.ub == 80  # type: ignore[union-attr]
+    assert squad_optimiser.current_team_constraint.lb == 12  # type: ignore[union-attr]
+    assert squad_optimiser.total_selections_constraint.lb == 14
+
+    squad_optimiser.player_data = player_data.head(100)
+    assert squad_optimiser.problem is not problem
+    assert squad_optimiser.problem.A.shape[1] == 100
+
+    # the presolve depends on the number of players in each position
+    squad_optimiser.presolve = True
+    problem = squad_optimiser.problem
+    squad_optimiser.total_cost = 90
+    assert squad_optimiser.problem is problem
+    squad_optimiser.n_selections = 13
+    assert squad_optimiser.problem is not problem
+
+
+@pytest.mark.parametrize("squad_optimiser_class", (SquadOptimiser, JointSquadOptimiser))
+def test_presolve_keeps_optimal_squad(
+    player_data: pl.DataFrame,
+    current_squad: pl.DataFrame,
+    squad_optimiser_class: type[SquadOptimiser],
+) -> None:
+    for kwargs in ({}, {"current_squad": current_squad, "n_free_transfers": 1}):
+        squad_optimiser = squad_optimiser_class(player_data, **kwargs)  # type: ignore[arg-type]
+        squad_optimiser.presolve = False
+        squad = squad_optimiser.optimise()
+        assert squad_optimiser.n_players == player_data.shape[0]
+
+        squad_optimiser = squad_optimiser_class(player_data, **kwargs)  # type: ignore[arg-type]
+        presolved_squad = squad_optimiser.optimise()
+        assert squad_optimiser.n_players < player_data.shape[0]
+        if "current_squad" in kwargs:
+            assert (
+                current_squad["player_id"]
+                .is_in(squad_optimiser.candidates["player_id"])
+                .all()
+            )
+        assert (
+            presolved_squad["gameweek_points"].sum() == squad["gameweek_points"].sum()
+        )
+
+
+def test_squad_optimiser_max_players_per_team(player_data: pl.DataFrame) -> None:
+    class TwoPerTeamSquadOptimiser(SquadOptimiser):
+        _max_players_per_team = 2
+
+    squad = TwoPerTeamSquadOptimiser(player_data).optimise()
+    assert squad.shape[0] == 15
+    assert (squad.group_by("team_id").len()["len"] <= 2).all()
+
+
+@pytest.mark.parametrize("n_free_transfers", (0, 1, 2))
+def test_squad_optimiser_chooses_n_transfers(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame, n_free_transfers: int
+) -> None:
+    def net_points(squad: pl.DataFrame) -> int:
+        n_transfers = int((~squad["player_id"].is_in(current_squad["player_id"])).sum())
+        hits = max(n_transfers - n_free_transfers, 0)
+        return int(squad["gameweek_points"].sum()) - hits * TRANSFER_HIT_COST
+
+    squad_optimiser = SquadOptimiser(
+        player_data, current_squad, n_free_transfers=n_free_transfers
+    )
+    assert squad_optimiser.current_team_constraint is None
+    assert squad_optimiser.transfers_constraint is not None
+    assert len(squad_optimiser.constraints) == 5
+    squad = squad_optimiser.optimise()
+    assert squad.shape[0] == 15
+
+    # at least as good as the best squad for any fixed number of transfers
+    best_fixed_transfers_points = max(
+        net_points(
+            SquadOptimiser(player_data, current_squad, n_substitutions=n).optimise()
+        )
+        for n in range(0, 16)
+    )
+    assert net_points(squad) == best_fixed_transfers_points
+
+
+def test_pscp_squad_optimiser_counts_preselected_transfers(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    pscp_squad_optimiser = PSCPSquadOptimiser(
+        player_data, current_squad=current_squad, n_free_transfers=1
+    )
+    n_preselected_transfers = (
+        ~pscp_squad_optimiser.selected_players["player_id"].is_in(
+            current_squad["player_id"]
+        )
+    ).sum()
+    assert pscp_squad_optimiser.transfers_constraint.ub == (  # type: ignore[union-attr]
+        1 - n_preselected_transfers
+    )
+    assert pscp_squad_optimiser.optimise().shape[0] == 15
+
+
+def test_joint_squad_optimiser(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    def objective(squad: pl.DataFrame, starting_team: pl.DataFrame) -> float:
+        starting_points = starting_team["gameweek_points"].to_numpy()
+        bench_points = squad["gameweek_points"].to_numpy().sum() - starting_points.sum()
+        return (
+            starting_points.sum() + starting_points.max() + BENCH_WEIGHT * bench_points
+        )
+
+    selection = JointSquadOptimiser(player_data).optimise_selection()
+    assert selection.squad.shape[0] == 15
+    assert selection.starting_team.shape[0] == 11
+    assert (
+        selection.starting_team["player_id"].is_in(selection.squad["player_id"]).all()
+    )
+    assert (
+        selection.captain["player_id"].is_in(selection.starting_team["player_id"]).all()
+    )
+    assert (
+        selection.captain["gameweek_points"].item()
+        == selection.starting_team["gameweek_points"].max()
+    )
+    starting_positions = dict(
+        selection.starting_team["position"].value_counts().iter_rows()
+    )
+    for position, min_selections in STARTING_POSITION_MIN_SELECTIONS.items():
+        n_selections = starting_positions.get(position, 0)
+        assert min_selections <= n_selections
+        assert n_selections <= STARTING_POSITION_MAX_SELECTIONS[position]
+
+    # at least as good as choosing the squad then the starting team
+    squad = SquadOptimiser(player_data).optimise()
+    starting_team = StartingTeamOptimiser(squad).optimise()
+    assert objective(selection.squad, selection.starting_team) >= objective(
+        squad, starting_team
+    )
+
+    selection = JointSquadOptimiser(
+        player_data, current_squad, n_free_transfers=1
+    ).optimise_selection()
+    assert selection.squad.shape[0] == 15
+
+
+@pytest.mark.parametrize("min_hamming_distance", (2, 6))
+def test_squad_optimiser_top_k(
+    player_data: pl.DataFrame, min_hamming_distance: int
+) -> None:
+    squad_optimiser = SquadOptimiser(player_data)
+    best_squad = squad_optimiser.optimise()
+    problem = squad_optimiser.problem
+
+    squads = squad_optimiser.optimise_top_k(5, min_hamming_distance)
+    assert squads["rank"].unique().sort().to_list() == [1, 2, 3, 4, 5]
+    squad_ids = [
+        set(squads.filter(pl.col("rank") == rank)["player_id"]) for rank in range(1, 6)
+    ]
+    points = [
+        int(squads.filter(pl.col("rank") == rank)["gameweek_points"].sum())
+        for rank in range(1, 6)
+    ]
+    assert all(len(ids) == 15 for ids in squad_ids)
+    assert points[0] == best_squad["gameweek_points"].sum()
+    assert points == sorted(points, reverse=True)
+    for i, ids in enumerate(squad_ids):
+        for other_ids in squad_ids[i + 1 :]:
+            assert 2 * len(ids - other_ids) >= min_hamming_distance
+
+    # the cuts aren't left in the problem
+    assert squad_optimiser.presolve
+    assert squad_optimiser.problem.A.shape == problem.A.shape
+    assert squad_optimiser.optimise()["gameweek_points"].sum() == points[0]
+
+
+@pytest.mark.parametrize("players_to_preselect", (1, 4, 10))
+@pytest.mark.parametrize("teams_to_exclude", ((), (1, 2, 3), tuple(range(1, 19))))
+def test_pscp_preselection_matches_greedy_walk(
+    player_data: pl.DataFrame,
+    players_to_preselect: int,
+    teams_to_exclude: tuple[int, ...],
+) -> None:
+    # the players the optimiser used to take by walking the pool in Python
+    taken = {pos: 0 for pos in PRESELECTION_MAX_SELECTIONS}
+    expected_player_ids = []
+    for row in (
+        player_data.filter(~pl.col("team_id").is_in(teams_to_exclude))
+        .sort(
+            ["cost", "gameweek_points"], descending=[False, True], maintain_order=True
+        )
+        .iter_rows(named=True)
+    ):
+        if taken[row["position"]] < PRESELECTION_MAX_SELECTIONS[row["position"]]:
+            taken[row["position"]] += 1
+            expected_player_ids.append(row["player_id"])
+        if len(expected_player_ids) == players_to_preselect:
+            break
+
+    pscp_squad_optimiser = PSCPSquadOptimiser(
+        player_data, players_to_preselect, teams_to_exclude
+    )
+    selected_players = pscp_squad_optimiser.selected_players
+    assert selected_players["player_id"].to_list() == expected_player_ids
+    assert pscp_squad_optimiser.player_data.shape[0] == (
+        player_data.shape[0] - players_to_preselect
+    )
+    for position, n_selected in taken.items():
+        assert (
+            pscp_squad_optimiser.position_max_selections[position]
+            == POSITION_MAX_SELECTIONS[position] - n_selected
+        )
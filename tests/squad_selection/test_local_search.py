@@ -0,0 +1,96 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    MAX_PLAYERS_PER_TEAM,
+    POSITION_MAX_SELECTIONS,
+    SquadOptimiser,
+)
+from fpl_predictor.squad_selection.local_search import (
+    LOCAL_OPTIMUM,
+    LocalSearchSquadOptimiser,
+)
+from fpl_predictor.squad_selection.solvers import FAILED, LIMIT_REACHED, SolveOptions
+
+
+def _assert_legal(squad: pl.DataFrame, total_cost: float = 100) -> None:
+    assert squad.shape[0] == 15
+    assert squad["cost"].sum() <= total_cost + 1e-9
+    assert (squad.group_by("team_id").len()["len"] <= MAX_PLAYERS_PER_TEAM).all()
+    assert dict(squad.group_by("position").len().iter_rows()) == POSITION_MAX_SELECTIONS
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"n_free_transfers": 1},
+        {"n_substitutions": 2},
+    ],
+)
+def test_local_search_squad_optimiser(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame, kwargs: dict
+) -> None:
+    rng = np.random.default_rng(0)
+    if kwargs:
+        kwargs = {**kwargs, "current_squad": current_squad}
+    for _ in range(3):
+        gameweek_points = np.round(
+            player_data["gameweek_points"].to_numpy()
+            + rng.normal(0, 2, player_data.shape[0]),
+            1,
+        )
+        local_search_optimiser = LocalSearchSquadOptimiser(player_data, **kwargs)
+        local_search_optimiser.update_gameweek_points(gameweek_points)
+        result = local_search_optimiser.solve()
+        assert result.selection is not None and result.objective is not None
+        assert result.status == LOCAL_OPTIMUM
+        assert result.bound is None
+        # the heuristic doesn't need the MILP
+        assert local_search_optimiser._problem is None
+        _assert_legal(result.selection)
+
+        milp_optimiser = SquadOptimiser(player_data, **kwargs)
+        milp_optimiser.update_gameweek_points(gameweek_points)
+        expected = milp_optimiser.solve()
+        assert expected.objective is not None
+        assert result.objective <= expected.objective + 1e-6
+        assert result.objective >= 0.98 * expected.objective
+
+        new_players = 15
+        if "current_squad" in kwargs:
+            new_players = int(
+                (~result.selection["player_id"].is_in(current_squad["player_id"])).sum()
+            )
+        if "n_substitutions" in kwargs:
+            assert new_players <= kwargs["n_substitutions"]
+        hits = 4 * max(new_players - kwargs.get("n_free_transfers", new_players), 0)
+        assert result.objective == pytest.approx(
+            result.selection["gameweek_points"].sum() - hits
+        )
+
+
+def test_local_search_limits(player_data: pl.DataFrame) -> None:
+    local_search_optimiser = LocalSearchSquadOptimiser(player_data)
+    local_search_optimiser.total_cost = 90
+    _assert_legal(local_search_optimiser.optimise(), total_cost=90)
+
+    local_search_optimiser.solve_options = SolveOptions(time_limit=0)
+    result = local_search_optimiser.solve()
+    assert result.status == LIMIT_REACHED
+    assert result.selection is not None
+    _assert_legal(result.selection, total_cost=90)
+
+    # no squad is affordable
+    local_search_optimiser.total_cost = 10
+    result = local_search_optimiser.solve()
+    assert result.selection is None
+    assert result.status == FAILED
+    with pytest.raises(AssertionError):
+        local_search_optimiser.optimise()
+
+
+def test_local_search_top_k(player_data: pl.DataFrame) -> None:
+    with pytest.raises(TypeError):
+        LocalSearchSquadOptimiser(player_data).optimise_top_k(3)
@@ -2,10 +2,12 @@ import os
 from unittest import mock
 from unittest.mock import patch
 
+import numpy as np
 import polars as pl
 import pytest
 from polars.testing import assert_frame_equal
 
+from fpl_predictor.model_training.ridge import RidgePredictor
 from fpl_predictor.squad_selection import player_gw_score_prediction
 from fpl_predictor.squad_selection.player_gw_score_prediction import MedianPastScore
 
@@ -141,8 +143,28 @@ def test_xgboost_init() -> None:
         assert xgboost.data == mock_load_data.return_value
 
 
+def test_xgboost_required_player_stats_cols() -> None:
+    mock_model = mock.Mock()
+    mock_model.prediction_columns = (
+        "gw_-1_minutes",
+        "gw_-2_expected_goals_conceded",
+        "gw_-1_team_score",
+        "DEF",
+    )
+    with patch(
+        f"{player_gw_score_prediction.__name__}.XGBoost._load_model",
+        return_value=mock_model,
+    ), patch(f"{player_gw_score_prediction.__name__}.XGBoost._load_data"):
+        xgboost = player_gw_score_prediction.XGBoost(3, 2)
+        assert xgboost._required_player_stats_cols() == (
+            "minutes",
+            "expected_goals_conceded",
+            "player_id",
+        )
+
+
 @pytest.mark.parametrize("raise_exception", (True, False))
-def test_xgboost_load_fixture_data(raise_exception: bool) -> None:
+def test_finished_gameweek_fixture_stats(raise_exception: bool) -> None:
     gameweek = 3
     mock_fixtures = [
         {
@@ -160,20 +182,20 @@ def test_xgboost_load_fixture_data(raise_exception: bool) -> None:
     mock_fixtures.extend([i | {"event": gameweek - 2} for i in mock_fixtures])
     if raise_exception:
         mock_fixtures[-1]["finished"] = False
-    with patch(f"{player_gw_score_prediction.__name__}.XGBoost._load_model"), patch(
-        f"{player_gw_score_prediction.__name__}.XGBoost._load_data"
-    ), patch(
+    with patch(
         f"{player_gw_score_prediction.__name__}.get_fixtures",
         return_value=mock_fixtures,
     ):
-        xgboost = player_gw_score_prediction.XGBoost(gameweek, 2)
+        gameweeks = [gameweek - 1, gameweek - 2]
         if raise_exception:
             with pytest.raises(ValueError):
-                xgboost._load_fixture_data()
+                player_gw_score_prediction._finished_gameweek_fixture_stats(gameweeks)
         else:
-            response = xgboost._load_fixture_data()
+            response = player_gw_score_prediction._finished_gameweek_fixture_stats(
+                gameweeks
+            )
             assert isinstance(response, dict)
-            assert sorted(response.keys()) == ["gw_-1", "gw_-2"]
+            assert sorted(response.keys()) == [gameweek - 2, gameweek - 1]
             for v in response.values():
                 assert isinstance(v, pl.DataFrame)
                 assert v.shape == (20, 6)
@@ -190,11 +212,9 @@ def test_xgboost_load_fixture_data(raise_exception: bool) -> None:
 def test_xgboost_load_model() -> None:
     mock_fs = mock.MagicMock()
     n_prediction_weeks = 2
-    with patch(
-        f"{player_gw_score_prediction.__name__}.s3fs.S3FileSystem", return_value=mock_fs
-    ), patch(f"{player_gw_score_prediction.__name__}.XGBoost._load_data"), patch(
-        f"{player_gw_score_prediction.__name__}.joblib.load"
-    ) as mock_joblib_load:
+    with patch("s3fs.S3FileSystem", return_value=mock_fs), patch(
+        f"{player_gw_score_prediction.__name__}.XGBoost._load_data"
+    ), patch("joblib.load") as mock_joblib_load:
         xgboost = player_gw_score_prediction.XGBoost(3, n_prediction_weeks)
         assert xgboost.model == mock_joblib_load.return_value
         mock_fs.open.assert_called_once_with(
@@ -234,3 +254,166 @@ def test_xgboost_predict_gw_scores(raise_exception: bool) -> None:
                 response,
                 pl.DataFrame({"player_id": [1, 2, 3], "gameweek_points": [1, 2, 3]}),
             )
+
+
+def test_compiled_xgboost_load_model() -> None:
+    mock_fs = mock.MagicMock()
+    n_prediction_weeks = 2
+    with patch("s3fs.S3FileSystem", return_value=mock_fs), patch(
+        f"{player_gw_score_prediction.__name__}.CompiledXGBoost._load_data"
+    ), patch(
+        f"{player_gw_score_prediction.__name__}.CompiledTreeEnsemble.load"
+    ) as mock_load:
+        xgboost = player_gw_score_prediction.CompiledXGBoost(3, n_prediction_weeks)
+        assert xgboost.model == mock_load.return_value
+        mock_fs.open.assert_called_once_with(
+            "s3://fpl-prediction-models/xgboost/xgboost_2_prediction_week.npz", "rb"
+        )
+
+
+def test_compiled_xgboost_predict_gw_scores() -> None:
+    mock_model = mock.Mock()
+    mock_model.prediction_columns = ("foo", "bar")
+    mock_model.predict.return_value = np.array([1.0, 2.0, 3.0], dtype=np.float32)
+    mock_data = pl.DataFrame(
+        {"player_id": [1, 2, 3], "foo": [1, 2, 3], "bar": [True, False, None]}
+    )
+    with patch(
+        f"{player_gw_score_prediction.__name__}.CompiledXGBoost._load_model",
+        return_value=mock_model,
+    ), patch(
+        f"{player_gw_score_prediction.__name__}.CompiledXGBoost._load_data",
+        return_value=mock_data,
+    ):
+        xgboost = player_gw_score_prediction.CompiledXGBoost(3, 2)
+        response = xgboost.predict_gw_scores()
+        (X,) = mock_model.predict.call_args.args
+        np.testing.assert_array_equal(
+            X, np.array([[1, 1], [2, 0], [3, np.nan]], dtype=np.float32)
+        )
+        assert response["player_id"].to_list() == [1, 2, 3]
+        assert response["gameweek_points"].to_list() == [1.0, 2.0, 3.0]
+
+
+def test_multi_gameweek_xgboost() -> None:
+    n_teams, players_per_team = 20, 2
+    fixtures = [
+        {
+            "team_a": i,
+            "team_h": i + 10,
+            "team_h_difficulty": 2,
+            "team_a_difficulty": 3,
+            "team_a_score": gw,
+            "team_h_score": i,
+            "finished": True,
+            "event": gw,
+        }
+        for gw in range(1, 6)
+        for i in range(1, 11)
+    ]
+    player_data = pl.DataFrame(
+        {
+            "player_id": list(range(n_teams * players_per_team)),
+            "team_id": [i // players_per_team + 1 for i in range(40)],
+            "position": ["GKP", "DEF", "MID", "FWD"] * 10,
+        }
+    )
+
+    def mock_get_player_gameweek_stats(
+        gameweek: int, cols: tuple[str, ...]
+    ) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "player_id": player_data["player_id"],
+                "minutes": [90 - gameweek] * 40,
+                "gameweek_points": [gameweek + i for i in range(40)],
+            }
+        ).select(cols)
+
+    mock_model = mock.Mock()
+    mock_model.prediction_columns = (
+        "gw_-1_minutes",
+        "gw_-2_gameweek_points",
+        "gw_-1_team_score",
+        "home_team",
+        "DEF",
+    )
+    mock_model.model.predict.side_effect = lambda X: np.arange(len(X), dtype=float)
+    with patch(
+        f"{player_gw_score_prediction.__name__}.get_player_gameweek_stats",
+        side_effect=mock_get_player_gameweek_stats,
+    ) as mock_get_stats, patch(
+        f"{player_gw_score_prediction.__name__}.get_player_data",
+        return_value=player_data,
+    ), patch(
+        f"{player_gw_score_prediction.__name__}.get_fixtures", return_value=fixtures
+    ), patch(
+        f"{player_gw_score_prediction.__name__}.XGBoost._load_model",
+        return_value=mock_model,
+    ):
+        batched = player_gw_score_prediction.MultiGameweekXGBoost([5, 4], 2)
+        assert batched.gameweeks == (4, 5)
+        # gameweeks 2, 3 and 4 are each only fetched once
+        assert sorted(i.args[0] for i in mock_get_stats.call_args_list) == [2, 3, 4]
+
+        for gw in batched.gameweeks:
+            single = player_gw_score_prediction.XGBoost(gw, 2)
+            assert_frame_equal(
+                batched.data.filter(pl.col("gameweek") == gw)
+                .drop("gameweek")
+                .sort("player_id"),
+                single.data.sort("player_id"),
+            )
+
+        mock_model.model.predict.reset_mock()
+        response = batched.predict_gw_scores()
+        mock_model.model.predict.assert_called_once()
+        assert response.columns == ["player_id", "gameweek", "gameweek_points"]
+        assert response.shape == (80, 3)
+        assert response.group_by("gameweek").len().sort("gameweek")[
+            "len"
+        ].to_list() == [
+            40,
+            40,
+        ]
+
+        # gameweek 5 needs the results of gameweek 4, which haven't come in yet
+        for fixture in fixtures:
+            fixture["finished"] = fixture["event"] < 4
+        with pytest.raises(ValueError, match=r"Gameweeks \[4\] haven't finished"):
+            player_gw_score_prediction.MultiGameweekXGBoost([4, 5], 2)
+
+
+def test_ridge_load_model() -> None:
+    mock_fs = mock.MagicMock()
+    with patch("s3fs.S3FileSystem", return_value=mock_fs), patch(
+        f"{player_gw_score_prediction.__name__}.Ridge._load_data"
+    ), patch(f"{player_gw_score_prediction.__name__}.RidgePredictor.load") as mock_load:
+        predictor = player_gw_score_prediction.Ridge(3, 2)
+        assert predictor.model == mock_load.return_value
+        mock_fs.open.assert_called_once_with(
+            "s3://fpl-prediction-models/ridge/ridge_2_prediction_week.npz", "rb"
+        )
+
+
+def test_ridge_predict_gw_scores() -> None:
+    model = RidgePredictor(
+        coefficients=np.array([1.0, 2.0]),
+        intercept=0.5,
+        feature_means=np.array([0.0, 10.0]),
+        prediction_columns=("foo", "bar"),
+    )
+    mock_data = pl.DataFrame(
+        {"player_id": [1, 2, 3], "foo": [1, 2, 3], "bar": [True, False, None]}
+    )
+    with patch(
+        f"{player_gw_score_prediction.__name__}.Ridge._load_model", return_value=model
+    ), patch(
+        f"{player_gw_score_prediction.__name__}.Ridge._load_data",
+        return_value=mock_data,
+    ):
+        response = player_gw_score_prediction.Ridge(3, 2).predict_gw_scores()
+        assert_frame_equal(
+            response,
+            pl.DataFrame({"player_id": [1, 2, 3], "gameweek_points": [3.5, 2.5, 23.5]}),
+        )
@@ -0,0 +1,58 @@
+import numpy as np
+
+from fpl_predictor.squad_selection.presolve import undominated_players
+
+
+def test_undominated_players() -> None:
+    # one position, at most two selected, players in order of points and cost
+    gameweek_points = np.array([10.0, 9.0, 8.0, 8.0, 1.0])
+    cost = np.array([5.0, 5.0, 5.0, 4.0, 10.0])
+    position_codes = np.zeros(5, dtype=np.intp)
+    position_max_selections = np.array([2])
+
+    keep = undominated_players(
+        gameweek_points, cost, position_codes, position_max_selections, 2
+    )
+    # the cheaper player with 8 points is only dominated by the first
+    assert keep.tolist() == [True, True, False, True, False]
+
+    protected = np.array([False, False, False, False, True])
+    keep = undominated_players(
+        gameweek_points,
+        cost,
+        position_codes,
+        position_max_selections,
+        2,
+        protected=protected,
+    )
+    assert keep.tolist() == [True, True, False, True, True]
+
+
+def test_undominated_players_with_team_limit() -> None:
+    # the dominating players are all in one team, which could already be full
+    gameweek_points = np.array([10.0, 9.0, 8.0, 1.0])
+    cost = np.ones(4)
+    position_codes = np.zeros(4, dtype=np.intp)
+    team_codes = np.array([0, 0, 0, 1])
+
+    keep = undominated_players(
+        gameweek_points, cost, position_codes, np.array([1]), 4, team_codes, 3
+    )
+    assert keep.tolist() == [True, False, False, True]
+
+    keep = undominated_players(gameweek_points, cost, position_codes, np.array([1]), 1)
+    assert keep.tolist() == [True, False, False, False]
+
+
+def test_undominated_players_with_scenarios() -> None:
+    # the second player scores less on average but more in the second scenario
+    gameweek_points = np.array([[10.0, 0.0], [4.0, 2.0], [4.0, 0.0]])
+    cost = np.ones(3)
+    position_codes = np.zeros(3, dtype=np.intp)
+
+    keep = undominated_players(gameweek_points, cost, position_codes, np.array([1]), 1)
+    assert keep.tolist() == [True, True, False]
+    keep = undominated_players(
+        gameweek_points.mean(axis=1), cost, position_codes, np.array([1]), 1
+    )
+    assert keep.tolist() == [True, False, False]
@@ -0,0 +1,64 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import SquadOptimiser
+from fpl_predictor.squad_selection.scenario_optimisation import (
+    ScenarioSquadOptimiser,
+    conditional_value_at_risk,
+)
+
+
+@pytest.fixture(scope="module")
+def scenario_points(player_data: pl.DataFrame) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    points = np.maximum(player_data["gameweek_points"].to_numpy(), 0)
+    # the best players are the most uncertain
+    spread = np.where(points >= 6, 10.0, 0.5) * (points > 0)
+    return points + spread * rng.standard_normal((50, len(points)))
+
+
+def test_conditional_value_at_risk() -> None:
+    points = np.array([4.0, 2.0, 3.0, 1.0])
+    assert conditional_value_at_risk(points, 0.5) == pytest.approx(1.5)
+    assert conditional_value_at_risk(points, 0.3) == pytest.approx(1.4 / 1.2)
+    assert conditional_value_at_risk(points, 1) == pytest.approx(2.5)
+    with pytest.raises(ValueError):
+        conditional_value_at_risk(points, 0)
+
+
+def test_scenario_squad_optimiser(
+    player_data: pl.DataFrame, scenario_points: np.ndarray
+) -> None:
+    scenario_optimiser = ScenarioSquadOptimiser(player_data, scenario_points)
+    assert scenario_optimiser.cvar_constraint is None
+    squad = scenario_optimiser.optimise()
+    expected_points = scenario_points.mean(axis=0)
+    assert squad.shape[0] == 15
+    assert squad["gameweek_points"].sum() == pytest.approx(
+        SquadOptimiser(
+            player_data.with_columns(pl.Series("gameweek_points", expected_points))
+        )
+        .optimise()["gameweek_points"]
+        .sum()
+    )
+
+    cvar = conditional_value_at_risk(scenario_optimiser.squad_scenario_points(squad))
+    scenario_optimiser.min_cvar = cvar + 10
+    assert scenario_optimiser.cvar_constraint is not None
+    safer_squad = scenario_optimiser.optimise()
+    assert safer_squad.shape[0] == 15
+    assert (
+        conditional_value_at_risk(scenario_optimiser.squad_scenario_points(safer_squad))
+        >= cvar + 10 - 1e-6
+    )
+    assert safer_squad["gameweek_points"].sum() < squad["gameweek_points"].sum()
+
+    # without the presolve the same squad is optimal
+    scenario_optimiser.presolve = False
+    assert scenario_optimiser.optimise()["gameweek_points"].sum() == pytest.approx(
+        safer_squad["gameweek_points"].sum()
+    )
+
+    with pytest.raises(ValueError):
+        ScenarioSquadOptimiser(player_data, scenario_points[:, 1:])
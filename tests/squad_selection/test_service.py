@@ -0,0 +1,150 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from typing import Any, Iterator
+from unittest import mock
+
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection import service as service_module
+from fpl_predictor.squad_selection.service import (
+    SquadSelectionServer,
+    SquadSelectionService,
+)
+
+
+@pytest.fixture
+def load_player_data(player_data: pl.DataFrame) -> mock.Mock:
+    return mock.Mock(return_value=player_data)
+
+
+@pytest.fixture
+def server_url(load_player_data: mock.Mock) -> Iterator[str]:
+    server = SquadSelectionServer(
+        ("127.0.0.1", 0), SquadSelectionService(load_player_data)
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url: str, body: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+    request = urllib.request.Request(
+        f"{url}/select_squad",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_select_squad(
+    server_url: str,
+    load_player_data: mock.Mock,
+    player_data: pl.DataFrame,
+    current_squad: pl.DataFrame,
+) -> None:
+    status, response = _post(server_url, {"gameweek": 1})
+    assert status == 200
+    assert len(response["squad"]) == 15
+    assert sum(player["starting"] for player in response["squad"]) == 11
+
+    status, by_ids = _post(
+        server_url,
+        {
+            "gameweek": 1,
+            "current_squad": current_squad["player_id"].to_list(),
+            "n_free_transfers": 2,
+            "squad_selection_method": "transfer_evaluator",
+        },
+    )
+    assert status == 200
+    # the player data is loaded once for each gameweek and prediction method
+    load_player_data.assert_called_once_with(1, "median_past_score")
+    status, by_records = _post(
+        server_url,
+        {
+            "gameweek": 1,
+            "current_squad": current_squad.select(
+                "player_id", "team_id", "position", "cost"
+            ).to_dicts(),
+            "n_free_transfers": 2,
+            "squad_selection_method": "joint",
+        },
+    )
+    assert status == 200
+    assert by_ids["expected_points"] == pytest.approx(by_records["expected_points"])
+
+    _post(server_url, {"gameweek": 2, "n_prediction_weeks": 3})
+    load_player_data.assert_called_with(2, "median_past_score", n_prediction_weeks=3)
+
+    with urllib.request.urlopen(f"{server_url}/status") as response:
+        assert json.loads(response.read())["loaded"] == [
+            {"gameweek": 1, "prediction_method": "median_past_score"},
+            {
+                "gameweek": 2,
+                "prediction_method": "median_past_score",
+                "n_prediction_weeks": 3,
+            },
+        ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"gameweek": 1, "squad_selection_method": "invalid"},
+        {"gameweek": 1, "current_squad": [-1]},
+        {"gameweek": 1, "squad_selection_method": "transfer_evaluator"},
+        {"gameweek": 1, "unknown_field": 1},
+    ],
+)
+def test_select_squad_bad_request(server_url: str, body: dict[str, Any]) -> None:
+    status, response = _post(server_url, body)
+    assert status == 400
+    assert "error" in response
+
+
+def test_refresh(player_data: pl.DataFrame, load_player_data: mock.Mock) -> None:
+    service = SquadSelectionService(load_player_data)
+    service.player_data(1, "median_past_score")
+    refreshed_player_data = player_data.with_columns(pl.col("gameweek_points") + 1)
+    load_player_data.return_value = refreshed_player_data
+    assert service.player_data(1, "median_past_score") is player_data
+
+    service.refresh()
+    assert service.player_data(1, "median_past_score") is refreshed_player_data
+    assert service.refreshed_at is not None
+
+    # a failed refresh keeps the old data
+    load_player_data.side_effect = RuntimeError
+    service.refresh()
+    assert service.player_data(1, "median_past_score") is refreshed_player_data
+
+
+def test_load_player_data() -> None:
+    with mock.patch.object(
+        service_module, "get_player_data"
+    ) as mock_get_player_data, mock.patch.object(
+        service_module, "get_fixtures"
+    ) as mock_get_fixtures, mock.patch.object(
+        service_module.squad_selection._get_player_data, "__wrapped__"
+    ) as mock_uncached_get_player_data:
+        # the caches aren't read by another load while they're refilled
+        mock_uncached_get_player_data.side_effect = (
+            lambda *args, **kwargs: service_module._cache_lock.locked()
+        )
+        assert service_module._load_player_data(1, "xgboost", n_prediction_weeks=3)
+        assert not service_module._cache_lock.locked()
+        mock_get_player_data.cache_clear.assert_called_once()
+        mock_get_fixtures.cache_clear.assert_called_once()
+        mock_uncached_get_player_data.assert_called_once_with(
+            1, "xgboost", n_prediction_weeks=3
+        )
@@ -0,0 +1,133 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    STARTING_POSITION_MAX_SELECTIONS,
+    STARTING_POSITION_MIN_SELECTIONS,
+)
+from fpl_predictor.squad_selection.simulation import PointsSimulator, summarise
+from fpl_predictor.squad_selection.squad_scoring import SquadScorer
+from fpl_predictor.squad_selection.starting_team import POSITIONS
+
+
+def _reference_points(
+    positions: list[str],
+    appeared: list[bool],
+    points: list[float],
+    captain: int,
+    vice_captain: int,
+) -> tuple[float, float]:
+    """
+    One draw of a squad in substitution order, with substitutes coming on one at a
+    time for the first missing starter they can replace
+    """
+    formation = {pos: positions[:11].count(pos) for pos in POSITIONS}
+    missing = [slot for slot in range(11) if not appeared[slot]]
+    counted = [slot for slot in range(11) if appeared[slot]]
+    for bench_slot in range(11, 15):
+        if not appeared[bench_slot]:
+            continue
+        in_position = positions[bench_slot]
+        for slot in missing:
+            out_position = positions[slot]
+            if (out_position == "GKP") != (in_position == "GKP"):
+                continue
+            if out_position != in_position and not (
+                formation[out_position] > STARTING_POSITION_MIN_SELECTIONS[out_position]
+                and formation[in_position]
+                < STARTING_POSITION_MAX_SELECTIONS[in_position]
+            ):
+                continue
+            missing.remove(slot)
+            formation[out_position] -= 1
+            formation[in_position] += 1
+            counted.append(bench_slot)
+            break
+    armband = captain if captain in counted else vice_captain
+    total = sum(points[slot] for slot in counted)
+    if armband in counted:
+        total += points[armband]
+    return total, sum(points[slot] for slot in counted if slot >= 11)
+
+
+def test_points_simulator(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    # with every player appearing and no noise each draw is the predicted points
+    simulator = PointsSimulator(
+        player_data.with_columns(pl.lit(1.0).alias("appearance_probability")),
+        current_squad=current_squad,
+        points_sd=0,
+        n_draws=10,
+    )
+    squads = simulator.scorer.squad_matrix(
+        [
+            current_squad["player_id"].to_list(),
+            current_squad["player_id"].to_list()[:-2]
+            + player_data.filter(
+                ~pl.col("player_id").is_in(current_squad["player_id"])
+                & (pl.col("position") == "DEF")
+            )["player_id"].to_list()[:2],
+        ]
+    )
+    simulated_points = simulator.simulate(squads)
+    assert simulated_points.points == pytest.approx(
+        np.repeat(simulator.scorer.score(squads).points[:, np.newaxis], 10, axis=1)
+    )
+    assert (simulated_points.bench_points == 0).all()
+
+    # some starters miss each gameweek
+    simulator = PointsSimulator(player_data, n_draws=100_000, seed=0)
+    simulated_points = simulator.simulate_squad(current_squad)
+    starting_points = SquadScorer(player_data).score(
+        simulator.scorer.squad_matrix([current_squad["player_id"].to_list()])
+    )
+    summary = summarise(simulated_points)
+    assert summary.shape == (1, 7)
+    assert (simulated_points.bench_points > 0).any()
+    assert summary["cvar"][0] < summary["p10"][0] < summary["mean"][0]
+    # substitutes add points to the starting team's, but the captain may not play
+    assert summary["mean"][0] > 0.9 * starting_points.points[0]
+
+    # players in the same team move together, so squads with several vary more
+    independent = PointsSimulator(player_data, team_correlation=0, seed=0)
+    assert (
+        summary["std"][0]
+        > summarise(independent.simulate_squad(current_squad))["std"][0]
+    )
+
+    short_squads = squads.copy()
+    short_squads[0, np.flatnonzero(squads[0])[0]] = False
+    with pytest.raises(ValueError):
+        simulator.simulate(short_squads)
+    with pytest.raises(ValueError):
+        PointsSimulator(player_data, team_correlation=2)
+
+
+def test_points_simulator_substitutions(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    simulator = PointsSimulator(
+        player_data.with_columns(pl.lit(0.6).alias("appearance_probability")),
+        n_draws=500,
+        seed=1,
+    )
+    squads = simulator.scorer.squad_matrix([current_squad["player_id"].to_list()])
+    simulated_points = simulator.simulate(squads)
+
+    players = np.flatnonzero(squads[0])
+    appeared, points = simulator._draw(players)
+    slots, captain, vice_captain = simulator._slots(squads)
+    rows = np.searchsorted(players, slots[0])
+    positions = player_data["position"].gather(slots[0]).to_list()
+    for draw in range(simulator.n_draws):
+        total, bench_points = _reference_points(
+            positions,
+            appeared[rows, draw].tolist(),
+            points[rows, draw].tolist(),
+            int(captain[0]),
+            int(vice_captain[0]),
+        )
+        assert simulated_points.points[0, draw] == pytest.approx(total)
+        assert simulated_points.bench_points[0, draw] == pytest.approx(bench_points)
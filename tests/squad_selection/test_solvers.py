@@ -0,0 +1,201 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    JointSquadOptimiser,
+    PSCPSquadOptimiser,
+    SquadOptimiser,
+)
+from fpl_predictor.squad_selection.solvers import (
+    INFEASIBLE,
+    LIMIT_REACHED,
+    OPTIMAL,
+    ScipyBackend,
+    SolveOptions,
+    SolverBackend,
+)
+
+
+def test_update_gameweek_points(player_data: pl.DataFrame) -> None:
+    squad_optimiser = SquadOptimiser(player_data)
+    squad_optimiser.presolve = False
+    problem = squad_optimiser.problem
+
+    gameweek_points = np.arange(player_data.shape[0], dtype=np.float64)
+    squad_optimiser.update_gameweek_points(gameweek_points)
+    assert squad_optimiser.problem is problem
+    assert np.array_equal(problem.c, -gameweek_points)
+
+    squad_optimiser.presolve = True
+    squad_optimiser.update_gameweek_points(gameweek_points)
+    assert squad_optimiser.problem is not problem
+
+
+def test_add_constraint(player_data: pl.DataFrame) -> None:
+    squad_optimiser = SquadOptimiser(player_data)
+    squad_optimiser.presolve = False
+    problem = squad_optimiser.problem
+    n_rows, A = problem.n_rows, problem.A
+    cuts = np.eye(3, problem.A.shape[1])
+    problem.add_constraint("cut_0", cuts[:1], -np.inf, 0)
+    problem.add_constraint("cut_1", cuts[1:], -np.inf, 0)
+    # the appended rows are only stacked into the matrix when it's read
+    assert problem.n_rows == n_rows + 3
+    assert np.array_equal(problem.rows_from(n_rows + 1).toarray(), cuts[1:])
+    assert np.array_equal(problem.coefficients(), np.append(A.data, np.ones(3)))
+    assert problem.A.shape[0] == n_rows + 3
+    assert np.array_equal(problem.A[n_rows:].toarray(), cuts)
+    assert np.array_equal(problem.rows_from(n_rows - 1).toarray()[1:], cuts)
+    assert np.array_equal(problem.constraint("cut_1").A.toarray(), cuts[1:])
+
+
+def test_solver_per_optimiser(player_data: pl.DataFrame) -> None:
+    # a backend may keep a live model, so optimisers mustn't share one
+    assert SquadOptimiser(player_data).solver is not SquadOptimiser(player_data).solver
+    solver = ScipyBackend()
+    assert JointSquadOptimiser(player_data, solver=solver).solver is solver
+
+
+def test_highspy_backend(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    pytest.importorskip("highspy")
+    from fpl_predictor.squad_selection.solvers import HighspyBackend
+
+    rng = np.random.default_rng(0)
+    highspy_optimiser = JointSquadOptimiser(
+        player_data,
+        current_squad=current_squad,
+        n_free_transfers=1,
+        solver=HighspyBackend(),
+    )
+    highspy_optimiser.presolve = False
+    for total_cost in (100, 95, 90):
+        gameweek_points = player_data["gameweek_points"].to_numpy() + rng.normal(
+            0, 1, player_data.shape[0]
+        )
+        # re-solves the live model after changing bounds and the objective
+        highspy_optimiser.total_cost = total_cost
+        highspy_optimiser.update_gameweek_points(gameweek_points)
+        squad = highspy_optimiser.optimise()
+
+        scipy_optimiser = JointSquadOptimiser(
+            player_data,
+            current_squad=current_squad,
+            n_free_transfers=1,
+            solver=ScipyBackend(),
+        )
+        scipy_optimiser.total_cost = total_cost
+        scipy_optimiser.update_gameweek_points(gameweek_points)
+        expected_squad = scipy_optimiser.optimise()
+
+        assert squad["cost"].sum() <= total_cost
+        assert squad["gameweek_points"].sum() == pytest.approx(
+            expected_squad["gameweek_points"].sum()
+        )
+
+
+def test_highspy_backend_top_k(player_data: pl.DataFrame) -> None:
+    pytest.importorskip("highspy")
+    from fpl_predictor.squad_selection.solvers import HighspyBackend
+
+    highspy_optimiser = SquadOptimiser(player_data, solver=HighspyBackend())
+    # the cuts are added to the live model
+    squads = highspy_optimiser.optimise_top_k(10, min_hamming_distance=4)
+    expected_squads = SquadOptimiser(player_data).optimise_top_k(
+        10, min_hamming_distance=4
+    )
+    assert (
+        squads.group_by("rank").agg(pl.col("gameweek_points").sum()).sort("rank")
+    ).equals(
+        expected_squads.group_by("rank")
+        .agg(pl.col("gameweek_points").sum())
+        .sort("rank")
+    )
+
+
+def test_highspy_backend_update_costs(player_data: pl.DataFrame) -> None:
+    pytest.importorskip("highspy")
+    from fpl_predictor.squad_selection.solvers import HighspyBackend
+
+    highspy_optimiser = SquadOptimiser(player_data, solver=HighspyBackend())
+    highspy_optimiser.presolve = False
+    problem = highspy_optimiser.problem
+    highspy_optimiser.optimise()
+
+    # the best players become unaffordable in the live model
+    cost = player_data["cost"].to_numpy() + 20 * (
+        player_data["gameweek_points"].to_numpy() >= 8
+    )
+    highspy_optimiser.update_costs(cost)
+    assert highspy_optimiser.problem is problem
+    squad = highspy_optimiser.optimise()
+
+    scipy_optimiser = SquadOptimiser(player_data.with_columns(pl.Series("cost", cost)))
+    expected_squad = scipy_optimiser.optimise()
+    assert squad["cost"].sum() <= 100
+    assert squad["gameweek_points"].sum() == expected_squad["gameweek_points"].sum()
+
+    with pytest.raises(ValueError):
+        problem.set_coefficients("cost", np.zeros((1, player_data.shape[0])))
+
+
+def test_solve(player_data: pl.DataFrame) -> None:
+    squad_optimiser = SquadOptimiser(player_data)
+    result = squad_optimiser.solve()
+    assert result.status == OPTIMAL
+    assert result.selection is not None
+    assert result.objective == pytest.approx(result.selection["gameweek_points"].sum())
+    assert result.objective is not None and result.bound is not None
+    assert result.bound >= result.objective - 1e-6
+
+    # no squad is affordable, which is reported rather than raised
+    squad_optimiser.total_cost = 10
+    result = squad_optimiser.solve()
+    assert result.selection is None
+    assert result.status == INFEASIBLE
+    with pytest.raises(AssertionError):
+        squad_optimiser.optimise()
+
+
+def test_pscp_solve(player_data: pl.DataFrame) -> None:
+    pscp_squad_optimiser = PSCPSquadOptimiser(player_data)
+    result = pscp_squad_optimiser.solve()
+    assert result.selection is not None and result.selection.shape[0] == 15
+    # the preselected players are in the selection, so their points count too
+    assert result.objective == pytest.approx(result.selection["gameweek_points"].sum())
+    assert result.objective is not None and result.bound is not None
+    assert result.bound >= result.objective - 1e-6
+
+
+@pytest.mark.parametrize("backend", ["scipy", "highspy"])
+def test_solve_options(player_data: pl.DataFrame, backend: str) -> None:
+    solver: SolverBackend = ScipyBackend()
+    if backend == "highspy":
+        pytest.importorskip("highspy")
+        from fpl_predictor.squad_selection.solvers import HighspyBackend
+
+        solver = HighspyBackend()
+    squad_optimiser = SquadOptimiser(
+        player_data, solver=solver, solve_options=SolveOptions(node_limit=1)
+    )
+    squad_optimiser.presolve = False
+    expected_points = SquadOptimiser(player_data).solve().objective
+    assert expected_points is not None
+
+    result = squad_optimiser.solve()
+    assert result.status in (OPTIMAL, LIMIT_REACHED)
+    if result.selection is not None:
+        assert result.objective is not None
+        assert result.selection["cost"].sum() <= 100
+        assert result.objective == pytest.approx(
+            result.selection["gameweek_points"].sum()
+        )
+        assert result.objective <= expected_points + 1e-6
+
+    # a loose gap still gives a squad within it
+    squad_optimiser.solve_options = SolveOptions(time_limit=60, mip_rel_gap=0.05)
+    result = squad_optimiser.solve()
+    assert result.selection is not None and result.objective is not None
+    assert result.objective >= 0.95 * expected_points - 1e-6
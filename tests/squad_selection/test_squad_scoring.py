@@ -0,0 +1,93 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import StartingTeamOptimiser
+from fpl_predictor.squad_selection.squad_scoring import SquadScorer
+
+
+@pytest.fixture(scope="module")
+def player_data() -> pl.DataFrame:
+    rng = np.random.default_rng(0)
+    player_data = pl.read_csv("tests/sample_data/player_data.csv").select(
+        "player_id", "team_id", "position", "cost", "gameweek_points"
+    )
+    return player_data.with_columns(
+        pl.Series(
+            "gameweek_points",
+            np.round(
+                player_data["gameweek_points"].to_numpy()
+                + rng.normal(0, 2, player_data.shape[0]),
+                1,
+            ),
+        )
+    )
+
+
+def _squads(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame, n_squads: int
+) -> list[list[int]]:
+    """
+    The current squad with up to two players replaced, sometimes by a player in a
+    different position
+    """
+    rng = np.random.default_rng(1)
+    others = player_data.filter(~pl.col("player_id").is_in(current_squad["player_id"]))[
+        "player_id"
+    ].to_numpy()
+    squads = []
+    for _ in range(n_squads):
+        n_transfers = rng.integers(0, 3)
+        squad = rng.permutation(current_squad["player_id"].to_numpy())
+        squad[:n_transfers] = rng.choice(others, n_transfers, replace=False)
+        squads.append(squad.tolist())
+    return squads
+
+
+def test_squad_scorer(player_data: pl.DataFrame, current_squad: pl.DataFrame) -> None:
+    squads = _squads(player_data, current_squad, 20)
+    scorer = SquadScorer(player_data, current_squad=current_squad, n_free_transfers=1)
+    matrix = scorer.squad_matrix(squads)
+    assert (matrix.sum(axis=1) == 15).all()
+    scores = scorer.score(matrix)
+    assert (scores.starting.sum(axis=1) == 11).all()
+    assert not (scores.starting & ~matrix).any()
+
+    for i, player_ids in enumerate(squads):
+        squad = player_data.filter(pl.col("player_id").is_in(player_ids))
+        starting_points = np.sort(
+            StartingTeamOptimiser(squad).optimise()["gameweek_points"].to_numpy()
+        )[::-1]
+        n_transfers = len(set(player_ids) - set(current_squad["player_id"]))
+        assert scores.points[i] == pytest.approx(
+            starting_points.sum() + starting_points[0] - 4 * max(n_transfers - 1, 0)
+        )
+        assert scores.starting[i, scores.captain[i]]
+        assert scorer.player_ids[scores.captain[i]] in player_ids
+        assert scorer.player_ids[scores.vice_captain[i]] in player_ids
+        assert (
+            player_data["gameweek_points"][int(scores.captain[i])] == starting_points[0]
+        )
+        assert (
+            player_data["gameweek_points"][int(scores.vice_captain[i])]
+            == starting_points[1]
+        )
+
+
+def test_squad_scorer_given_starting_team(player_data: pl.DataFrame) -> None:
+    scorer = SquadScorer(player_data.head(4), n_free_transfers=2)
+    squads = np.array([[1, 1, 1, 0], [0, 1, 1, 1]])
+    starting = np.array([[0, 1, 0, 0], [1, 1, 1, 1]])
+    points = player_data["gameweek_points"].head(4).to_numpy()
+    scores = scorer.score(squads, starting, n_transfers=np.array([3, 0]))
+
+    # only the squad's players can start
+    assert scores.starting.tolist() == [
+        [False, True, False, False],
+        [False, True, True, True],
+    ]
+    # the vice captain of a squad with one starter is the top scoring substitute
+    assert scores.captain[0] == 1
+    assert scores.vice_captain[0] == (0 if points[0] > points[2] else 2)
+    assert scores.points[0] == pytest.approx(2 * points[1] - 4)
+    assert scores.points[1] == pytest.approx(points[1:].sum() + points[1:].max())
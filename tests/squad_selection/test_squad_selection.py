@@ -3,7 +3,12 @@ from unittest import mock
 import polars as pl
 import pytest
 
-from fpl_predictor.squad_selection import linear_optimisation, squad_selection
+from fpl_predictor.squad_selection import (
+    linear_optimisation,
+    squad_selection,
+    starting_team,
+)
+from fpl_predictor.squad_selection.solvers import SolveOptions
 
 
 @mock.patch("fpl_predictor.squad_selection.squad_selection.get_unavailable_players")
@@ -100,12 +105,19 @@ def test_annotate_squad_and_compute_points(
 
 
 @pytest.mark.parametrize(
-    "squad_selection_method", ("preselect_cheapest_players", "naive", "invalid")
+    "squad_selection_method",
+    ("joint", "preselect_cheapest_players", "naive", "invalid"),
 )
 def test_squad_and_predicted_score(squad_selection_method: str) -> None:
     mock_pscp_squad_optimiser = mock.Mock(linear_optimisation.PSCPSquadOptimiser)
-    mock_starting_team_optimiser = mock.Mock(linear_optimisation.StartingTeamOptimiser)
+    mock_select_starting_team = mock.Mock(starting_team.select_starting_team)
     mock_squad_optimiser = mock.Mock(linear_optimisation.SquadOptimiser)
+    mock_joint_squad_optimiser = mock.Mock(linear_optimisation.JointSquadOptimiser)
+    mock_joint_squad_optimiser.return_value.optimise_selection.return_value = (
+        linear_optimisation.JointSelection(
+            pl.DataFrame(), pl.DataFrame(), pl.DataFrame()
+        )
+    )
     with mock.patch.object(
         squad_selection,
         "_get_player_data",
@@ -116,11 +128,14 @@ def test_squad_and_predicted_score(squad_selection_method: str) -> None:
         "fpl_predictor.squad_selection.squad_selection.PSCPSquadOptimiser",
         mock_pscp_squad_optimiser,
     ), mock.patch(
-        "fpl_predictor.squad_selection.squad_selection.StartingTeamOptimiser",
-        mock_starting_team_optimiser,
+        "fpl_predictor.squad_selection.squad_selection.select_starting_team",
+        mock_select_starting_team,
     ), mock.patch(
         "fpl_predictor.squad_selection.squad_selection.SquadOptimiser",
         mock_squad_optimiser,
+    ), mock.patch(
+        "fpl_predictor.squad_selection.squad_selection.JointSquadOptimiser",
+        mock_joint_squad_optimiser,
     ), mock.patch(
         "fpl_predictor.squad_selection.squad_selection.SQUAD_SELECTION_METHOD",
         squad_selection_method,
@@ -135,10 +150,14 @@ def test_squad_and_predicted_score(squad_selection_method: str) -> None:
                 1, prediction_method="pred_method"
             )
             mock_annotate_squad_and_compute_points.assert_called_once()
-            mock_starting_team_optimiser.assert_called_once()
-            mock_starting_team_optimiser.return_value.optimise.assert_called_once()
 
         mock_get_player_data.assert_called_once_with(1, "pred_method")
+        if squad_selection_method == "joint":
+            mock_joint_squad_optimiser.assert_called_once()
+            mock_joint_squad_optimiser.return_value.optimise_selection.assert_called_once()
+            mock_select_starting_team.assert_not_called()
+        elif squad_selection_method != "invalid":
+            mock_select_starting_team.assert_called_once()
         if squad_selection_method == "preselect_cheapest_players":
             mock_pscp_squad_optimiser.assert_called_once()
             mock_pscp_squad_optimiser.return_value.optimise.assert_called_once()
@@ -163,15 +182,10 @@ def test_select_squad(mock_squad_and_predicted_score: mock.MagicMock) -> None:
         prediction_method=prediction_method,
     )
 
-    # Check that _squad_and_predicted_score was called the expected number of times with the expected arguments
-    expected_calls = [
-        mock.call(
-            gameweek,
-            current_squad,
-            n,
-            n_free_transfers,
-            prediction_method=prediction_method,
-        )
-        for n in range(1, 15)
-    ]
-    mock_squad_and_predicted_score.assert_has_calls(expected_calls, any_order=True)
+    mock_squad_and_predicted_score.assert_called_once_with(
+        gameweek,
+        current_squad,
+        n_free_transfers=n_free_transfers,
+        prediction_method=prediction_method,
+        solve_options=SolveOptions(),
+    )
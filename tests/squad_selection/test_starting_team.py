@@ -0,0 +1,62 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    STARTING_POSITION_MAX_SELECTIONS,
+    STARTING_POSITION_MIN_SELECTIONS,
+    SquadOptimiser,
+    StartingTeamOptimiser,
+)
+from fpl_predictor.squad_selection.starting_team import (
+    best_starting_teams,
+    formations,
+    select_starting_team,
+)
+
+
+@pytest.fixture(scope="module")
+def squad() -> pl.DataFrame:
+    player_data = pl.read_csv("tests/sample_data/player_data.csv")
+    return SquadOptimiser(player_data).optimise()
+
+
+def test_formations() -> None:
+    all_formations = formations()
+    assert len(all_formations) == len({tuple(f.values()) for f in all_formations})
+    for formation in all_formations:
+        assert sum(formation.values()) == 11
+        for position, n_starters in formation.items():
+            assert STARTING_POSITION_MIN_SELECTIONS[position] <= n_starters
+            assert n_starters <= STARTING_POSITION_MAX_SELECTIONS[position]
+    assert formations({"GKP": 2, "DEF": 3, "MID": 5, "FWD": 3}) == [
+        {"GKP": 1, "DEF": 3, "MID": 4, "FWD": 3},
+        {"GKP": 1, "DEF": 3, "MID": 5, "FWD": 2},
+    ]
+
+
+def test_best_starting_teams_match_milp(squad: pl.DataFrame) -> None:
+    rng = np.random.default_rng(0)
+    gameweek_points = rng.normal(3, 3, (20, squad.shape[0])).round()
+    starting, points = best_starting_teams(gameweek_points, squad["position"].to_list())
+    assert (starting.sum(axis=1) == 11).all()
+    assert points == pytest.approx((gameweek_points * starting).sum(axis=1))
+    for squad_points, expected_points in zip(gameweek_points, points):
+        starting_team = StartingTeamOptimiser(
+            squad.with_columns(pl.Series("gameweek_points", squad_points))
+        ).optimise()
+        assert starting_team["gameweek_points"].sum() == pytest.approx(expected_points)
+
+    with pytest.raises(ValueError):
+        best_starting_teams(gameweek_points[:, :5], squad["position"].to_list()[:5])
+
+
+def test_select_starting_team(squad: pl.DataFrame) -> None:
+    starting_team = select_starting_team(squad)
+    assert starting_team.shape[0] == 11
+    assert (
+        starting_team["gameweek_points"].sum()
+        == StartingTeamOptimiser(squad).optimise()["gameweek_points"].sum()
+    )
+    # squads which aren't full are left to the MILP
+    assert select_starting_team(squad.head(14)).shape[0] == 11
@@ -0,0 +1,101 @@
+from unittest import mock
+
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection import squad_selection
+from fpl_predictor.squad_selection.linear_optimisation import JointSquadOptimiser
+from fpl_predictor.squad_selection.starting_team import select_starting_team
+from fpl_predictor.squad_selection.transfer_evaluator import (
+    apply_transfers,
+    evaluate_transfers,
+)
+
+
+@pytest.mark.parametrize("n_free_transfers", [1, 2])
+def test_evaluate_transfers(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame, n_free_transfers: int
+) -> None:
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        player_data = player_data.with_columns(
+            pl.Series(
+                "gameweek_points",
+                np.round(
+                    player_data["gameweek_points"].to_numpy()
+                    + rng.normal(0, 2, player_data.shape[0]),
+                    1,
+                ),
+            )
+        )
+        transfers = evaluate_transfers(player_data, current_squad, n_free_transfers)
+        assert transfers.shape[0] == 10
+        assert (transfers["cost"] <= 100 + 1e-9).all()
+        assert transfers["predicted_points"].is_sorted(descending=True)
+
+        # the best squad within two transfers, scored the same way
+        joint_optimiser = JointSquadOptimiser(
+            player_data,
+            current_squad=current_squad,
+            n_substitutions=2,
+            n_free_transfers=n_free_transfers,
+            bench_weight=0,
+        )
+        assert transfers["predicted_points"][0] == pytest.approx(
+            joint_optimiser.solve().objective
+        )
+
+        for row in transfers.iter_rows(named=True):
+            squad = apply_transfers(
+                player_data, current_squad, row["transfers_out"], row["transfers_in"]
+            )
+            assert squad.shape[0] == 15
+            assert squad["cost"].sum() == pytest.approx(row["cost"])
+            assert (squad.group_by("team_id").len()["len"] <= 3).all()
+            _, points = squad_selection.annotate_squad_and_compute_points(
+                squad,
+                select_starting_team(squad),
+                row["n_transfers"],
+                n_free_transfers,
+            )
+            assert points == pytest.approx(row["predicted_points"])
+
+
+def test_evaluate_transfers_limits(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    transfers = evaluate_transfers(player_data, current_squad, max_transfers=1, k=1000)
+    assert set(transfers["n_transfers"]) == {0, 1}
+
+    # the current squad is over the budget, so a cheaper player must come in
+    transfers = evaluate_transfers(
+        player_data, current_squad, total_cost=current_squad["cost"].sum() - 1, k=1000
+    )
+    assert transfers.shape[0] > 0
+    assert (transfers["n_transfers"] > 0).all()
+
+    with pytest.raises(ValueError):
+        evaluate_transfers(player_data, current_squad, max_transfers=3)
+    with pytest.raises(ValueError):
+        evaluate_transfers(player_data, current_squad.head(14))
+
+
+def test_squad_and_predicted_score(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    with mock.patch.object(
+        squad_selection, "_get_player_data", return_value=player_data
+    ), mock.patch(
+        "fpl_predictor.squad_selection.squad_selection.SQUAD_SELECTION_METHOD",
+        "transfer_evaluator",
+    ):
+        squad, points = squad_selection._squad_and_predicted_score(
+            1, current_squad, prediction_method="pred_method"
+        )
+        assert squad.shape[0] == 15
+        assert points == pytest.approx(
+            evaluate_transfers(player_data, current_squad)["predicted_points"][0]
+        )
+        with pytest.raises(ValueError):
+            squad_selection._squad_and_predicted_score(1, prediction_method="pred")
@@ -0,0 +1,92 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    BENCH_WEIGHT,
+    TRANSFER_HIT_COST,
+)
+from fpl_predictor.squad_selection.transfer_planner import (
+    MAX_BANKED_TRANSFERS,
+    TransferPlanner,
+)
+
+
+def _multi_gameweek_data(
+    player_data: pl.DataFrame, n_gameweeks: int, seed: int = 0
+) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pl.concat(
+        player_data.with_columns(
+            pl.lit(gw).alias("gameweek"),
+            pl.Series(
+                "gameweek_points", rng.poisson(2, len(player_data)).astype(float)
+            ),
+        )
+        for gw in range(1, n_gameweeks + 1)
+    )
+
+
+def test_transfer_planner(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    n_free_transfers = 1
+    plan = TransferPlanner(
+        _multi_gameweek_data(player_data, 3), current_squad, n_free_transfers
+    ).plan()
+
+    squad_sizes = plan.squads.group_by("gameweek").agg(
+        pl.len(), pl.col("starting").sum(), pl.col("captain").sum()
+    )
+    assert squad_sizes.sort("gameweek").rows() == [
+        (gw, 15, 11, 1) for gw in range(1, 4)
+    ]
+
+    # the objective is consistent with the squads and free transfer rules
+    expected_points = 0.0
+    for gw, squad in plan.squads.sort("gameweek").group_by(
+        "gameweek", maintain_order=True
+    ):
+        starting_points = squad.filter("starting")["gameweek_points"].to_numpy()
+        bench_points = squad.filter(~pl.col("starting"))["gameweek_points"].to_numpy()
+        captain_points = squad.filter("captain")["gameweek_points"].to_numpy()
+        expected_points += (
+            starting_points.sum()
+            + captain_points.sum()
+            + BENCH_WEIGHT * bench_points.sum()
+        )
+        n_transfers = plan.transfers.filter(
+            (pl.col("gameweek") == gw) & (pl.col("direction") == "in")
+        ).shape[0]
+        expected_points -= max(n_transfers - n_free_transfers, 0) * TRANSFER_HIT_COST
+        n_free_transfers = min(
+            max(n_free_transfers - n_transfers, 0) + 1, MAX_BANKED_TRANSFERS
+        )
+    assert plan.expected_points == pytest.approx(expected_points)
+
+    transfer_counts = plan.transfers.group_by("gameweek", "direction").len()
+    assert (
+        transfer_counts.pivot(values="len", index="gameweek", columns="direction")
+        .select(pl.col("in") == pl.col("out"))
+        .to_series()
+        .all()
+    )
+
+
+def test_transfer_planner_sells_players_without_predictions(
+    player_data: pl.DataFrame, current_squad: pl.DataFrame
+) -> None:
+    unavailable_player = current_squad["player_id"][0]
+    plan = TransferPlanner(
+        player_data.filter(pl.col("player_id") != unavailable_player).with_columns(
+            pl.lit(1).alias("gameweek")
+        ),
+        current_squad,
+        n_free_transfers=1,
+    ).plan()
+    assert (
+        plan.transfers.filter(pl.col("direction") == "out")["player_id"]
+        .is_in([unavailable_player])
+        .any()
+    )
+    assert plan.squads.shape[0] == 15
@@ -0,0 +1,79 @@
+import polars as pl
+import pytest
+
+from fpl_predictor.squad_selection.linear_optimisation import (
+    PSCPSquadOptimiser,
+    SquadOptimiser,
+)
+from fpl_predictor.squad_selection.solvers import INFEASIBLE, OPTIMAL, ScipyBackend
+from fpl_predictor.squad_selection.what_if import (
+    WhatIf,
+    budget_what_ifs,
+    price_what_ifs,
+    sweep,
+)
+
+
+def test_sweep(player_data: pl.DataFrame) -> None:
+    best_player = player_data.sort("gameweek_points", descending=True).row(
+        0, named=True
+    )
+    what_ifs = [
+        *budget_what_ifs([95.0, 100.0, 105.0]),
+        *price_what_ifs(best_player["player_id"], [0.0, 5.0]),
+        WhatIf("injury", points_changes={best_player["player_id"]: -100.0}),
+    ]
+    optimiser = SquadOptimiser(player_data)
+    result = sweep(optimiser, what_ifs, solver_class=ScipyBackend)
+    assert optimiser.presolve
+    assert result.columns[:5] == [
+        "what_if",
+        "name",
+        "total_cost",
+        "objective",
+        "status",
+    ]
+    assert (result["status"] == OPTIMAL).all()
+    assert (result.group_by("what_if").len().sort("what_if")["len"] == 15).all()
+    assert result["what_if"].n_unique() == len(what_ifs)
+
+    objectives = dict(
+        result.group_by("what_if").agg(pl.col("objective").first()).iter_rows()
+    )
+    assert objectives[0] <= objectives[1] <= objectives[2]
+    assert objectives[4] <= objectives[3]
+    assert objectives[1] == pytest.approx(
+        SquadOptimiser(player_data).optimise()["gameweek_points"].sum()
+    )
+    for what_if, squad in result.group_by(["what_if"]):
+        assert squad["cost"].sum() <= squad["total_cost"][0] + 1e-9
+    assert (
+        best_player["player_id"]
+        not in result.filter(pl.col("what_if") == 5)["player_id"].to_list()
+    )
+
+    # the same answers from each worker's own problem
+    parallel_result = sweep(optimiser, what_ifs, max_workers=2)
+    assert parallel_result.group_by("what_if").agg(pl.col("objective").first()).sort(
+        "what_if"
+    )["objective"].to_list() == pytest.approx(
+        [objectives[i] for i in range(len(what_ifs))]
+    )
+
+
+def test_sweep_reports_failed_what_ifs(player_data: pl.DataFrame) -> None:
+    result = sweep(SquadOptimiser(player_data), budget_what_ifs([30.0, 100.0]))
+    failed = result.filter(pl.col("what_if") == 0)
+    assert failed.shape[0] == 1
+    assert failed["status"][0] == INFEASIBLE
+    assert failed["objective"][0] is None and failed["player_id"][0] is None
+    assert (result.filter(pl.col("what_if") == 1)["status"] == OPTIMAL).all()
+    assert result.filter(pl.col("what_if") == 1).shape[0] == 15
+
+
+def test_sweep_keeps_preselected_players(player_data: pl.DataFrame) -> None:
+    optimiser = PSCPSquadOptimiser(player_data)
+    result = sweep(optimiser, [WhatIf("base")], solver_class=ScipyBackend)
+    assert result.shape[0] == 15
+    assert set(optimiser.selected_players["player_id"]) <= set(result["player_id"])
+    assert result["objective"][0] == pytest.approx(result["gameweek_points"].sum())
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("joblib", "s3fs", "scipy", "sklearn", "xgboost")
+
+
+def _imported_modules(module: str) -> set[str]:
+    """
+    The modules a fresh interpreter imports with module, from its -X importtime report
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    return {
+        line.split("|")[-1].strip()
+        for line in stderr.splitlines()[1:]  # skip the header
+        if line.startswith("import time:")
+    }
+
+
+@pytest.mark.parametrize(
+    "module, heavy_modules",
+    [
+        ("fpl_predictor.scripts.select_gameweek_squad", HEAVY_MODULES + ("bs4",)),
+        ("fpl_predictor.scripts.solve_options", HEAVY_MODULES),
+        ("fpl_predictor.squad_selection", HEAVY_MODULES + ("polars",)),
+        (
+            "fpl_predictor.squad_selection.player_gw_score_prediction",
+            ("joblib", "s3fs", "sklearn", "xgboost"),
+        ),
+    ],
+)
+def test_import_time(module: str, heavy_modules: tuple[str, ...]) -> None:
+    imported_modules = _imported_modules(module)
+    assert module in imported_modules
+    assert not [
+        name for name in imported_modules if name.split(".")[0] in heavy_modules
+    ]